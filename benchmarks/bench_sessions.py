@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Benchmarks
+Builds synthetic .atlas trees and measures how the session scripts scale
+
+For every tree size the suite records, per entry point:
+  - wall time (median of --repeat runs)
+  - peak RSS of the child process (via wait4)
+  - Python-level file operations (opens, directory listings, renames,
+    removals), counted with an audit hook installed before the script runs
+
+Examples:
+  python benchmarks/bench_sessions.py                          # 1k and 10k sessions
+  python benchmarks/bench_sessions.py --sizes 1000,10000,100000 -o results.json
+  python benchmarks/bench_sessions.py --compare baseline.json -o results.json
+  python benchmarks/bench_sessions.py --delta --entry-points save   # Delta storage mode
+  python benchmarks/bench_sessions.py --storage journal              # Single-file journal
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Files copied into the synthetic ATLAS checkout
+ATLAS_FILES = ["scripts", "SHORT_IMPORTANT_MEMORY_TEMPLATE.md", "CLAUDE_TEMPLATE.md"]
+
+FILE_EVENTS = {
+    "open": "opens",
+    "os.listdir": "listdirs",
+    "os.scandir": "listdirs",
+    "os.rename": "renames",
+    "os.replace": "renames",
+    "os.remove": "removes",
+    "os.unlink": "removes",
+    "os.link": "links",
+    "shutil.copyfile": "copies",
+}
+
+# Runs the target script after installing an audit hook that tallies file
+# operations; the tally is written to ATLAS_BENCH_COUNTS at exit.
+BOOTSTRAP = """
+import atexit, json, os, runpy, sys
+events = json.loads(os.environ["ATLAS_BENCH_EVENTS"])
+counts = dict.fromkeys(set(events.values()), 0)
+def hook(event, args):
+    key = events.get(event)
+    if key is not None:
+        counts[key] += 1
+sys.addaudithook(hook)
+def dump():
+    with open(os.environ["ATLAS_BENCH_COUNTS"], "w") as f:
+        json.dump(counts, f)
+atexit.register(dump)
+script = sys.argv[1]
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(script))
+runpy.run_path(script, run_name="__main__")
+"""
+
+ENTRY_POINTS = {
+    "save": ["save_session.py", "-c", "Benchmark save", "-n", "Keep measuring", "--no-daemon"],
+    "resume-list": ["resume_session.py", "-l", "--no-daemon"],
+    "resume": ["resume_session.py", "--no-daemon"],
+    "resume-claude": ["resume_session.py", "--claude", "--no-daemon"],
+    "resume-file": ["resume_session.py", "--file", "src/module_7.py", "--no-daemon"],
+    "rebuild-catalog": ["manage_sessions.py", "rebuild-catalog"],
+    "update": ["update_atlas.py"],
+}
+
+
+def git(*args, cwd):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+class SyntheticTree:
+    """A throwaway project with an ATLAS checkout, history and a dirty work tree"""
+
+    def __init__(self, root, sessions, log_entries, dirty_files, delta=False, storage="files"):
+        self.root = Path(root)
+        self.sessions = sessions
+        self.log_entries = log_entries
+        self.dirty_files = dirty_files
+        self.delta = delta
+        self.storage = storage
+        self.project = self.root / "project"
+        self.atlas = self.project / ".atlas"
+
+    def build(self):
+        self._make_upstream()
+        self._make_project()
+        self._make_sessions()
+        self._make_working_logs()
+        return self
+
+    def _make_upstream(self):
+        """A local ATLAS 'origin' so update_atlas.py can fetch without a network"""
+        source = self.root / "atlas-src"
+        source.mkdir(parents=True)
+        for name in ATLAS_FILES:
+            src = REPO_ROOT / name
+            if src.is_dir():
+                shutil.copytree(src, source / name, ignore=shutil.ignore_patterns("__pycache__"))
+            elif src.exists():
+                shutil.copy2(src, source / name)
+        git("init", "-q", "-b", "main", cwd=source)
+        git("add", "-A", cwd=source)
+        git("-c", "user.name=bench", "-c", "user.email=bench@example.com",
+            "commit", "-qm", "atlas", cwd=source)
+        self.upstream = source
+
+    def _make_project(self):
+        self.project.mkdir()
+        git("init", "-q", "-b", "main", cwd=self.project)
+        src = self.project / "src"
+        src.mkdir()
+        for i in range(self.dirty_files):
+            (src / f"module_{i}.py").write_text(f"VALUE = {i}\n")
+        git("add", "-A", cwd=self.project)
+        git("-c", "user.name=bench", "-c", "user.email=bench@example.com",
+            "commit", "-qm", "initial", cwd=self.project)
+        # Dirty every tracked file and add as many untracked ones
+        for i in range(self.dirty_files):
+            (src / f"module_{i}.py").write_text(f"VALUE = {i + 1}\n")
+            (src / f"scratch_{i}.py").write_text("# scratch\n")
+
+        git("clone", "-q", str(self.upstream), str(self.atlas), cwd=self.root)
+        shutil.copy2(self.atlas / "SHORT_IMPORTANT_MEMORY_TEMPLATE.md",
+                     self.atlas / "SHORT_IMPORTANT_MEMORY.md")
+
+    def _make_sessions(self):
+        sys.path.insert(0, str(self.atlas / "scripts"))
+        try:
+            from session_store import SessionStore
+        finally:
+            sys.path.pop(0)
+
+        store = SessionStore(self.atlas, delta=self.delta, backend=self.storage)
+        store.sessions_dir.mkdir(parents=True, exist_ok=True)
+        last_on_branch = {}
+        short_memory = (self.atlas / "SHORT_IMPORTANT_MEMORY.md").read_text(encoding='utf-8')
+        start = datetime.now() - timedelta(minutes=30 * self.sessions)
+        for i in range(self.sessions):
+            ts = start + timedelta(minutes=30 * i)
+            # Work on a branch drifts slowly: a new commit every other save,
+            # a different set of modified files every few saves
+            branch, n = i % 13, i // 13
+            files = [f"src/module_{(branch * 3 + n // 4 + k) % 50}.py" for k in range(5)]
+            commits = [f"{branch:02x}{n // 2 - k:05x} Commit {n // 2 - k} on feature/{branch}" for k in range(5)]
+            session = {
+                "session_id": ts.strftime("%Y%m%d_%H%M%S"),
+                "timestamp": ts.isoformat(),
+                "atlas_identity": "ATLAS - Adaptive Technical Learning and Architecture System",
+                "context": f"Worked on feature {i % 97}: refactored module_{i % 50}.py and fixed bug #{i}",
+                "next_task": f"Write tests for feature {i % 97} and review module_{(i + 1) % 50}.py",
+                "extended_context": {"decisions": [f"Decision {i}", f"Use approach {i % 5}"]},
+                "working_directory": str(self.project),
+                "python_version": sys.version,
+                "git_info": {
+                    "branch": f"feature/{branch}",
+                    "modified_files": files,
+                    "staged_files": [],
+                    "recent_commits": commits,
+                    "status_summary": "\n".join(f" M {path}" for path in files),
+                },
+                "short_memory": short_memory,
+                "professional_mode": True,
+                "mcp_available": "Check during runtime",
+                "session_metadata": {
+                    "year": ts.strftime("%Y"),
+                    "month": ts.strftime("%m-%b").lower(),
+                    "day": ts.strftime("%d"),
+                    "user": "bench",
+                },
+            }
+            name = f"Session_{session['session_id']}.json"
+            if self.delta or self.storage != "files":
+                branch = session["git_info"]["branch"]
+                location, offset, length = store.write(session, parent=last_on_branch.get(branch))
+                last_on_branch[branch] = session["session_id"]
+            else:
+                location, offset, length = name, None, None
+                store.write_file(store.sessions_dir / name, store.pack(session))
+        if self.sessions:
+            store.set_latest(session, location, offset, length)
+
+    def _make_working_logs(self):
+        """One busy day file for today, so save appends to a large log"""
+        now = datetime.now()
+        log_dir = self.atlas / "WORKING_LOG" / now.strftime("%Y") / now.strftime("%m-%b").lower()
+        log_dir.mkdir(parents=True, exist_ok=True)
+        with open(log_dir / f"{now.strftime('%d')}.md", 'w', encoding='utf-8') as f:
+            f.write("# Working Log\n\n---\n")
+            for i in range(self.log_entries):
+                f.write(f"\n## Session: {now:%Y-%m-%d} 00:00:{i % 60:02d}\n\n### Context\n"
+                        f"Entry {i}\n\n### Next Task\nMore work\n\n---\n")
+
+    def disk_usage(self):
+        sessions = self.atlas / "sessions"
+        return sum(p.stat().st_size for p in sessions.rglob("*") if p.is_file())
+
+    def session_files(self):
+        """Size of each stored session, keyed by its ID"""
+        sessions = self.atlas / "sessions"
+        if self.storage == "journal":
+            sys.path.insert(0, str(self.atlas / "scripts"))
+            try:
+                from session_journal import JOURNAL_FILE, SessionJournal
+            finally:
+                sys.path.pop(0)
+            return {sid: length for sid, _, length in SessionJournal(sessions / JOURNAL_FILE).entries()}
+        return {p.stem[len("Session_"):]: p.stat().st_size for p in sessions.glob("Session_*.json")}
+
+
+def run_entry_point(tree, name, counts_file):
+    """Run one script in the synthetic project and measure it"""
+    script, *args = ENTRY_POINTS[name]
+    env = dict(os.environ,
+               ATLAS_BENCH_EVENTS=json.dumps(FILE_EVENTS),
+               ATLAS_BENCH_COUNTS=str(counts_file),
+               ATLAS_NO_DAEMON="1",
+               ATLAS_DELTA="1" if tree.delta else "0",
+               ATLAS_STORAGE=tree.storage)
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", BOOTSTRAP, str(tree.atlas / "scripts" / script), *args],
+        cwd=tree.project, env=env,
+        stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    # update_atlas.py asks before updating a dirty checkout
+    proc.stdin.write(b"y\n")
+    proc.stdin.close()
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    try:
+        file_ops = json.loads(Path(counts_file).read_text())
+    except (OSError, ValueError):
+        file_ops = {}
+    return {"wall_s": wall, "peak_rss_kb": rss_kb, "file_ops": file_ops, "exit_code": proc.returncode}
+
+
+def benchmark(size, args):
+    results = []
+    with tempfile.TemporaryDirectory(prefix="atlas-bench-") as tmp:
+        print(f"\n🏗️  Building tree with {size} sessions...", flush=True)
+        started = time.perf_counter()
+        tree = SyntheticTree(tmp, size, args.log_entries, args.dirty_files, args.delta, args.storage).build()
+        print(f"   built in {time.perf_counter() - started:.1f}s, "
+              f"sessions/ holds {tree.disk_usage() / 1048576:.1f} MiB")
+        built = tree.session_files()
+
+        for name in args.entry_points:
+            runs = [run_entry_point(tree, name, Path(tmp) / "counts.json") for _ in range(args.repeat)]
+            median = statistics.median(run["wall_s"] for run in runs)
+            result = {
+                "sessions": size,
+                "entry_point": name,
+                "wall_s": round(median, 4),
+                "wall_s_first": round(runs[0]["wall_s"], 4),
+                "peak_rss_kb": max(run["peak_rss_kb"] for run in runs),
+                "file_ops": runs[-1]["file_ops"],
+                "exit_code": runs[-1]["exit_code"],
+            }
+            results.append(result)
+            ops = sum(result["file_ops"].values())
+            print(f"   {name:<14} {result['wall_s'] * 1000:9.1f} ms  "
+                  f"first {result['wall_s_first'] * 1000:9.1f} ms  "
+                  f"{result['peak_rss_kb'] / 1024:7.1f} MiB  {ops:7d} file ops"
+                  + ("" if result["exit_code"] == 0 else f"  (exit {result['exit_code']})"))
+        # Bytes each benchmark save wrote to its session file
+        written = [size for name, size in tree.session_files().items() if name not in built]
+        results.append({
+            "sessions": size,
+            "entry_point": "storage",
+            "sessions_bytes": tree.disk_usage(),
+            "session_file_bytes": round(statistics.mean(built.values())) if built else None,
+            "save_bytes": round(statistics.mean(written)) if written else None,
+        })
+        print(f"   {'storage':<14} {results[-1]['sessions_bytes'] / 1048576:9.1f} MiB  "
+              f"{results[-1]['session_file_bytes'] or 0:7d} B/session"
+              + (f"  {results[-1]['save_bytes']:7d} B/save" if written else ""))
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    """Print changes against an earlier results file; returns True on regression"""
+    baseline = json.loads(Path(baseline_path).read_text())
+    before = {(r["sessions"], r["entry_point"]): r for r in baseline["results"] if "wall_s" in r}
+    regressed = False
+    print(f"\n📊 Compared with {baseline_path} (threshold {threshold:.0%})")
+    for result in results:
+        old = before.get((result["sessions"], result["entry_point"]))
+        if old is None or "wall_s" not in result or not old["wall_s"]:
+            continue
+        change = result["wall_s"] / old["wall_s"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  ⚠️  REGRESSION"
+            regressed = True
+        print(f"   {result['entry_point']:<14} {result['sessions']:>7}  "
+              f"{old['wall_s'] * 1000:9.1f} → {result['wall_s'] * 1000:9.1f} ms  ({change:+.0%}){flag}")
+    return regressed
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Atlas Session Manager - Scaling benchmarks for the session scripts",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("Examples:")[1]
+    )
+    parser.add_argument('--sizes', default="1000,10000",
+                       help='Comma-separated session counts (default 1000,10000)')
+    parser.add_argument('--entry-points', default=",".join(ENTRY_POINTS),
+                       help=f'Comma-separated subset of: {", ".join(ENTRY_POINTS)}')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Runs per entry point; the median wall time is reported (default 3)')
+    parser.add_argument('--log-entries', type=int, default=2000,
+                       help="Entries in today's working log file (default 2000)")
+    parser.add_argument('--dirty-files', type=int, default=500,
+                       help='Modified and untracked files in the project work tree (default 500)')
+    parser.add_argument('--delta', action='store_true',
+                       help='Store synthetic sessions and benchmark saves in delta mode')
+    parser.add_argument('--storage', choices=("files", "journal"), default="files",
+                       help='Session storage backend for the trees and the runs (default files)')
+    parser.add_argument('-o', '--output',
+                       help='Write machine-readable results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                       help='Compare wall times against an earlier results file')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                       help='Relative slowdown reported as a regression (default 0.2)')
+
+    args = parser.parse_args()
+    args.entry_points = [name for name in args.entry_points.split(",") if name]
+    unknown = set(args.entry_points) - set(ENTRY_POINTS)
+    if unknown:
+        parser.error(f"unknown entry point(s): {', '.join(sorted(unknown))}")
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        results.extend(benchmark(size, args))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "log_entries": args.log_entries,
+            "dirty_files": args.dirty_files,
+            "delta": args.delta,
+            "storage": args.storage,
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
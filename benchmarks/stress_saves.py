@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Concurrent save stress test
+Starts several processes that save sessions as fast as they can into one
+synthetic .atlas tree, then checks that nothing was lost or overwritten
+
+Every save in a process lands in the same second as its neighbours, so
+session IDs collide constantly; each save must still end up as its own
+stored session (file or journal record), catalog row and working log entry,
+and LATEST.json must point at a session that exists.
+
+Examples:
+  python benchmarks/stress_saves.py                      # 8 processes x 25 saves
+  python benchmarks/stress_saves.py -p 16 -k 50 --keep   # keep the tree for inspection
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def git(*args, cwd):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def make_project(root):
+    project = Path(root) / "project"
+    project.mkdir()
+    git("init", "-q", cwd=project)
+    (project / "README.md").write_text("stress\n")
+    git("add", "-A", cwd=project)
+    git("-c", "user.name=bench", "-c", "user.email=bench@example.com",
+        "commit", "-qm", "initial", cwd=project)
+    atlas = project / ".atlas"
+    shutil.copytree(REPO_ROOT / "scripts", atlas / "scripts",
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copy2(REPO_ROOT / "SHORT_IMPORTANT_MEMORY_TEMPLATE.md",
+                 atlas / "SHORT_IMPORTANT_MEMORY.md")
+    return project
+
+
+def worker(project, worker_id, saves, barrier):
+    os.chdir(project)
+    sys.path.insert(0, str(project / ".atlas" / "scripts"))
+    from save_session import AtlasSessionSaver
+
+    saver = AtlasSessionSaver()
+    barrier.wait()
+    for i in range(saves):
+        saver.save_session(f"stress w{worker_id} s{i}", f"next w{worker_id} s{i}")
+
+
+def check(project, expected):
+    """Return a list of problems found in the tree after the run"""
+    atlas = project / ".atlas"
+    sys.path.insert(0, str(atlas / "scripts"))
+    from session_catalog import SessionCatalog
+    from session_store import SessionStore
+
+    store = SessionStore(atlas)
+    problems = []
+
+    stored = list(store.locations())
+    if len(stored) != len(expected):
+        problems.append(f"{len(stored)} stored sessions, expected {len(expected)}")
+    contexts = {store.read(location, offset, length)["context"] for _, location, offset, length in stored}
+    missing = expected - contexts
+    if missing:
+        problems.append(f"{len(missing)} saves lost, e.g. {sorted(missing)[:3]}")
+
+    catalog = SessionCatalog(atlas)
+    if catalog.count() != len(expected):
+        problems.append(f"{catalog.count()} catalog rows, expected {len(expected)}")
+    missing_rows, stale_rows = catalog.verify()
+    if missing_rows or stale_rows:
+        problems.append(f"catalog out of sync: {len(missing_rows)} missing, {len(stale_rows)} stale")
+
+    pointer = store.read_latest_pointer()
+    if not pointer or catalog.get(pointer.get("latest", "")) is None:
+        problems.append(f"LATEST.json does not point at a session: {pointer}")
+
+    entries = sum(path.read_text(encoding='utf-8').count("\n## Session: ")
+                  for path in (atlas / "WORKING_LOG").glob("*/*/*.md"))
+    if entries != len(expected):
+        problems.append(f"{entries} working log entries, expected {len(expected)}")
+
+    leftovers = list(store.sessions_dir.glob(".*.tmp"))
+    if leftovers:
+        problems.append(f"{len(leftovers)} temporary files left behind")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Atlas Session Manager - Concurrent save stress test",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("Examples:", 1)[1]
+    )
+    parser.add_argument('-p', '--processes', type=int, default=8,
+                       help='Concurrent saving processes (default: 8)')
+    parser.add_argument('-k', '--saves', type=int, default=25,
+                       help='Saves per process (default: 25)')
+    parser.add_argument('--keep', action='store_true',
+                       help='Keep the synthetic tree and print its location')
+
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="atlas-stress-")
+    try:
+        project = make_project(root)
+        os.environ["ATLAS_NO_DAEMON"] = "1"
+        barrier = multiprocessing.Barrier(args.processes)
+        workers = [
+            multiprocessing.Process(target=worker, args=(project, n, args.saves, barrier))
+            for n in range(args.processes)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        failed = [process.exitcode for process in workers if process.exitcode]
+        if failed:
+            print(f"❌ {len(failed)} worker(s) crashed")
+            return 1
+
+        expected = {f"stress w{n} s{i}" for n in range(args.processes) for i in range(args.saves)}
+        problems = check(project, expected)
+        total = len(expected)
+        if problems:
+            print(f"❌ {total} concurrent saves: {len(problems)} problem(s)")
+            for problem in problems:
+                print(f"   - {problem}")
+            return 1
+        print(f"✅ {total} concurrent saves from {args.processes} processes, none lost")
+        print(json.dumps({"processes": args.processes, "saves": args.saves}))
+        return 0
+    finally:
+        if args.keep:
+            print(f"Tree kept at {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,9 +25,53 @@ else
     echo "⚠️  Warning: Not in a git repository. ATLAS works best with git."
 fi
 
-# Clone ATLAS
-echo "📦 Cloning ATLAS repository..."
-git clone https://github.com/daveygoode/atlas.git .atlas
+# Clone ATLAS, preferring a shallow clone from the local mirror
+ATLAS_URL="${ATLAS_URL:-https://github.com/daveygoode/atlas.git}"
+ATLAS_CACHE_DIR="${ATLAS_CACHE_DIR:-$HOME/.cache/atlas}"
+ATLAS_MIRROR="$ATLAS_CACHE_DIR/atlas.git"
+
+if [ -z "$ATLAS_NO_CACHE" ] && [ ! -f "$ATLAS_MIRROR/HEAD" ] && [ -z "$ATLAS_OFFLINE" ]; then
+    echo "📦 Creating local ATLAS mirror in $ATLAS_MIRROR..."
+    mkdir -p "$ATLAS_CACHE_DIR"
+    # The lock atlas_mirror.py takes, so installs and refreshes never race
+    if command -v flock >/dev/null 2>&1; then
+        exec 9>>"$ATLAS_CACHE_DIR/.atlas.git.lock"
+        flock 9
+        ATLAS_MIRROR_LOCKED=1
+    fi
+    if [ -f "$ATLAS_MIRROR/HEAD" ]; then
+        # Another install created it while we waited
+        :
+    elif ! git clone --mirror --quiet "$ATLAS_URL" "$ATLAS_MIRROR.tmp.$$"; then
+        rm -rf "$ATLAS_MIRROR.tmp.$$"
+        echo "⚠️  Could not create the mirror; cloning directly."
+    else
+        if [ -n "$ATLAS_MIRROR_LOCKED" ] && [ -d "$ATLAS_MIRROR" ] && [ ! -f "$ATLAS_MIRROR/HEAD" ]; then
+            # Left behind by an interrupted run; nobody else can be writing it
+            rm -rf "$ATLAS_MIRROR"
+        fi
+        # Never mv onto an existing directory: the clone would end up inside it
+        if [ -e "$ATLAS_MIRROR" ] || ! mv "$ATLAS_MIRROR.tmp.$$" "$ATLAS_MIRROR" 2>/dev/null; then
+            rm -rf "$ATLAS_MIRROR.tmp.$$"
+        fi
+    fi
+    if [ -n "$ATLAS_MIRROR_LOCKED" ]; then
+        exec 9>&-
+    fi
+fi
+
+if [ -z "$ATLAS_NO_CACHE" ] && [ -f "$ATLAS_MIRROR/HEAD" ]; then
+    echo "📦 Cloning ATLAS from local mirror..."
+    git clone --quiet --depth 1 --branch main "file://$ATLAS_MIRROR" .atlas || exit 1
+    git -C .atlas remote set-url origin "$ATLAS_URL"
+elif [ -n "$ATLAS_OFFLINE" ]; then
+    echo "❌ Error: ATLAS_OFFLINE is set but there is no mirror in $ATLAS_MIRROR."
+    echo "Create one on a machine with network access: python .atlas/scripts/atlas_mirror.py refresh"
+    exit 1
+else
+    echo "📦 Cloning ATLAS repository..."
+    git clone "$ATLAS_URL" .atlas || exit 1
+fi
 
 # Check for existing CLAUDE.md
 if [ -f "CLAUDE.md" ]; then
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Daemon client
+Lets the session scripts hand work to a running atlas_daemon.py and fall
+back to doing it in-process when no daemon is listening
+"""
+
+import json
+import os
+import socket
+
+from atlas_io import env_flag, find_atlas_root
+
+
+# Long enough for a save that has to wait on git in a large repository
+CLIENT_TIMEOUT = 60.0
+
+
+def socket_path(atlas_root=None):
+    return (atlas_root or find_atlas_root()) / "index" / "atlasd.sock"
+
+
+def exchange(sock, payload):
+    """Send one JSON request on a connected socket and return the reply"""
+    sock.sendall(json.dumps(payload).encode('utf-8') + b"\n")
+    sock.shutdown(socket.SHUT_WR)
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return json.loads(b"".join(chunks))
+
+
+def connect(path, timeout=CLIENT_TIMEOUT):
+    """Connect to the daemon socket; returns None if nobody is listening"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        # Missing or stale socket from a daemon that is gone
+        sock.close()
+        return None
+    return sock
+
+
+def daemon_request(command, args, atlas_root=None):
+    """Run a command in the daemon; returns None if there is no daemon to ask
+
+    Only connection problems return None, so the caller can safely fall back
+    to in-process mode without risking doing the work twice.
+    """
+    if env_flag("ATLAS_NO_DAEMON") or not hasattr(socket, "AF_UNIX"):
+        return None
+    path = socket_path(atlas_root)
+    if not path.exists():
+        return None
+    payload = {
+        "command": command,
+        "args": args,
+        "cwd": os.getcwd(),
+        "env": {key: value for key, value in os.environ.items() if key.startswith(("ATLAS_", "USER"))},
+    }
+    sock = connect(path)
+    if sock is None:
+        return None
+    try:
+        response = exchange(sock, payload)
+    except (OSError, ValueError) as e:
+        return {"output": f"❌ Atlas daemon failed to answer: {e}\n", "exit_code": 1}
+    finally:
+        sock.close()
+    if not response.get("ok"):
+        return {"output": f"❌ Atlas daemon error: {response.get('error')}\n", "exit_code": 1}
+    return response
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Daemon
+Optional long-running process that serves save/resume requests over a local
+Unix socket, keeping the session catalog, search index and blob cache warm
+"""
+
+import argparse
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+
+from atlas_client import connect, exchange, socket_path
+from atlas_io import env_flag, find_atlas_root
+from post_commit_hook import common_dir, git_dir
+from resume_session import AtlasSessionResumer, run_resume
+from save_session import AtlasSessionSaver, run_save
+
+
+# Saves arriving within this many seconds of each other for the same
+# directory reuse one git snapshot, as long as git's own state is unchanged
+# (override with ATLAS_DAEMON_GIT_TTL; 0 turns the reuse off)
+GIT_TTL = 2.0
+
+# Requests are served one at a time, so a client that connects and then stalls
+# is dropped after this many seconds (override with ATLAS_DAEMON_IO_TIMEOUT)
+IO_TIMEOUT = 5.0
+
+
+def git_state(directory):
+    """mtimes of HEAD, the branch it points at and the index
+
+    A commit, checkout, reset or `git add` changes at least one of them.
+    """
+    path = os.path.abspath(directory)
+    while not os.path.exists(os.path.join(path, ".git")):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    git_directory = git_dir(path)
+    files = [os.path.join(git_directory, "HEAD"), os.path.join(git_directory, "index")]
+    try:
+        with open(files[0], encoding='utf-8') as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    if head.startswith("ref: "):
+        refs_directory = common_dir(git_directory)
+        files += [os.path.join(refs_directory, head[len("ref: "):]), os.path.join(refs_directory, "packed-refs")]
+    state = []
+    for name in files:
+        try:
+            state.append(os.stat(name).st_mtime_ns)
+        except OSError:
+            state.append(None)
+    return tuple(state)
+
+
+class AtlasDaemon:
+    def __init__(self, atlas_root):
+        self.atlas_root = atlas_root
+        self.socket_path = socket_path(atlas_root)
+        self.saver = AtlasSessionSaver()
+        self.resumer = AtlasSessionResumer()
+        self.saver.resumer = self.resumer
+        self.git_ttl = float(os.getenv("ATLAS_DAEMON_GIT_TTL", GIT_TTL))
+        self.io_timeout = float(os.getenv("ATLAS_DAEMON_IO_TIMEOUT", IO_TIMEOUT))
+        self._git_cache = {}
+        self._get_git_info = self.saver.get_git_info
+        self.saver.get_git_info = self.cached_git_info
+        self.running = False
+
+    def cached_git_info(self):
+        """Reuse a very recent git snapshot for bursts of hook-driven saves
+
+        A commit, checkout or staging change in between makes it stale.
+        """
+        if self.git_ttl <= 0:
+            return self._get_git_info()
+        cwd = os.getcwd()
+        state = git_state(cwd)
+        cached = self._git_cache.get(cwd)
+        if cached and state is not None and cached[1] == state and time.monotonic() - cached[0] < self.git_ttl:
+            return cached[2]
+        git_info = self._get_git_info()
+        self._git_cache[cwd] = (time.monotonic(), state, git_info)
+        return git_info
+
+    def apply_environment(self, request):
+        """Run each request with the client's working directory and ATLAS_* settings"""
+        os.chdir(request["cwd"])
+        for key in [key for key in os.environ if key.startswith("ATLAS_")]:
+            del os.environ[key]
+        os.environ.update(request.get("env", {}))
+
+    def configure_saver(self, args):
+        """Apply per-call save options the way a fresh AtlasSessionSaver would"""
+        saver = self.saver
+        saver.fsync = env_flag("ATLAS_FSYNC") if args.fsync is None else args.fsync
+        saver.git_timeout = (float(os.getenv("ATLAS_GIT_TIMEOUT", saver.git_timeout))
+                             if args.git_timeout is None else args.git_timeout)
+        saver.large_repo = env_flag("ATLAS_GIT_LARGE_REPO") if args.large_repo is None else args.large_repo
+        saver.snapshots = env_flag("ATLAS_RESUME_SNAPSHOTS", True)
+
+    def handle(self, request):
+        command = request.get("command")
+        if command == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if command == "shutdown":
+            self.running = False
+            return {"ok": True}
+        if command not in ("save", "resume"):
+            return {"ok": False, "error": f"unknown command {command!r}"}
+
+        self.apply_environment(request)
+        args = argparse.Namespace(**request["args"])
+        output = io.StringIO()
+        with redirect_stdout(output):
+            if command == "save":
+                self.configure_saver(args)
+                exit_code = run_save(args, saver=self.saver)
+            else:
+                exit_code = run_resume(args, resumer=self.resumer)
+        return {"ok": True, "output": output.getvalue(), "exit_code": exit_code}
+
+    def serve(self):
+        """Accept requests one at a time until asked to shut down"""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        old_umask = os.umask(0o077)  # Socket is private to the current user
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(str(self.socket_path))
+        finally:
+            os.umask(old_umask)
+        server.listen(16)
+        self.running = True
+        print(f"🛰️  Atlas daemon listening on {self.socket_path} (pid {os.getpid()})", flush=True)
+        try:
+            while self.running:
+                conn, _ = server.accept()
+                with conn:
+                    self.serve_connection(conn)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            print("Atlas daemon stopped", flush=True)
+
+    def serve_connection(self, conn):
+        conn.settimeout(self.io_timeout)
+        data = b""
+        try:
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        except socket.timeout:
+            print("⚠️  Dropped a client that stopped sending", flush=True)
+            return
+        if not data.strip():
+            return
+        try:
+            response = self.handle(json.loads(data))
+        except Exception as e:  # Keep serving; the client falls back on errors
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        try:
+            conn.sendall(json.dumps(response).encode('utf-8'))
+        except OSError:
+            pass
+
+
+def ping(path):
+    sock = connect(path, timeout=2.0)
+    if sock is None:
+        return None
+    with sock:
+        return exchange(sock, {"command": "ping"})
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Atlas Session Manager - Background daemon for instant save/resume",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python atlas_daemon.py start --detach   # Start in the background
+  python atlas_daemon.py status           # Is it running?
+  python atlas_daemon.py stop             # Shut it down
+
+While the daemon runs, save_session.py and resume_session.py hand their work
+to it automatically; without it they work exactly as before.
+        """
+    )
+    parser.add_argument('action', choices=('start', 'stop', 'status'))
+    parser.add_argument('--detach', action='store_true',
+                       help='Run the daemon in the background (logs to index/atlasd.log)')
+
+    args = parser.parse_args()
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("❌ The atlas daemon needs Unix domain sockets, which this platform lacks.")
+        return 1
+
+    atlas_root = find_atlas_root()
+    path = socket_path(atlas_root)
+    running = ping(path)
+
+    if args.action == "status":
+        if running:
+            print(f"✅ Atlas daemon running (pid {running['pid']}) on {path}")
+            return 0
+        print("Atlas daemon is not running.")
+        return 1
+
+    if args.action == "stop":
+        if not running:
+            print("Atlas daemon is not running.")
+            return 0
+        sock = connect(path)
+        with sock:
+            exchange(sock, {"command": "shutdown"})
+        print("✅ Atlas daemon stopped")
+        return 0
+
+    if running:
+        print(f"Atlas daemon already running (pid {running['pid']}).")
+        return 0
+
+    if args.detach:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.parent / "atlasd.log", 'a') as log:
+            subprocess.Popen(
+                [sys.executable, str(os.path.abspath(__file__)), "start"],
+                stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                start_new_session=True
+            )
+        for _ in range(50):
+            if ping(path):
+                print(f"✅ Atlas daemon started on {path}")
+                return 0
+            time.sleep(0.1)
+        print(f"❌ Atlas daemon did not start; see {path.parent / 'atlasd.log'}")
+        return 1
+
+    AtlasDaemon(atlas_root).serve()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - File I/O helpers
+Advisory locking and append-only writes shared by the session scripts
+"""
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, writes stay best-effort
+    fcntl = None
+
+
+def find_atlas_root():
+    """Locate the .atlas directory the same way the session scripts do"""
+    script_path = Path(__file__).resolve()
+    if '.atlas' in script_path.parts:
+        # Running from .atlas/scripts/
+        return Path(__file__).parent.parent
+    # Running from copied location (old structure)
+    return Path.cwd() / ".atlas"
+
+
+def env_flag(name, default=False):
+    """Read a boolean ATLAS_* environment switch"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@contextmanager
+def file_lock(f):
+    """Hold an exclusive advisory lock on an open file"""
+    if fcntl is None:
+        yield f
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        yield f
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def path_lock(path):
+    """Hold an exclusive advisory lock on a dedicated lock file"""
+    with open(path, 'a+b') as f:
+        with file_lock(f):
+            yield
+
+
+def atomic_write_text(path, text, fsync=False):
+    """Replace a file's contents so readers see either the old or new version"""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def append_entry(path, entry, header="", separator="", fsync=False):
+    """Append text to a file without reading or rewriting what is there
+
+    The header is written only when the file is empty, and the separator
+    only when it is not, both decided while holding the lock so concurrent
+    writers cannot interleave. Returns the (offset, length) in bytes of the
+    appended entry.
+    """
+    with open(path, 'ab') as f:
+        with file_lock(f):
+            f.seek(0, os.SEEK_END)
+            prefix = separator if f.tell() else header
+            if prefix:
+                f.write(prefix.encode('utf-8'))
+            offset = f.tell()
+            data = entry.encode('utf-8')
+            f.write(data)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+    return offset, len(data)
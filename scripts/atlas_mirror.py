@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Local ATLAS mirror
+A bare mirror of the ATLAS repository shared by every project on the machine,
+so repository objects are fetched once instead of once per project
+
+install.sh clones from the mirror and update_atlas.py fetches from it when it
+exists, so with a warm cache neither needs the network. Refresh it whenever
+convenient (cron, CI image build, a machine with network access):
+
+Examples:
+  python atlas_mirror.py refresh        # Create or update the mirror
+  python atlas_mirror.py path           # Print where the mirror lives
+  ATLAS_CACHE_DIR=/opt/atlas-cache python atlas_mirror.py refresh
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from atlas_io import env_flag, path_lock
+
+
+UPSTREAM_URL = "https://github.com/daveygoode/atlas.git"
+
+
+def cache_dir():
+    """Where shared ATLAS data lives (override with ATLAS_CACHE_DIR)"""
+    configured = os.getenv("ATLAS_CACHE_DIR")
+    if configured:
+        return Path(configured).expanduser()
+    return Path.home() / ".cache" / "atlas"
+
+
+def mirror_path():
+    return cache_dir() / "atlas.git"
+
+
+def available_mirror():
+    """The mirror path if it exists and caching is not disabled, else None"""
+    path = mirror_path()
+    if env_flag("ATLAS_NO_CACHE") or not (path / "HEAD").exists():
+        return None
+    return path
+
+
+def refresh_mirror(upstream=UPSTREAM_URL, path=None):
+    """Create the mirror or fetch new objects into it; returns its path
+
+    Raises subprocess.CalledProcessError if git fails.
+    """
+    path = Path(path) if path else mirror_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Several fleet runs or installs may share one cache
+    with path_lock(path.parent / f".{path.name}.lock"):
+        if (path / "HEAD").exists():
+            subprocess.run(["git", "--git-dir", str(path), "fetch", "--prune", "--quiet", "origin"],
+                           check=True, capture_output=True, text=True)
+        else:
+            subprocess.run(["git", "clone", "--mirror", "--quiet", upstream, str(path)],
+                           check=True, capture_output=True, text=True)
+    return path
+
+
+def add_alternates(checkout, mirror=None):
+    """Let an existing .atlas checkout borrow objects from the mirror
+
+    Returns True if the alternates file was changed.
+    """
+    mirror = Path(mirror) if mirror else mirror_path()
+    info = Path(checkout) / ".git" / "objects" / "info"
+    if not info.parent.is_dir():
+        return False
+    objects = str((mirror / "objects").resolve())
+    alternates = info / "alternates"
+    existing = alternates.read_text().split() if alternates.exists() else []
+    if objects in existing:
+        return False
+    info.mkdir(exist_ok=True)
+    with open(alternates, 'a') as f:
+        f.write(objects + "\n")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Atlas Session Manager - Manage the local ATLAS mirror",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("Examples:", 1)[1]
+    )
+    parser.add_argument('action', choices=('refresh', 'path'))
+    parser.add_argument('--upstream', default=UPSTREAM_URL,
+                       help='Repository to mirror when creating it (default: ATLAS on GitHub)')
+
+    args = parser.parse_args()
+
+    if args.action == "path":
+        print(mirror_path())
+        return 0
+
+    print(f"🔄 Refreshing ATLAS mirror at {mirror_path()}...")
+    try:
+        refresh_mirror(args.upstream)
+    except (subprocess.CalledProcessError, OSError) as e:
+        detail = str(getattr(e, "stderr", None) or e).strip()
+        print(f"❌ Could not refresh the mirror: {detail}")
+        return 1
+    print("✅ Mirror is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
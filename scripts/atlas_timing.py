@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Timing instrumentation
+Per-phase durations for save, resume and update, printed on request and
+appended to a metrics JSONL file for aggregation across projects
+
+Enable with --timings or ATLAS_TIMINGS=1. Metrics go to
+.atlas/index/metrics.jsonl unless ATLAS_METRICS_FILE names another file
+(for example one shared by a whole fleet of projects).
+"""
+
+import json
+import os
+import socket
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from atlas_io import append_entry, env_flag
+
+
+_active = None
+
+
+class Timings:
+    """Durations of named phases; nested phases are named parent/child"""
+
+    def __init__(self, command):
+        self.command = command
+        self.started = time.perf_counter()
+        self.phases = []  # (name, depth, start offset, seconds)
+        self._stack = []
+
+    def add(self, name, seconds, began=None):
+        full = "/".join(self._stack + [name])
+        began = time.perf_counter() - seconds if began is None else began
+        self.phases.append((full, len(self._stack), began - self.started, seconds))
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def report(self):
+        total = self.total()
+        lines = [f"\n⏱️  TIMINGS ({self.command}, {total * 1000:.1f} ms total)", "-" * 40]
+        for name, depth, _, seconds in sorted(self.phases, key=lambda phase: phase[2]):
+            label = "  " * depth + name.rsplit("/", 1)[-1]
+            share = seconds / total * 100 if total else 0.0
+            lines.append(f"{label:<32} {seconds * 1000:>9.1f} ms {share:>5.1f}%")
+        return "\n".join(lines)
+
+    def as_record(self, atlas_root=None):
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "command": self.command,
+            "host": socket.gethostname(),
+            "project": str(Path(atlas_root).resolve().parent) if atlas_root else os.getcwd(),
+            "total_ms": round(self.total() * 1000, 3),
+            "phases": {name: round(seconds * 1000, 3) for name, _, _, seconds in self.phases},
+        }
+
+
+def start(command, enabled=None):
+    """Begin timing a command if enabled (defaults to ATLAS_TIMINGS)"""
+    global _active
+    if enabled is None:
+        enabled = env_flag("ATLAS_TIMINGS")
+    _active = Timings(command) if enabled else None
+    return _active
+
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block as `name`; free when timing is off"""
+    timings = _active
+    if timings is None:
+        yield
+        return
+    began = time.perf_counter()
+    timings._stack.append(name)
+    try:
+        yield
+    finally:
+        timings._stack.pop()
+        timings.add(name, time.perf_counter() - began, began)
+
+
+def record(name, seconds):
+    """Record a duration measured by the caller"""
+    if _active is not None:
+        _active.add(name, seconds)
+
+
+def metrics_file(atlas_root):
+    configured = os.getenv("ATLAS_METRICS_FILE")
+    if configured:
+        return Path(configured).expanduser()
+    return Path(atlas_root) / "index" / "metrics.jsonl"
+
+
+def finish(atlas_root):
+    """Print the report and append it to the metrics file"""
+    global _active
+    timings, _active = _active, None
+    if timings is None:
+        return None
+    print(timings.report())
+    path = metrics_file(atlas_root)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        append_entry(path, json.dumps(timings.as_record(atlas_root)) + "\n")
+    except OSError as e:
+        print(f"⚠️  Warning: Could not write timings to {path} ({e})")
+    return timings
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Context Builder
+Packs the most useful facts from session history, memory and working logs
+into a fixed token budget for pasting into Claude
+"""
+
+import math
+import os
+import re
+from datetime import datetime
+
+from working_log import day_files
+
+
+# Rough but stable conversion; good enough to stay inside a context window
+CHARS_PER_TOKEN = 4
+DEFAULT_BUDGET = 2000
+
+RECENT_SESSIONS = 20
+RECENT_LOG_DAYS = 3
+HALF_LIFE_DAYS = 7.0
+
+# How much each kind of fact is worth before recency and relevance
+SOURCE_WEIGHTS = {
+    "decision": 1.2,
+    "memory": 1.0,
+    "session": 0.8,
+    "log": 0.6,
+}
+
+SECTION_TITLES = {
+    "decision": "Relevant Decisions",
+    "memory": "Project Memory",
+    "session": "Earlier Sessions",
+    "log": "Working Log Notes",
+}
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it of on or that the this
+to was were will with add fix use make update next work task
+""".split())
+
+PLACEHOLDER = re.compile(r"\[(To be filled|Quick reminders[^\]]*)\]")
+DATED_NOTE = re.compile(r"^(\d{4}-\d{2}-\d{2}):\s*(.*)$")
+
+
+def context_budget(budget=None):
+    """Token budget for --claude output, defaulting to ATLAS_CONTEXT_BUDGET"""
+    if budget is None:
+        budget = int(os.getenv("ATLAS_CONTEXT_BUDGET", DEFAULT_BUDGET))
+    return budget
+
+
+def tokens(text):
+    """Lower-cased words worth matching on, in order and with repeats"""
+    return [w for w in re.findall(r"[a-z0-9_./-]+", text.lower()) if len(w) > 2 and w not in STOPWORDS]
+
+
+def words(text):
+    return set(tokens(text))
+
+
+class Fact:
+    __slots__ = ("kind", "text", "timestamp", "score")
+
+    def __init__(self, kind, text, timestamp=None):
+        self.kind = kind
+        self.text = " ".join(text.split())
+        self.timestamp = timestamp
+        self.score = 0.0
+
+
+class ContextBuilder:
+    def __init__(self, resumer, budget=None):
+        self.resumer = resumer
+        self.budget_chars = context_budget(budget) * CHARS_PER_TOKEN
+        # Contexts already represented by a session, so log copies are dropped
+        self._session_contexts = set()
+
+    # -- candidate facts ---------------------------------------------------
+
+    def session_facts(self, session_data, include_context=True):
+        timestamp = session_data.get("timestamp")
+        facts = []
+        self._session_contexts.add(" ".join(session_data["context"].split()).lower())
+        if include_context:
+            facts.append(Fact(
+                "session",
+                f"[{timestamp[:10]}] {session_data['context']} → next: {session_data['next_task']}",
+                timestamp
+            ))
+        extended = session_data.get("extended_context") or {}
+        if isinstance(extended, dict):
+            for key, value in extended.items():
+                items = value if isinstance(value, list) else [value]
+                for item in items:
+                    label = "" if key == "decisions" else f"{key.replace('_', ' ')}: "
+                    facts.append(Fact("decision", f"{label}{item}", timestamp))
+        return facts
+
+    def history_facts(self, session_data):
+        """Facts from the sessions saved before this one"""
+        facts = []
+        for row in self.resumer.catalog.latest(RECENT_SESSIONS + 1, until=session_data["timestamp"]):
+            if row["session_id"] == session_data["session_id"]:
+                continue
+            try:
+                earlier = self.resumer.store.read(row["location"], row["byte_offset"], row["byte_length"])
+            except (OSError, ValueError, KeyError, EOFError):
+                continue
+            facts.extend(self.session_facts(earlier))
+        return facts
+
+    def memory_facts(self):
+        memory_file = self.resumer.atlas_root / "SHORT_IMPORTANT_MEMORY.md"
+        if not memory_file.exists():
+            return []
+        facts = []
+        section = None
+        for line in memory_file.read_text(encoding='utf-8').splitlines():
+            if line.startswith("## "):
+                section = line[3:].strip()
+            elif line.startswith("- ") and section and not PLACEHOLDER.search(line):
+                text = line[2:].strip()
+                dated = DATED_NOTE.match(text)
+                timestamp = dated.group(1) if dated else None
+                facts.append(Fact("memory", f"{section}: {text}", timestamp))
+        return facts
+
+    def log_facts(self, until):
+        """Context paragraphs from the last working log days up to `until`"""
+        facts = []
+        days = 0
+        for day, day_file in day_files(self.resumer.working_log_dir, reverse=True):
+            if day > until[:10]:
+                continue
+            days += 1
+            if days > RECENT_LOG_DAYS:
+                break
+            text = day_file.read_text(encoding='utf-8', errors='replace')
+            for entry in text.split("\n## Session: ")[1:]:
+                stamp = entry.split("\n", 1)[0].strip().replace(" ", "T")
+                match = re.search(r"### Context\n(.*?)(?:\n### |\Z)", entry, flags=re.DOTALL)
+                if match and match.group(1).strip() and stamp[:19] <= until[:19]:
+                    fact = Fact("log", match.group(1).strip(), stamp)
+                    if fact.text.lower() not in self._session_contexts:
+                        facts.append(fact)
+        return facts
+
+    # -- ranking and packing ----------------------------------------------
+
+    def score(self, facts, query, now):
+        query_words = words(query)
+        for fact in facts:
+            fact_words = words(fact.text)
+            overlap = len(query_words & fact_words)
+            relevance = 1.0 + overlap / math.sqrt(len(fact_words) or 1)
+            if fact.timestamp:
+                try:
+                    age = (now - datetime.fromisoformat(fact.timestamp)).total_seconds() / 86400
+                except ValueError:
+                    age = 0.0
+            else:
+                # Undated memory is current by definition
+                age = 0.0
+            recency = 0.5 ** (max(age, 0.0) / HALF_LIFE_DAYS)
+            fact.score = SOURCE_WEIGHTS[fact.kind] * relevance * (0.25 + recency)
+
+    def build(self, session_data):
+        git = session_data.get("git_info") or {}
+        header = [
+            "ATLAS SESSION RESUME",
+            f"Session ID: {session_data['session_id']}",
+            f"Previous Context: {session_data['context']}",
+            f"Next Task: {session_data['next_task']}",
+        ]
+        if git.get("modified_files"):
+            header.append(f"Modified Files: {', '.join(git['modified_files'][:5])}")
+        text = "\n".join(header)
+        if len(text) > self.budget_chars:
+            # The budget is a hard cap, even on a very long context or task
+            text = text[:self.budget_chars - 1] + "…" if self.budget_chars > 0 else ""
+
+        facts = (self.session_facts(session_data, include_context=False)
+                 + self.history_facts(session_data)
+                 + self.memory_facts()
+                 + self.log_facts(session_data["timestamp"]))
+        self.score(facts, f"{session_data['next_task']} {session_data['context']}", datetime.now())
+
+        # Greedily take the best facts that still fit, skipping repeats
+        used = len(text)
+        seen = {" ".join(session_data["context"].split()).lower()}
+        chosen = {kind: [] for kind in SECTION_TITLES}
+        for fact in sorted(facts, key=lambda f: f.score, reverse=True):
+            key = fact.text.lower()
+            if key in seen:
+                continue
+            # Each fact costs its line, plus a section heading the first time
+            cost = len(fact.text) + 3
+            if not chosen[fact.kind]:
+                cost += len(SECTION_TITLES[fact.kind]) + 3
+            if used + cost > self.budget_chars:
+                continue
+            seen.add(key)
+            chosen[fact.kind].append(fact)
+            used += cost
+
+        sections = [text]
+        for kind, title in SECTION_TITLES.items():
+            if chosen[kind]:
+                sections.append(f"{title}:\n" + "\n".join(f"- {fact.text}" for fact in chosen[kind]))
+        return "\n\n".join(sections)
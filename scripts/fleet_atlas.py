@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Fleet mode
+Installs or updates ATLAS in many projects at once, non-interactively, with
+every checkout borrowing objects from one shared local mirror
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from atlas_mirror import UPSTREAM_URL, add_alternates, mirror_path, refresh_mirror
+
+
+ACTIONS = ("auto", "install", "update")
+
+# Per-project time limit for clone + setup or update, in seconds
+PROJECT_TIMEOUT = 600
+
+# Lines of output shown for each failed project
+FAILURE_TAIL = 5
+
+
+def expand_projects(patterns, list_file=None):
+    """Resolve paths, globs and an optional list file to project directories"""
+    if list_file:
+        with open(list_file, 'r', encoding='utf-8') as f:
+            patterns = list(patterns) + [line.strip() for line in f
+                                         if line.strip() and not line.startswith("#")]
+    projects = []
+    seen = set()
+    for pattern in patterns:
+        matches = glob.glob(os.path.expanduser(pattern)) or [os.path.expanduser(pattern)]
+        for match in sorted(matches):
+            path = Path(match).resolve()
+            if not path.is_dir():
+                print(f"⚠️  Skipping {match}: not a directory")
+            elif path not in seen:
+                seen.add(path)
+                projects.append(path)
+    return projects
+
+
+def run_step(command, cwd, env, timeout):
+    """Run one command; returns (ok, output)"""
+    try:
+        result = subprocess.run(command, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                                capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return False, f"❌ Timed out after {timeout}s: {' '.join(command)}"
+    output = result.stdout + result.stderr
+    # The setup scripts report problems with ❌, often indented, but still exit 0
+    failed = result.returncode != 0 or any(line.lstrip().startswith("❌") for line in output.splitlines())
+    return not failed, output
+
+
+def process_project(project, action, mirror, upstream, timeout):
+    """Install or update ATLAS in one project and describe the outcome"""
+    started = time.monotonic()
+    atlas = project / ".atlas"
+    env = dict(os.environ, ATLAS_NON_INTERACTIVE="1", GIT_TERMINAL_PROMPT="0")
+    if action == "auto":
+        action = "update" if atlas.exists() else "install"
+    result = {"project": str(project), "action": action}
+
+    if action == "install" and atlas.exists():
+        ok, output = False, "❌ .atlas already exists; use --action update"
+    elif action == "update" and not atlas.exists():
+        ok, output = False, "❌ .atlas not found; use --action install"
+    elif action == "install":
+        if mirror:
+            # Local clone that keeps borrowing the mirror's objects
+            clone = ["git", "clone", "--quiet", "--reference", str(mirror), mirror.as_uri(), str(atlas)]
+        else:
+            clone = ["git", "clone", "--quiet", upstream, str(atlas)]
+        ok, output = run_step(clone, project, env, timeout)
+        if ok and mirror:
+            ok, more = run_step(["git", "remote", "set-url", "origin", upstream], atlas, env, timeout)
+            output += more
+        if ok:
+            # Same choice install.sh offers: keep an existing CLAUDE.md
+            script = "migrate_existing_project.py" if (project / "CLAUDE.md").exists() else "setup_new_project.py"
+            result["action"] = "migrate" if script.startswith("migrate") else "install"
+            ok, more = run_step([sys.executable, str(atlas / "scripts" / script)], project, env, timeout)
+            output += more
+    else:
+        if mirror:
+            add_alternates(atlas, mirror)
+        ok, output = run_step([sys.executable, str(atlas / "scripts" / "update_atlas.py"), "--non-interactive"],
+                              project, env, timeout)
+
+    result["ok"] = ok
+    result["seconds"] = round(time.monotonic() - started, 2)
+    result["output"] = output
+    return result
+
+
+def print_report(results):
+    succeeded = [r for r in results if r["ok"]]
+    failed = [r for r in results if not r["ok"]]
+    print("\n📊 Fleet Report")
+    print("-" * 80)
+    for r in results:
+        mark = "✅" if r["ok"] else "❌"
+        print(f"{mark} {r['action']:<8} {r['seconds']:>7.1f}s  {r['project']}")
+    for r in failed:
+        print(f"\n❌ {r['project']}:")
+        for line in r["output"].strip().splitlines()[-FAILURE_TAIL:]:
+            print(f"   {line}")
+    print("-" * 80)
+    print(f"{len(succeeded)} succeeded, {len(failed)} failed, {len(results)} total")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Atlas Session Manager - Install or update ATLAS across many projects",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python fleet_atlas.py ~/src/*                      # Install or update every project
+  python fleet_atlas.py --from-file projects.txt -j 16
+  python fleet_atlas.py ~/src/* --action update --report fleet.json
+  python fleet_atlas.py ~/src/* --no-mirror          # Plain clones, no shared objects
+
+Projects without .atlas get a fresh install (or a migration if they already
+have a CLAUDE.md); projects with one are updated. Nothing prompts: an update
+is refused for a .atlas with uncommitted changes.
+
+Checkouts borrow objects from the shared mirror (ATLAS_CACHE_DIR, default
+~/.cache/atlas/atlas.git) through git alternates, so the mirror must stay in
+place while they use it.
+        """
+    )
+    parser.add_argument('projects', nargs='*', help='Project directories or glob patterns')
+    parser.add_argument('--from-file', metavar='FILE', help='Read project paths, one per line')
+    parser.add_argument('--action', choices=ACTIONS, default='auto',
+                       help='What to do in each project (default: auto)')
+    parser.add_argument('-j', '--jobs', type=int, default=min(8, os.cpu_count() or 1),
+                       help='Projects processed in parallel (default: min(8, CPUs))')
+    parser.add_argument('--upstream', default=UPSTREAM_URL, help='ATLAS repository URL')
+    parser.add_argument('--no-mirror', action='store_true',
+                       help='Do not use or refresh the shared mirror')
+    parser.add_argument('--timeout', type=int, default=PROJECT_TIMEOUT,
+                       help=f'Seconds allowed per step (default: {PROJECT_TIMEOUT})')
+    parser.add_argument('--report', metavar='FILE', help='Also write the results as JSON')
+
+    args = parser.parse_args()
+
+    projects = expand_projects(args.projects, args.from_file)
+    if not projects:
+        print("❌ No project directories given.")
+        return 1
+
+    mirror = None
+    if not args.no_mirror:
+        print(f"🔄 Refreshing ATLAS mirror at {mirror_path()}...")
+        try:
+            mirror = refresh_mirror(args.upstream)
+        except (subprocess.CalledProcessError, OSError) as e:
+            detail = str(getattr(e, "stderr", None) or e).strip()
+            if (mirror_path() / "HEAD").exists():
+                mirror = mirror_path()
+                print(f"⚠️  Could not refresh the mirror ({detail}); using it as is")
+            else:
+                print(f"⚠️  Could not refresh the mirror ({detail}); cloning without it")
+
+    print(f"🚀 Processing {len(projects)} project(s) with {args.jobs} worker(s)...")
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        results = list(pool.map(
+            lambda project: process_project(project, args.action, mirror, args.upstream, args.timeout),
+            projects
+        ))
+
+    print_report(results)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Report written to {args.report}")
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
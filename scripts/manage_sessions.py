@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Maintenance
+Housekeeping commands for the session store and its indexes
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+from atlas_io import find_atlas_root, path_lock
+from resume_snapshot import ResumeSnapshots
+from session_catalog import SessionCatalog
+from session_journal import JOURNAL_FILE
+from session_store import ARCHIVE_DIR, BACKENDS, SessionStore
+from short_memory import update_memory_file
+
+
+# Days sessions stay in full before retain folds them into digests
+RETENTION_DAYS = 180
+
+
+def cmd_rebuild_catalog(atlas_root, args):
+    catalog = SessionCatalog(atlas_root)
+    count = catalog.rebuild()
+    print(f"✅ Catalog rebuilt: {count} sessions indexed")
+    return 0
+
+
+def cmd_verify_catalog(atlas_root, args):
+    catalog = SessionCatalog(atlas_root)
+    missing, stale = catalog.verify()
+    if not missing and not stale:
+        print(f"✅ Catalog is consistent ({catalog.count()} sessions)")
+        return 0
+
+    if missing:
+        print(f"⚠️  {len(missing)} session file(s) missing from the catalog")
+        for name in missing[:10]:
+            print(f"   - {name}")
+    if stale:
+        print(f"⚠️  {len(stale)} catalog entr(y/ies) without a session file")
+        for session_id in stale[:10]:
+            print(f"   - {session_id}")
+
+    if args.repair:
+        count = catalog.rebuild()
+        print(f"✅ Catalog repaired: {count} sessions indexed")
+        return 0
+
+    print("\nRun with --repair (or use rebuild-catalog) to fix the catalog.")
+    return 1
+
+
+def directory_size(path):
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def cmd_dedup(atlas_root, args):
+    store = SessionStore(atlas_root)
+    sessions_dir = atlas_root / "sessions"
+    size_before = directory_size(sessions_dir)
+    files = sorted(sessions_dir.glob("Session_*.json")) + [sessions_dir / "LATEST.json"]
+    converted = 0
+    for path in files:
+        if not path.exists():
+            continue
+        try:
+            freed = store.dedup_file(path)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"   ⚠️  Skipped {path.name}: {e}")
+            continue
+        if freed:
+            converted += 1
+    saved = size_before - directory_size(sessions_dir)
+    print(f"✅ Deduplicated {converted} session file(s), {saved / 1024:.1f} KiB saved")
+    return 0
+
+
+def cmd_compact(atlas_root, args):
+    store = SessionStore(atlas_root)
+    catalog = SessionCatalog(atlas_root)
+    cutoff = (datetime.now() - timedelta(days=args.older_than)).isoformat()
+
+    by_month = {}
+    for row in catalog.loose_before(cutoff):
+        by_month.setdefault(row["timestamp"][:7], []).append(row)
+    if not by_month:
+        print(f"✅ Nothing to compact (no loose sessions older than {args.older_than} days)")
+        return 0
+
+    total = 0
+    for month, rows in sorted(by_month.items()):
+        files = [store.sessions_dir / row["location"] for row in rows]
+        files = [path for path in files if path.exists()]
+        with path_lock(store.sessions_dir / ".lock"):
+            archived = store.archive(month, files)
+            # Point the catalog at the archive before the loose files disappear
+            catalog.relocate(archived)
+            for path in files:
+                path.unlink()
+        total += len(archived)
+        print(f"   📦 {month}: {len(archived)} session(s) archived")
+
+    print(f"✅ Compacted {total} session(s) into sessions/archive/")
+    return 0
+
+
+def cmd_retain(atlas_root, args):
+    store = SessionStore(atlas_root)
+    catalog = SessionCatalog(atlas_root)
+    cutoff = (datetime.now() - timedelta(days=args.keep_days)).isoformat()
+
+    by_month = {}
+    for row in catalog.undigested_before(cutoff):
+        by_month.setdefault(row["timestamp"][:7], []).append(row)
+    if args.dry_run:
+        if not by_month:
+            print(f"✅ Nothing to digest (no full sessions older than {args.keep_days} days)")
+        for month, rows in sorted(by_month.items()):
+            print(f"   🗜️  {month}: would digest {len(rows)} session(s)")
+        return 0
+
+    size_before = directory_size(store.sessions_dir)
+    total = 0
+    for month, rows in sorted(by_month.items()):
+        # Rewriting the journal for an earlier month moved its records
+        rows = [catalog.get(row["session_id"]) or row for row in rows]
+        sessions = []
+        for row in rows:
+            try:
+                sessions.append(store.read(row["location"], row["byte_offset"], row["byte_length"]))
+            except (json.JSONDecodeError, KeyError, EOFError, OSError) as e:
+                print(f"   ⚠️  Skipped {row['session_id']}: {e}")
+        with path_lock(store.sessions_dir / ".lock"):
+            # Delta sessions built on these must not lose their parent
+            store.rebase({session["session_id"] for session in sessions})
+            digested = store.digest(month, sessions)
+            # Point the catalog at the digest before the full copies disappear
+            catalog.relocate(digested)
+            ids = {entry[0] for entry in digested}
+            # Before loose files go: kept journal deltas may need their parents
+            if any(row["location"] == JOURNAL_FILE for row in rows):
+                catalog.relocate(store.rewrite_journal(ids))
+            segments = set()
+            for row in rows:
+                if row["session_id"] not in ids:
+                    continue
+                if row["byte_offset"] is None:
+                    (store.sessions_dir / row["location"]).unlink(missing_ok=True)
+                elif row["location"].startswith(f"{ARCHIVE_DIR}/"):
+                    segments.add(row["location"][len(ARCHIVE_DIR) + 1:-len(".jsonl.gz")])
+            for segment in sorted(segments):
+                catalog.relocate(store.rewrite_archive(segment, ids))
+            # Their resume output no longer matches what is stored
+            ResumeSnapshots(atlas_root).discard(ids)
+        total += len(digested)
+        print(f"   🗜️  {month}: {len(digested)} session(s) digested")
+
+    with path_lock(store.sessions_dir / ".lock"):
+        blobs, _ = store.prune_blobs()
+    saved = size_before - directory_size(store.sessions_dir)
+    if not total:
+        print(f"✅ Nothing to digest (no full sessions older than {args.keep_days} days), "
+              f"{blobs} unused blob(s) removed")
+        return 0
+    print(f"✅ Folded {total} session(s) into sessions/digests/, "
+          f"{blobs} unused blob(s) removed, {saved / 1024:.1f} KiB saved")
+    return 0
+
+
+def cmd_convert(atlas_root, args):
+    store = SessionStore(atlas_root)
+    catalog = SessionCatalog(atlas_root)
+    with path_lock(store.sessions_dir / ".lock"):
+        moves = store.convert(args.to)
+        catalog.relocate(moves)
+    where = f"sessions/{JOURNAL_FILE}" if args.to == "journal" else "one file per session"
+    print(f"✅ Converted {len(moves)} session(s) to {where}")
+    if os.getenv("ATLAS_STORAGE", "files") != args.to:
+        print(f"   Set ATLAS_STORAGE={args.to} so new saves use it too")
+    return 0
+
+
+def cmd_trim_memory(atlas_root, args):
+    memory_file = atlas_root / "SHORT_IMPORTANT_MEMORY.md"
+    if not memory_file.exists():
+        print("❌ SHORT_IMPORTANT_MEMORY.md not found")
+        return 1
+    with path_lock(atlas_root / "sessions" / ".lock"):
+        evicted = update_memory_file(memory_file, atlas_root / "MEMORY" / "KNOWLEDGE_LOG",
+                                     dry_run=args.dry_run)
+    if not evicted:
+        print("✅ SHORT_IMPORTANT_MEMORY.md is within its limits")
+        return 0
+    verb = "Would move" if args.dry_run else "Moved"
+    print(f"🗄️  {verb} {len(evicted)} note(s) to MEMORY/KNOWLEDGE_LOG/:")
+    for section, line, reason in evicted:
+        print(f"   [{section}] {line[2:]}  ({reason})")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Atlas Session Manager - Maintain session storage",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python manage_sessions.py rebuild-catalog      # Re-scan sessions/ into the catalog
+  python manage_sessions.py verify-catalog       # Report catalog drift
+  python manage_sessions.py verify-catalog --repair
+  python manage_sessions.py dedup                # Move repeated payloads into the blob store
+  python manage_sessions.py compact --older-than 90
+  python manage_sessions.py retain --keep-days 180  # Digest sessions older than 180 days
+  python manage_sessions.py convert --to journal  # Move sessions into sessions/journal.atlj
+  python manage_sessions.py trim-memory --dry-run  # Preview short memory eviction
+        """
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rebuild = subparsers.add_parser('rebuild-catalog',
+                                    help='Rebuild the session catalog from session files')
+    rebuild.set_defaults(func=cmd_rebuild_catalog)
+
+    verify = subparsers.add_parser('verify-catalog',
+                                   help='Check the session catalog against session files')
+    verify.add_argument('--repair', action='store_true',
+                        help='Rebuild the catalog if it has drifted')
+    verify.set_defaults(func=cmd_verify_catalog)
+
+    dedup = subparsers.add_parser('dedup',
+                                  help='Move short memory and git snapshots of existing sessions into the blob store')
+    dedup.set_defaults(func=cmd_dedup)
+
+    compact = subparsers.add_parser('compact',
+                                    help='Pack old sessions into compressed monthly archive segments')
+    compact.add_argument('--older-than', type=int, default=30, metavar='DAYS',
+                         help='Archive sessions saved more than DAYS days ago (default 30)')
+    compact.set_defaults(func=cmd_compact)
+
+    retain = subparsers.add_parser('retain',
+                                   help='Fold old sessions into monthly digests')
+    retain.add_argument('--keep-days', type=int, metavar='DAYS',
+                        default=int(os.getenv("ATLAS_RETENTION_DAYS", RETENTION_DAYS)),
+                        help=f'Keep sessions in full for DAYS days (default {RETENTION_DAYS}, '
+                             'or ATLAS_RETENTION_DAYS)')
+    retain.add_argument('--dry-run', action='store_true',
+                        help='Only report what would be digested')
+    retain.set_defaults(func=cmd_retain)
+
+    convert = subparsers.add_parser('convert',
+                                    help='Move sessions between one-file-per-session and the journal')
+    convert.add_argument('--to', choices=BACKENDS, required=True,
+                         help='Storage to move loose and journal sessions into')
+    convert.set_defaults(func=cmd_convert)
+
+    trim = subparsers.add_parser('trim-memory',
+                                 help='Apply the ATLAS_MEMORY_* limits to SHORT_IMPORTANT_MEMORY.md')
+    trim.add_argument('--dry-run', action='store_true',
+                      help='Only list the notes that would be moved')
+    trim.set_defaults(func=cmd_trim_memory)
+
+    args = parser.parse_args()
+    atlas_root = find_atlas_root()
+    if not (atlas_root / "sessions").exists():
+        print(f"❌ No sessions directory found under {atlas_root}")
+        return 1
+    return args.func(atlas_root, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
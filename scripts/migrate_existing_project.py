@@ -117,6 +117,7 @@ This project has additional specific instructions and context:
     gitignore_additions = """
 # ATLAS Sessions and Memory
 .atlas/sessions/
+.atlas/index/
 .atlas/WORKING_LOG/*/*/*.md
 .atlas/SHORT_IMPORTANT_MEMORY.md
 .atlas/MEMORY/PERSONAL_DIARY/*/*/*.md
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Post-commit hook
+Records each commit as a session from .git/hooks/post-commit without
+noticeably slowing `git commit` down
+
+The hook makes a single `git log` call (HEAD and the four commits before it,
+plus the files HEAD changed), reads the branch straight from .git/HEAD,
+skips commits it has already recorded, appends the session and its working
+log entry and moves LATEST.json. Everything else a save does (catalog,
+search index, resume snapshot) is queued in index/pending.jsonl and done by
+a background `post_commit_hook.py --drain`, so only the modules needed to
+write the session are imported, and only once HEAD (resolved from the refs
+without running git) turns out to be new. If git does not answer within the
+latency budget (ATLAS_HOOK_BUDGET_MS, default 50) the whole save is queued.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+import zlib
+from datetime import datetime
+
+# The latency budget counts from here, after the interpreter itself has started
+STARTED = time.perf_counter()
+
+from atlas_io import append_entry, atomic_write_text, file_lock, find_atlas_root, path_lock
+
+
+# Milliseconds the hook may spend before it hands the whole save to the queue
+HOOK_BUDGET_MS = 50
+
+QUEUE_FILE = "pending.jsonl"
+DRAIN_LOCK = "pending.lock"
+STATE_FILE = "post_commit.json"
+
+# Commits remembered as recorded, so a queued commit and a later one recorded
+# by the hook directly never make each other look new
+RECORDED_KEEP = 50
+
+HOOK_SCRIPT = """#!/bin/sh
+# Record each commit as an Atlas session (see SESSION_MANAGEMENT.md)
+"{python}" "{script}" || true
+"""
+
+COMMIT_SEPARATOR = "\x1e"
+FIELD_SEPARATOR = "\x1f"
+
+
+def git_dir(project_root):
+    """The repository's git directory, following a worktree's .git file"""
+    configured = os.getenv("GIT_DIR")
+    if configured:
+        return os.path.join(project_root, configured)
+    dot_git = os.path.join(project_root, ".git")
+    if os.path.isfile(dot_git):
+        with open(dot_git, encoding='utf-8') as f:
+            target = f.read().strip()
+        if target.startswith("gitdir:"):
+            return os.path.join(project_root, target[len("gitdir:"):].strip())
+    return dot_git
+
+
+def common_dir(git_directory):
+    """Where a linked worktree's shared refs live (its commondir), else the git directory itself"""
+    try:
+        with open(os.path.join(git_directory, "commondir"), encoding='utf-8') as f:
+            return os.path.normpath(os.path.join(git_directory, f.read().strip()))
+    except OSError:
+        return git_directory
+
+
+def current_branch(git_directory):
+    """Branch name from HEAD, or "HEAD" when detached (like `git rev-parse --abbrev-ref`)"""
+    try:
+        with open(os.path.join(git_directory, "HEAD"), encoding='utf-8') as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    return head[len("ref: refs/heads/"):] if head.startswith("ref: refs/heads/") else "HEAD"
+
+
+def head_commit(git_directory):
+    """Full hash HEAD points at, read from the loose ref or packed-refs
+
+    HEAD is per worktree; branches and packed-refs are shared through the
+    commondir in a linked worktree.
+    """
+    try:
+        with open(os.path.join(git_directory, "HEAD"), encoding='utf-8') as f:
+            head = f.read().strip()
+        if not head.startswith("ref: "):
+            return head
+        ref = head[len("ref: "):]
+        refs_directory = common_dir(git_directory)
+        try:
+            with open(os.path.join(refs_directory, ref), encoding='utf-8') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            with open(os.path.join(refs_directory, "packed-refs"), encoding='utf-8') as f:
+                for line in f:
+                    commit, _, name = line.strip().partition(" ")
+                    if name == ref:
+                        return commit
+    except OSError:
+        pass
+    return None
+
+
+def commit_info(project_root, timeout, commit=None):
+    """(hash, recent "hash subject" lines, files it changed) for a commit (HEAD) from one git call"""
+    result = subprocess.run(
+        ["git", "log", "-5", "--name-only", "--no-renames",
+         f"--format={COMMIT_SEPARATOR}%H{FIELD_SEPARATOR}%h %s", commit or "HEAD", "--"],
+        cwd=project_root, capture_output=True, timeout=timeout
+    )
+    if result.returncode != 0:
+        return None
+    commits = result.stdout.decode('utf-8', errors='replace').split(COMMIT_SEPARATOR)[1:]
+    if not commits:
+        return None
+    recent, files = [], []
+    for i, commit in enumerate(commits):
+        header, _, names = commit.partition("\n")
+        full_hash, _, line = header.partition(FIELD_SEPARATOR)
+        recent.append(line)
+        if i == 0:
+            head, files = full_hash, [name for name in names.splitlines() if name]
+    return head, recent, files
+
+
+class PendingQueue:
+    """Work deferred by the hook, one JSON line per item
+
+    Draining renames the file away first, so hooks keep appending to a
+    fresh queue meanwhile; an append that raced the rename notices the file
+    it locked is no longer the queue and retries.
+    """
+
+    def __init__(self, index_dir):
+        self.path = index_dir / QUEUE_FILE
+        self.draining = index_dir / f"{QUEUE_FILE}.draining"
+
+    def push(self, item):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = (json.dumps(item) + "\n").encode('utf-8')
+        while True:
+            with open(self.path, 'ab') as f, file_lock(f):
+                try:
+                    current = os.stat(self.path).st_ino == os.fstat(f.fileno()).st_ino
+                except FileNotFoundError:
+                    current = False
+                if current:
+                    f.write(line)
+                    return
+
+    def take(self):
+        """Claim everything queued so far; call done() once it is handled
+
+        Items left by a drain that never finished come first.
+        """
+        if not self.draining.exists():
+            try:
+                os.rename(self.path, self.draining)
+            except FileNotFoundError:
+                return []
+        with open(self.draining, 'rb') as f, file_lock(f):
+            lines = f.read().decode('utf-8', errors='replace').splitlines()
+        items = []
+        for line in lines:
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                # A torn line from a hook killed mid-write
+                continue
+        return items
+
+    def done(self):
+        self.draining.unlink(missing_ok=True)
+
+
+class CommitRecorder:
+    def __init__(self, atlas_root=None):
+        self.atlas_root = atlas_root or find_atlas_root()
+        self.project_root = self.atlas_root.parent
+        self.index_dir = self.atlas_root / "index"
+        self.sessions_dir = self.atlas_root / "sessions"
+        self.working_log_dir = self.atlas_root / "WORKING_LOG"
+        self.state_file = self.index_dir / STATE_FILE
+        self.queue = PendingQueue(self.index_dir)
+
+    def state(self):
+        try:
+            with open(self.state_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def recorded(self):
+        """Hashes of the commits recorded most recently"""
+        state = self.state()
+        if state.get("recorded"):
+            return state["recorded"]
+        return [state["head"]] if state.get("head") else []
+
+    def recorded_item(self, commit):
+        """The index item a recorded commit was saved with, or None"""
+        return self.state().get("sessions", {}).get(commit)
+
+    def mark_recorded(self, head, item):
+        """Remember a commit and where its session went; call with the sessions lock held"""
+        state = self.state()
+        recorded = [commit for commit in self.recorded() if commit != head] + [head]
+        recorded = recorded[-RECORDED_KEEP:]
+        sessions = state.get("sessions", {})
+        sessions[head] = item
+        self.index_dir.mkdir(exist_ok=True)
+        atomic_write_text(self.state_file, json.dumps({
+            "head": head,
+            "session_id": item["session_id"],
+            "recorded": recorded,
+            "sessions": {commit: sessions[commit] for commit in recorded if commit in sessions},
+        }))
+
+    def next_task(self, store):
+        """The last session's next task, found through the store by LATEST.json's session ID
+
+        The pointer's own location goes stale once retention or compaction
+        moves the record.
+        """
+        pointer = store.read_latest_pointer() or {}
+        try:
+            if "latest" in pointer:
+                previous = store.read_session(pointer["latest"])
+            else:
+                previous = pointer
+        except (OSError, ValueError, KeyError, EOFError, zlib.error):
+            previous = {}
+        return previous.get("next_task") or "Continue development"
+
+    def record(self, timeout=None, commit=None, saved_at=None, branch=None):
+        """Save a commit (HEAD) as a session; returns its queue item, or None if already recorded
+
+        A commit queued by the hook is recorded with the time and branch the
+        hook saw. Raises subprocess.TimeoutExpired if git takes longer than
+        `timeout`.
+        """
+        info = commit_info(self.project_root, timeout, commit)
+        if info is None:
+            return None
+        head, recent_commits, files = info
+        if head in self.recorded():
+            return None
+        from session_store import SessionStore
+        from working_log import day_file, day_header, entry_location, format_entry
+
+        saved_at = saved_at or datetime.now()
+        store = SessionStore(self.atlas_root)
+        self.sessions_dir.mkdir(exist_ok=True)
+        context = f"Committed {recent_commits[0]}"
+        next_task = self.next_task(store)
+        python_version = sys.version
+
+        log_file = day_file(self.working_log_dir, saved_at)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        entry = format_entry(saved_at, context, next_task, str(self.project_root), python_version.split()[0])
+        log_offset, log_length = append_entry(log_file, entry, header=day_header(saved_at), separator="\n")
+
+        session_data = {
+            "session_id": saved_at.strftime("%Y%m%d_%H%M%S"),
+            "timestamp": saved_at.isoformat(),
+            "atlas_identity": "ATLAS - Adaptive Technical Learning and Architecture System",
+            "context": context,
+            "next_task": next_task,
+            "extended_context": None,
+            "working_directory": str(self.project_root),
+            "python_version": python_version,
+            # No `git status`: a commit leaves little behind worth the time
+            "git_info": {
+                "branch": branch or current_branch(git_dir(self.project_root)),
+                "modified_files": [],
+                "staged_files": [],
+                "committed_files": files,
+                "recent_commits": recent_commits,
+                "status_summary": "",
+            },
+            "short_memory": None,
+            "professional_mode": True,
+            "mcp_available": "Check during runtime",
+            "session_metadata": {
+                "year": saved_at.strftime("%Y"),
+                "month": saved_at.strftime("%m-%b").lower(),
+                "day": saved_at.strftime("%d"),
+                "user": os.getenv("USER", "unknown"),
+                "source": "post-commit",
+            },
+            "working_log": entry_location(self.working_log_dir, log_file, log_offset, log_length, entry),
+        }
+        location, offset, length = store.write(session_data)
+        item = {
+            "kind": "index",
+            "session_id": session_data["session_id"],
+            "location": location,
+            "offset": offset,
+            "length": length,
+            "log_file": log_file.relative_to(self.working_log_dir).as_posix(),
+            "log_offset": log_offset,
+            "log_length": log_length,
+        }
+        with path_lock(self.sessions_dir / ".lock"):
+            store.set_latest(session_data, location, offset, length)
+            self.mark_recorded(head, item)
+        return item
+
+    def run_hook(self, budget_ms=None):
+        if budget_ms is None:
+            budget_ms = float(os.getenv("ATLAS_HOOK_BUDGET_MS", HOOK_BUDGET_MS))
+        # Read without running git, so a deferred save still knows its commit
+        git_directory = git_dir(self.project_root)
+        head = head_commit(git_directory)
+        if head and head in self.recorded():
+            # The hook run twice for one commit
+            return None
+        saved_at = datetime.now()
+        branch = current_branch(git_directory)
+        # git gets most of what is left; the rest is for writing the session
+        remaining = budget_ms / 1000 - (time.perf_counter() - STARTED)
+        try:
+            item = self.record(timeout=max(remaining * 0.6, 0.005), commit=head, saved_at=saved_at, branch=branch)
+        except subprocess.TimeoutExpired:
+            item = {"kind": "commit", "commit": head, "saved_at": saved_at.isoformat(), "branch": branch}
+        except OSError:
+            # git missing; nothing to record
+            return None
+        if item is not None:
+            self.queue.push(item)
+            self.start_drain()
+        return item
+
+    def start_drain(self):
+        """Finish the deferred work in a detached process"""
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--drain"],
+            cwd=self.project_root, stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+
+    def drain(self):
+        """Index queued sessions and pre-render the newest one's resume output"""
+        # Only the drain needs the catalog, search index and renderers
+        import sqlite3
+        from resume_session import AtlasSessionResumer
+
+        resumer = AtlasSessionResumer()
+        done, latest = 0, None
+        # One drain at a time, so a queue being drained is never removed under another
+        self.index_dir.mkdir(exist_ok=True)
+        with path_lock(self.index_dir / DRAIN_LOCK):
+            for item in self.queue.take():
+                result = self.index(resumer, item)
+                if result:
+                    done += 1
+                    latest = result
+            if latest:
+                session_data, item = latest
+                try:
+                    resumer.snapshot(session_data, item["location"], item["offset"], item["length"])
+                except (OSError, ValueError, sqlite3.Error) as e:
+                    print(f"⚠️  Could not write resume snapshot ({e})")
+            self.queue.done()
+        return done
+
+    def index(self, resumer, item):
+        """Catalog and search-index one queued session; returns (session_data, item) or None"""
+        import sqlite3
+
+        if item["kind"] == "commit":
+            # git was too slow for the hook; record the commit it saw now
+            saved_at = datetime.fromisoformat(item["saved_at"]) if item.get("saved_at") else None
+            commit = item.get("commit")
+            item = self.record(commit=commit, saved_at=saved_at, branch=item.get("branch"))
+            if item is None:
+                # Already recorded by a drain that died before finishing the queue
+                item = self.recorded_item(commit)
+                if item is None:
+                    return None
+        try:
+            session_data = resumer.store.read(item["location"], item["offset"], item["length"])
+            with open(self.working_log_dir / item["log_file"], 'rb') as f:
+                f.seek(item["log_offset"])
+                log_entry = f.read(item["log_length"]).decode('utf-8', errors='replace')
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Skipped {item['session_id']}: {e}")
+            return None
+        # The same lock savers hold for the catalog and search index
+        with path_lock(self.sessions_dir / ".lock"):
+            try:
+                resumer.catalog.add(session_data, item["location"], item["offset"], item["length"])
+                resumer.search_index.add_session(session_data)
+                resumer.search_index.add_log_entry(self.working_log_dir / item["log_file"], item["log_offset"],
+                                                   log_entry, timestamp=session_data["timestamp"])
+            except sqlite3.Error as e:
+                print(f"⚠️  Could not index {item['session_id']} ({e}); "
+                      "run manage_sessions.py verify-catalog --repair")
+        return session_data, item
+
+    def install(self):
+        """Write .git/hooks/post-commit, refusing to replace someone else's hook"""
+        # Linked worktrees run the main repository's hooks
+        hooks_dir = os.path.join(common_dir(git_dir(self.project_root)), "hooks")
+        hook = os.path.join(hooks_dir, "post-commit")
+        script = HOOK_SCRIPT.format(python=sys.executable, script=os.path.abspath(__file__))
+        if os.path.exists(hook):
+            with open(hook, encoding='utf-8', errors='replace') as f:
+                if os.path.basename(__file__) not in f.read():
+                    return None
+        os.makedirs(hooks_dir, exist_ok=True)
+        with open(hook, 'w', encoding='utf-8') as f:
+            f.write(script)
+        os.chmod(hook, 0o755)
+        return hook
+
+
+def main():
+    if len(sys.argv) == 1:
+        # The hook itself; argparse alone would cost a good part of the budget
+        CommitRecorder().run_hook()
+        return 0
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Atlas Session Manager - Record commits as sessions from a git hook",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python post_commit_hook.py --install   # Add .git/hooks/post-commit
+  python post_commit_hook.py             # What the hook runs after each commit
+  python post_commit_hook.py --drain     # Index sessions the hook queued
+        """
+    )
+    parser.add_argument('--install', action='store_true',
+                       help='Install this script as the repository\'s post-commit hook')
+    parser.add_argument('--drain', action='store_true',
+                       help='Do the work queued by earlier hook runs (normally started automatically)')
+    parser.add_argument('--budget-ms', type=float,
+                       help=f'Time the hook may take before deferring the save (default {HOOK_BUDGET_MS})')
+
+    args = parser.parse_args()
+    recorder = CommitRecorder()
+
+    if args.install:
+        hook = recorder.install()
+        if hook is None:
+            print("❌ .git/hooks/post-commit already exists; add this line to it instead:")
+            print(f'  {sys.executable} "{os.path.abspath(__file__)}" || true')
+            return 1
+        print(f"✅ Installed {hook}")
+        return 0
+
+    if args.drain:
+        count = recorder.drain()
+        print(f"✅ Indexed {count} queued session(s)")
+        return 0
+
+    recorder.run_hook(args.budget_ms)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,11 +4,64 @@ Atlas Session Manager - Resume Session
 Integrates DevCycle session management with Atlas AI Agent framework
 """
 
-import json
 import argparse
-from datetime import datetime
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta
 from pathlib import Path
 
+import atlas_timing
+from atlas_client import daemon_request
+from atlas_io import env_flag, find_atlas_root
+from atlas_timing import phase
+from context_builder import ContextBuilder, context_budget
+from resume_snapshot import ResumeSnapshots, content_hash
+from search_atlas import AtlasSearchIndex
+from session_catalog import SessionCatalog, context_preview
+from session_store import SessionStore
+from working_log import iter_entries, read_entry
+
+
+DATE_PREFIX = re.compile(r"\d{4}(-\d{2}(-\d{2}([T ]\d{2}(:\d{2}(:\d{2})?)?)?)?)?")
+RELATIVE_DATE = re.compile(r"(\d+)([hdw])")
+RELATIVE_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+
+
+def date_prefix(text):
+    """Normalise --since/--until input to a timestamp prefix
+
+    Accepts 2025, 2025-03, 2025-03-16, 2025-03-16T14:30 and relative ages
+    such as 12h, 7d or 2w.
+    """
+    text = text.strip()
+    relative = RELATIVE_DATE.fullmatch(text)
+    if relative:
+        amount, unit = int(relative.group(1)), RELATIVE_UNITS[relative.group(2)]
+        return (datetime.now() - timedelta(**{unit: amount})).isoformat()
+    if not DATE_PREFIX.fullmatch(text):
+        raise argparse.ArgumentTypeError(f"invalid date {text!r} (use YYYY[-MM[-DD[THH:MM]]] or 7d)")
+    text = text.replace(" ", "T")
+    # Pad to a full date so impossible dates like 2025-13 are rejected
+    try:
+        datetime.fromisoformat(text + "-01-01"[len(text) - 4:] if len(text) < 10 else text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date {text!r}")
+    return text
+
+
+def until_bound(text):
+    """Exclusive upper bound covering the whole period named by `text`"""
+    prefix = date_prefix(text)
+    if RELATIVE_DATE.fullmatch(text.strip()):
+        return prefix
+    # Every timestamp starting with the prefix sorts below prefix + U+FFFF
+    return prefix + "\uffff"
+
+
+# Similar earlier sessions shown when resuming
+RELATED_LIMIT = 3
+
 
 class AtlasSessionResumer:
     def __init__(self):
@@ -25,45 +78,123 @@ class AtlasSessionResumer:
         
         self.sessions_dir = self.atlas_root / "sessions"
         self.working_log_dir = self.atlas_root / "WORKING_LOG"
+        self.catalog = SessionCatalog(self.atlas_root)
+        self.store = SessionStore(self.atlas_root)
+        self.search_index = AtlasSearchIndex(self.atlas_root)
+        self.snapshots = ResumeSnapshots(self.atlas_root)
         
-    def list_sessions(self):
-        """List all available sessions"""
+    def list_sessions(self, limit=None, **filters):
+        """List available sessions, newest first, from the session catalog
+
+        Filters (since, until, branch, user) are passed to the catalog, which
+        answers them with index range scans.
+        """
         if not self.sessions_dir.exists():
             return []
         
-        sessions = []
-        for session_file in sorted(self.sessions_dir.glob("Session_*.json"), reverse=True):
-            try:
-                with open(session_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    sessions.append({
-                        "file": session_file,
-                        "id": data["session_id"],
-                        "timestamp": data["timestamp"],
-                        "context": data["context"][:50] + "..." if len(data["context"]) > 50 else data["context"]
-                    })
-            except (json.JSONDecodeError, KeyError, IOError):
-                continue
-        
-        return sessions
+        return [
+            {
+                "file": self.sessions_dir / row["location"],
+                "id": row["session_id"],
+                "timestamp": row["timestamp"],
+                "branch": row["branch"],
+                "context": row["preview"]
+            }
+            for row in self.catalog.latest(limit, **filters)
+        ]
+    
+    def repo_path(self, path):
+        """Express a path given on the command line relative to the project root"""
+        candidate = Path(path).expanduser()
+        if not candidate.is_absolute():
+            candidate = Path.cwd() / candidate
+        try:
+            relative = candidate.resolve().relative_to(self.project_root.resolve())
+        except ValueError:
+            # Outside the project: assume it is already repository-relative
+            return path.strip("/")
+        return "" if relative == Path(".") else relative.as_posix()
+    
+    def sessions_touching(self, path, limit=None, **filters):
+        """Sessions, newest first, that modified, staged or committed a file or directory
+
+        Takes the same filters as list_sessions().
+        """
+        if not self.sessions_dir.exists():
+            return []
+        return self.catalog.touching(self.repo_path(path), limit, **filters)
+    
+    def related_sessions(self, session_data, limit=RELATED_LIMIT):
+        """Earlier sessions most similar to this one's next task and context"""
+        # Saves keep the search index current; never build it just to resume
+        if not self.search_index.db_path.exists():
+            return []
+        text = f"{session_data.get('next_task', '')} {session_data.get('context', '')}"
+        try:
+            return self.search_index.related_sessions(
+                text, exclude=session_data["session_id"], before=session_data.get("timestamp"), limit=limit
+            )
+        except sqlite3.Error:
+            return []
+    
+    def working_log_entry(self, session_data):
+        """The session's own WORKING_LOG entry, read by offset (None for old sessions)"""
+        location = session_data.get("working_log")
+        if not location:
+            return None
+        try:
+            return read_entry(self.working_log_dir, location).strip()
+        except OSError:
+            return None
+    
+    def timeline(self, since=None, until=None):
+        """Stream working log entries newest first, tagged with their session IDs"""
+        log_file, sessions = None, {}
+        for entry in iter_entries(self.working_log_dir, since=since, until=until, reverse=True):
+            if entry["file"] != log_file:
+                log_file = entry["file"]
+                sessions = self.catalog.log_sessions(log_file) if self.sessions_dir.exists() else {}
+            entry["session_id"] = sessions.get(entry["offset"])
+            yield entry
+    
+    def count_sessions(self, **filters):
+        """Number of catalogued sessions, optionally filtered"""
+        if not self.sessions_dir.exists():
+            return 0
+        return self.catalog.count(**filters)
     
     def load_session(self, session_id=None):
         """Load a specific session or the latest one"""
         if session_id:
-            # Load specific session
-            session_file = self.sessions_dir / f"Session_{session_id}.json"
-            if not session_file.exists():
-                # Try without Session_ prefix
-                session_file = self.sessions_dir / f"{session_id}.json"
+            # Load specific session, resolved through the catalog
+            row = self.catalog.get(session_id) if self.sessions_dir.exists() else None
+            if row:
+                # Archived sessions are read straight from their segment offset
+                return self.store.read(row["location"], row["byte_offset"], row["byte_length"])
+            else:
+                session_file = self.sessions_dir / f"Session_{session_id}.json"
+                if not session_file.exists():
+                    # Try without Session_ prefix
+                    session_file = self.sessions_dir / f"{session_id}.json"
         else:
-            # Load latest session
-            session_file = self.sessions_dir / "LATEST.json"
+            # LATEST.json points at the newest session (older versions kept a full copy)
+            pointer = self.store.read_latest_pointer()
+            if not pointer:
+                return None
+            if "latest" not in pointer:
+                return self.store.unpack(pointer)
+            row = self.catalog.get(pointer["latest"])
+            if row:
+                return self.store.read(row["location"], row["byte_offset"], row["byte_length"])
+            if "offset" in pointer:
+                return self.store.read(pointer["location"], pointer["offset"], pointer["length"])
+            session_file = self.sessions_dir / pointer["location"]
         
         if not session_file.exists():
             return None
         
-        with open(session_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        # Blob references (short memory, git info) are resolved transparently
+        return self.store.read_file(session_file)
     
     def format_session_display(self, session_data):
         """Format session data for display"""
@@ -82,6 +213,8 @@ class AtlasSessionResumer:
         output.append(f"📅 Session: {session_data['session_id']}")
         output.append(f"🕐 Saved: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
         output.append(f"📁 Directory: {session_data['working_directory']}")
+        if session_data.get("digest"):
+            output.append(f"🗜️  From the {session_data['digest']} digest: git details and memory snapshot were not kept")
         output.append("")
         
         # Context and next task
@@ -95,6 +228,17 @@ class AtlasSessionResumer:
         output.append(session_data["next_task"])
         output.append("")
         
+        # Earlier attempts at the same work
+        with phase("related_sessions"):
+            related = self.related_sessions(session_data)
+        if related:
+            output.append("🔗 RELATED SESSIONS")
+            output.append("-" * 40)
+            for match in related:
+                output.append(f"{match['session_id']:<20} {(match['timestamp'] or '')[:10]}  "
+                              f"{context_preview(match['title'])}")
+            output.append("")
+        
         # Git information
         if session_data.get("git_info"):
             git = session_data["git_info"]
@@ -103,20 +247,31 @@ class AtlasSessionResumer:
             output.append(f"Branch: {git['branch']}")
             
             if git['modified_files']:
+                # Large-repo saves keep capped lists plus the real counts
+                total = git.get('modified_count', len(git['modified_files']))
                 output.append("\nModified Files:")
                 for f in git['modified_files'][:10]:  # Limit to 10 files
                     output.append(f"  - {f}")
-                if len(git['modified_files']) > 10:
-                    output.append(f"  ... and {len(git['modified_files']) - 10} more")
+                if total > 10:
+                    output.append(f"  ... and {total - 10} more")
             
             if git['staged_files']:
+                total = git.get('staged_count', len(git['staged_files']))
                 output.append("\nStaged Files:")
                 for f in git['staged_files'][:5]:
                     output.append(f"  - {f}")
-                if len(git['staged_files']) > 5:
-                    output.append(f"  ... and {len(git['staged_files']) - 5} more")
+                if total > 5:
+                    output.append(f"  ... and {total - 5} more")
+            
+            if git.get('committed_files'):
+                # Sessions recorded by the post-commit hook
+                output.append("\nCommitted Files:")
+                for f in git['committed_files'][:5]:
+                    output.append(f"  - {f}")
+                if len(git['committed_files']) > 5:
+                    output.append(f"  ... and {len(git['committed_files']) - 5} more")
             
-            if git['recent_commits']:
+            if git.get('recent_commits'):
                 output.append("\nRecent Commits:")
                 for commit in git['recent_commits'][:3]:
                     output.append(f"  {commit}")
@@ -149,7 +304,7 @@ class AtlasSessionResumer:
         
         # Working log reference
         meta = session_data.get("session_metadata", {})
-        if meta:
+        if meta.get("year"):
             output.append("📝 WORKING LOG REFERENCE")
             output.append("-" * 40)
             output.append(f"See: WORKING_LOG/{meta['year']}/{meta['month']}/{meta['day']}.md")
@@ -176,27 +331,97 @@ class AtlasSessionResumer:
         
         return "\n".join(output)
     
-    def generate_claude_context(self, session_data):
-        """Generate a context string for pasting into Claude"""
-        context_parts = []
-        
-        context_parts.append("ATLAS SESSION RESUME")
-        context_parts.append(f"Session ID: {session_data['session_id']}")
-        context_parts.append(f"\nPrevious Context: {session_data['context']}")
-        context_parts.append(f"\nNext Task: {session_data['next_task']}")
-        
-        if session_data.get("git_info") and session_data["git_info"]["modified_files"]:
-            context_parts.append(f"\nModified Files: {', '.join(session_data['git_info']['modified_files'][:5])}")
+    def generate_claude_context(self, session_data, budget=None):
+        """Generate a context string for pasting into Claude
+
+        Facts from recent sessions, decisions, SHORT_IMPORTANT_MEMORY.md and
+        working logs are ranked by recency and relevance to the next task and
+        packed into `budget` tokens (default 2000, or ATLAS_CONTEXT_BUDGET).
+        """
+        return ContextBuilder(self, budget).build(session_data)
+    
+    def render(self, session_data):
+        """Everything a plain resume prints: the display, log entry and quick commands"""
+        with phase("format_session_display"):
+            output = [self.format_session_display(session_data)]
         
-        if session_data.get("extended_context"):
-            context_parts.append("\nExtended Context:")
-            for key, value in session_data["extended_context"].items():
-                if isinstance(value, list):
-                    context_parts.append(f"- {key}: {', '.join(value)}")
-                else:
-                    context_parts.append(f"- {key}: {value}")
+        with phase("working_log_entry"):
+            entry = self.working_log_entry(session_data)
+        if entry:
+            output.append("\n📓 WORKING LOG ENTRY")
+            output.append("-" * 40)
+            output.append(entry)
         
-        return " | ".join(context_parts)
+        output.append("\n🛠️  QUICK COMMANDS")
+        output.append("-" * 40)
+        output.append("View full working log:")
+        meta = session_data.get("session_metadata", {})
+        if session_data.get("working_log"):
+            output.append(f"  cat WORKING_LOG/{session_data['working_log']['file']}")
+        elif meta.get("year"):
+            output.append(f"  cat WORKING_LOG/{meta['year']}/{meta['month']}/{meta['day']}.md")
+        output.append("\nView short-term memory:")
+        output.append("  cat SHORT_IMPORTANT_MEMORY.md")
+        output.append("\nSave new session:")
+        output.append('  python scripts/save_session.py -c "What you did" -n "What\'s next"')
+        return "\n".join(output)
+    
+    def stored_hash(self, session_id):
+        """Hash of a session record as stored, the key its snapshot was saved under"""
+        row = self.catalog.get(session_id) if self.sessions_dir.exists() else None
+        if not row:
+            return None
+        return content_hash(self.store.read_raw(row["location"], row["byte_offset"], row["byte_length"]))
+    
+    def snapshot(self, session_data, location, offset=None, length=None):
+        """Render the plain resume output for a just-saved session and keep it
+
+        The --claude context is left to the first --claude resume, which
+        adds it to the snapshot (see remember_claude_context).
+        """
+        # Taken before rendering, so any change while rendering invalidates the result
+        inputs = self.snapshots.inputs()
+        stored_hash = content_hash(self.store.read_raw(location, offset, length))
+        display = self.render(session_data)
+        self.snapshots.write(session_data["session_id"], stored_hash, inputs, display)
+    
+    def remember_claude_context(self, session_data, inputs, claude, budget=None):
+        """Add a --claude context built from `inputs` to the session's snapshot, if it has one"""
+        session_id = session_data["session_id"]
+        cached = self.snapshots.load(session_id)
+        if cached is None:
+            return
+        header, display, _ = cached
+        if header["hash"] != self.stored_hash(session_id):
+            return
+        self.snapshots.write(session_id, header["hash"], inputs, display, claude, context_budget(budget))
+
+
+def cached_output(atlas_root, session_id=None, claude=False, budget=None, resumer=None):
+    """Serve a resume from the snapshot written at save time, if still valid
+
+    The latest session is recognised from LATEST.json's signature alone; a
+    session named with -c is checked against the hash of its stored record.
+    """
+    snapshots = resumer.snapshots if resumer else ResumeSnapshots(atlas_root)
+    if session_id is None:
+        session_id = snapshots.latest_id()
+        if session_id is None:
+            return None
+        cached = snapshots.load(session_id)
+    else:
+        cached = snapshots.load(session_id)
+        if cached is None:
+            return None
+        resumer = resumer or AtlasSessionResumer()
+        if cached[0]["hash"] != resumer.stored_hash(session_id):
+            return None
+    if cached is None:
+        return None
+    header, display, claude_context = cached
+    if claude:
+        return claude_context if snapshots.claude_current(header, context_budget(budget)) else None
+    return display
 
 
 def main():
@@ -209,6 +434,14 @@ Examples:
   python resume_session.py -c 20250316_143022 # Resume specific session
   python resume_session.py -l                 # List all sessions
   python resume_session.py --claude           # Generate Claude-friendly context
+  python resume_session.py --claude --budget 500  # ...packed into ~500 tokens
+  python resume_session.py --since 2025-03 --until 2025-03   # Sessions from March 2025
+  python resume_session.py --branch 'feature/*' -n 0          # Every feature-branch session
+  python resume_session.py --since 7d --user alice            # Alice's last week
+  python resume_session.py --file src/auth.py # Sessions that touched a file
+  python resume_session.py --timeline --since 7d  # Working log entries, newest first
+  python resume_session.py --file src/api/    # ...or anything under a directory
+  python resume_session.py --file src/api/ --since 7d -n 0   # All of last week's
         """
     )
     
@@ -216,65 +449,182 @@ Examples:
                        help='Specific session ID to resume')
     parser.add_argument('-l', '--list', action='store_true',
                        help='List all available sessions')
+    parser.add_argument('--since', type=date_prefix, metavar='DATE',
+                       help='Only sessions from DATE on (YYYY[-MM[-DD]], or 12h/7d/2w ago)')
+    parser.add_argument('--until', type=until_bound, metavar='DATE',
+                       help='Only sessions up to the end of DATE')
+    parser.add_argument('--branch', help='Only sessions on BRANCH (globs like feature/* work)')
+    parser.add_argument('--user', help='Only sessions saved by USER')
+    parser.add_argument('-n', '--limit', type=int, default=20,
+                       help='Sessions to list (default 20, 0 for all)')
+    parser.add_argument('--file', metavar='PATH',
+                       help='List sessions that modified, staged or committed PATH (file or directory; honours the filters and -n)')
+    parser.add_argument('--timeline', action='store_true',
+                       help='Show working log entries across days, newest first (honours --since/--until/-n)')
     parser.add_argument('--claude', action='store_true',
                        help='Output in Claude-friendly format for copy/paste')
+    parser.add_argument('--budget', type=int,
+                       help='Token budget for --claude output (default 2000, or ATLAS_CONTEXT_BUDGET)')
+    parser.add_argument('--no-daemon', action='store_true',
+                       help='Read sessions in-process even if the atlas daemon is running')
+    parser.add_argument('--timings', action='store_true', default=None,
+                       help='Print per-phase durations and append them to the metrics file (or set ATLAS_TIMINGS=1)')
     
     args = parser.parse_args()
     
-    resumer = AtlasSessionResumer()
+    # A snapshot rendered at save time is quicker to print than asking the daemon
+    use_snapshot = snapshot_applies(args)
+    if use_snapshot and not args.timings:
+        output = cached_output(find_atlas_root(), args.session_id, args.claude, args.budget)
+        if output is not None:
+            print(output)
+            return 0
+        use_snapshot = False
     
-    # List sessions if requested
-    if args.list:
-        sessions = resumer.list_sessions()
+    # Let a running daemon answer from its warm catalog and caches
+    if not args.no_daemon:
+        response = daemon_request("resume", vars(args))
+        if response is not None:
+            print(response["output"], end="")
+            return response["exit_code"]
+    
+    return run_resume(args, use_snapshot=use_snapshot)
+
+
+def run_resume(args, resumer=None, use_snapshot=True):
+    """Print the listing or session display requested by parsed arguments"""
+    atlas_timing.start("resume", getattr(args, "timings", None))
+    atlas_root = resumer.atlas_root if resumer else find_atlas_root()
+    try:
+        if use_snapshot and snapshot_applies(args):
+            with phase("snapshot"):
+                output = cached_output(atlas_root, args.session_id, args.claude,
+                                       getattr(args, "budget", None), resumer=resumer)
+            if output is not None:
+                print(output)
+                return 0
+        if resumer is None:
+            with phase("startup"):
+                resumer = AtlasSessionResumer()
+        return show_resume(args, resumer)
+    finally:
+        atlas_timing.finish(atlas_root)
+
+
+def snapshot_applies(args):
+    """Whether the arguments ask for a single session's display or --claude context"""
+    return not (args.list or getattr(args, "timeline", False) or getattr(args, "file", None)
+                or any(getattr(args, key, None) for key in ("since", "until", "branch", "user")))
+
+
+def show_resume(args, resumer):
+    filters = {
+        key: getattr(args, key, None) for key in ("since", "until", "branch", "user")
+    }
+    filters = {key: value for key, value in filters.items() if value}
+    
+    if getattr(args, "timeline", False):
+        return show_timeline(resumer, args.since, args.until, getattr(args, "limit", 20))
+    
+    if getattr(args, "file", None):
+        return show_sessions_touching(resumer, args.file, getattr(args, "limit", 20), **filters)
+    
+    # List sessions if requested; filters always produce a listing
+    if args.list or filters:
+        limit = getattr(args, "limit", 20) or None
+        with phase("list_sessions"):
+            sessions = resumer.list_sessions(limit=limit, **filters)
         if not sessions:
-            print("No sessions found.")
-            return
+            print("No matching sessions found." if filters else "No sessions found.")
+            return 0
         
         print("\nAvailable Atlas Sessions:")
         print("-" * 80)
         print(f"{'Session ID':<20} {'Timestamp':<20} {'Context':<40}")
         print("-" * 80)
         
-        for session in sessions[:20]:  # Show last 20 sessions
+        for session in sessions:
             timestamp = datetime.fromisoformat(session["timestamp"])
             print(f"{session['id']:<20} {timestamp.strftime('%Y-%m-%d %H:%M'):<20} {session['context']:<40}")
         
-        if len(sessions) > 20:
-            print(f"\n... and {len(sessions) - 20} more sessions")
+        total = resumer.count_sessions(**filters)
+        if total > len(sessions):
+            print(f"\n... and {total - len(sessions)} more sessions")
         
         print("\nTo resume a session: python resume_session.py -c <session_id>")
-        return
+        return 0
     
     # Load session
-    session_data = resumer.load_session(args.session_id)
+    with phase("load_session"):
+        session_data = resumer.load_session(args.session_id)
     
     if not session_data:
         if args.session_id:
             print(f"❌ Session '{args.session_id}' not found.")
         else:
             print("❌ No sessions found. Save a session first using save_session.py")
-        return
+        return 0
     
     # Display session
     if args.claude:
         # Claude-friendly format
-        print(resumer.generate_claude_context(session_data))
+        with phase("generate_claude_context"):
+            inputs = resumer.snapshots.inputs()
+            context = resumer.generate_claude_context(session_data, budget=args.budget)
+        print(context)
+        # Saves only pre-render the plain display; keep this for the next --claude resume
+        if env_flag("ATLAS_RESUME_SNAPSHOTS", True):
+            with phase("snapshot"):
+                try:
+                    resumer.remember_claude_context(session_data, inputs, context, args.budget)
+                except (OSError, ValueError, sqlite3.Error):
+                    pass
     else:
-        # Full display format
-        print(resumer.format_session_display(session_data))
-        
-        # Add quick commands
-        print("\n🛠️  QUICK COMMANDS")
-        print("-" * 40)
-        print("View full working log:")
-        meta = session_data.get("session_metadata", {})
-        if meta:
-            print(f"  cat WORKING_LOG/{meta['year']}/{meta['month']}/{meta['day']}.md")
-        print("\nView short-term memory:")
-        print("  cat SHORT_IMPORTANT_MEMORY.md")
-        print("\nSave new session:")
-        print('  python scripts/save_session.py -c "What you did" -n "What\'s next"')
+        # Full display format, with the working log entry and quick commands
+        print(resumer.render(session_data))
+    
+    return 0
+
+
+def show_timeline(resumer, since=None, until=None, limit=20):
+    """Print working log entries newest first, reading day files only as needed"""
+    shown = 0
+    for entry in resumer.timeline(since=since, until=until):
+        if limit and shown >= limit:
+            print("\n... older entries not shown (use -n to see more)")
+            break
+        session = f"  (session {entry['session_id']})" if entry["session_id"] else ""
+        print(f"\n🕐 {entry['timestamp'].replace('T', ' ')}{session}")
+        body = entry["text"].strip().split("\n", 1)[-1]
+        print(body.strip().removesuffix("---").rstrip())
+        shown += 1
+    if not shown:
+        print("No working log entries found.")
+    return 0
+
+
+def show_sessions_touching(resumer, path, limit=20, **filters):
+    """Print the sessions that touched a path, with what was done and what's next"""
+    limit = limit or None
+    sessions = resumer.sessions_touching(path, limit=limit + 1 if limit else None, **filters)
+    shown = sessions[:limit]
+    if not shown:
+        print(f"No matching sessions touched {path}." if filters else f"No sessions touched {path}.")
+        return 0
+    
+    print(f"\n📂 Sessions that touched {resumer.repo_path(path) or 'the project'}:")
+    print("-" * 80)
+    for row in shown:
+        timestamp = datetime.fromisoformat(row["timestamp"])
+        print(f"{row['session_id']:<20} {timestamp.strftime('%Y-%m-%d %H:%M'):<20} {row['branch'] or ''}")
+        print(f"   Context:   {row['context']}")
+        print(f"   Next Task: {row['next_task']}")
+    if limit and len(sessions) > limit:
+        print(f"\n... showing the {limit} most recent (use -n to see more)")
+    
+    print("\nTo resume a session: python resume_session.py -c <session_id>")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
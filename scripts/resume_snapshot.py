@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Resume snapshots
+What resume_session.py prints for a session, rendered once at save time so
+hook-driven resumes can print it without loading the session, the catalog
+or the search index
+
+index/resume/<session_id>.txt holds a one-line JSON header followed by the
+plain display and the --claude context, separated by a NUL. Saves write the
+display only; the first --claude resume adds the context. The header keys
+the snapshot by a hash of the session record exactly as stored, and records
+stat signatures of LATEST.json and SHORT_IMPORTANT_MEMORY.md taken before
+rendering: the --claude context also draws on the newest sessions and short
+memory, so it is only served while neither has changed. index/resume/LATEST names the
+session LATEST.json pointed at, so resuming the latest session costs a stat
+and two small reads.
+
+Run directly, this is the entry point for hooks: it imports nothing beyond
+what serving a snapshot needs and hands over to resume_session.py when there
+is no current snapshot.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from atlas_io import atomic_write_text, find_atlas_root
+from context_builder import context_budget
+
+
+SNAPSHOT_DIR = "resume"
+LATEST_MARKER = "LATEST"
+
+# Between the two renderings; neither can contain it
+SEPARATOR = "\0"
+
+# Snapshots kept for the newest sessions; older ones are rendered on demand
+SNAPSHOT_KEEP = 20
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def signature(stat_result):
+    """Changes whenever a file is replaced or rewritten"""
+    return f"{stat_result.st_ino}:{stat_result.st_mtime_ns}:{stat_result.st_size}"
+
+
+def file_signature(path):
+    try:
+        return signature(os.stat(path))
+    except OSError:
+        return None
+
+
+class ResumeSnapshots:
+    def __init__(self, atlas_root):
+        self.atlas_root = Path(atlas_root)
+        self.snapshot_dir = self.atlas_root / "index" / SNAPSHOT_DIR
+        self.latest_file = self.atlas_root / "sessions" / "LATEST.json"
+        self.memory_file = self.atlas_root / "SHORT_IMPORTANT_MEMORY.md"
+
+    def path(self, session_id):
+        return self.snapshot_dir / f"{session_id}.txt"
+
+    def inputs(self):
+        """(session LATEST.json names, its signature, short memory signature)
+
+        The pointer and its signature come from one open file, so they
+        always describe the same version of LATEST.json.
+        """
+        try:
+            with open(self.latest_file, 'rb') as f:
+                latest_signature = signature(os.fstat(f.fileno()))
+                latest_id = json.load(f).get("latest")
+        except (OSError, ValueError):
+            latest_id = latest_signature = None
+        return latest_id, latest_signature, file_signature(self.memory_file)
+
+    def write(self, session_id, stored_hash, inputs, display, claude=None, budget=None):
+        """Store the renderings; `inputs` is what inputs() returned before rendering
+
+        Without `claude` (and the budget it was built for) only the display
+        is served.
+        """
+        latest_id, latest_signature, memory_signature = inputs
+        header = {
+            "session_id": session_id,
+            "hash": stored_hash,
+            "latest": latest_signature,
+            "memory": memory_signature,
+            "budget": budget,
+        }
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path(session_id), json.dumps(header) + "\n" + display + SEPARATOR + (claude or ""))
+        if latest_id == session_id and latest_signature:
+            atomic_write_text(self.snapshot_dir / LATEST_MARKER, f"{latest_signature} {session_id}\n")
+        self.prune()
+
+    def prune(self, keep=SNAPSHOT_KEEP):
+        # Session IDs start with their save time, so names sort oldest first
+        for path in sorted(self.snapshot_dir.glob("*.txt"))[:-keep]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def discard(self, session_ids):
+        """Drop snapshots of sessions whose stored form was rewritten (digested)"""
+        for session_id in session_ids:
+            try:
+                self.path(session_id).unlink()
+            except FileNotFoundError:
+                pass
+
+    def latest_id(self):
+        """The latest session's ID if LATEST.json has not changed since it was marked"""
+        try:
+            marked, _, session_id = (self.snapshot_dir / LATEST_MARKER).read_text(encoding='utf-8').partition(" ")
+        except OSError:
+            return None
+        return session_id.strip() if marked == file_signature(self.latest_file) else None
+
+    def load(self, session_id):
+        """(header, display, claude) for a session, or None"""
+        try:
+            text = self.path(session_id).read_text(encoding='utf-8')
+            head, _, body = text.partition("\n")
+            header = json.loads(head)
+        except (OSError, ValueError):
+            return None
+        display, _, claude = body.partition(SEPARATOR)
+        return header, display, claude
+
+    def claude_current(self, header, budget):
+        """Whether a snapshot's --claude context still matches what would be built"""
+        return (header["budget"] is not None and header["budget"] == budget
+                and header["latest"] == file_signature(self.latest_file)
+                and header["memory"] == file_signature(self.memory_file))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Atlas Session Manager - Print the resume snapshot saved with the latest session",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python resume_snapshot.py             # What resume_session.py prints, pre-rendered
+  python resume_snapshot.py --claude    # The --claude context
+
+Without a current snapshot the arguments are passed on to resume_session.py.
+        """
+    )
+    parser.add_argument('--claude', action='store_true',
+                       help='Print the Claude-friendly context')
+    parser.add_argument('--budget', type=int,
+                       help='Token budget the --claude context must have been built for')
+    args = parser.parse_args()
+
+    snapshots = ResumeSnapshots(find_atlas_root())
+    session_id = snapshots.latest_id()
+    cached = snapshots.load(session_id) if session_id else None
+    if cached:
+        header, display, claude = cached
+        if not args.claude:
+            print(display)
+            return 0
+        if snapshots.claude_current(header, context_budget(args.budget)):
+            print(claude)
+            return 0
+
+    # Stale or missing: render it the usual way
+    from resume_session import main as resume_main
+    return resume_main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,13 +8,32 @@ import os
 import sys
 import json
 import argparse
+import sqlite3
 import subprocess
+import time
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
 
+from atlas_client import daemon_request
+import atlas_timing
+from atlas_io import append_entry, env_flag, path_lock
+from atlas_timing import phase
+from resume_session import AtlasSessionResumer
+from search_atlas import AtlasSearchIndex
+from session_catalog import SessionCatalog
+from session_store import SessionStore
+from short_memory import update_memory_file
+from working_log import day_header, entry_location, format_entry
+
+
+# Git probing limits, overridable with ATLAS_GIT_TIMEOUT / ATLAS_GIT_MAX_FILES
+GIT_TIMEOUT = 10.0
+GIT_MAX_FILES = 200
+
 
 class AtlasSessionSaver:
-    def __init__(self):
+    def __init__(self, fsync=None, git_timeout=None, large_repo=None):
         # Detect if we're running from within .atlas or from project root
         script_path = Path(__file__).resolve()
         if '.atlas' in script_path.parts:
@@ -29,59 +48,135 @@ class AtlasSessionSaver:
         self.working_log_dir = self.atlas_root / "WORKING_LOG"
         self.sessions_dir = self.atlas_root / "sessions"
         self.sessions_dir.mkdir(exist_ok=True)
+        self.lock_file = self.sessions_dir / ".lock"
+        self.store = SessionStore(self.atlas_root)
+        self.catalog = SessionCatalog(self.atlas_root)
+        self.search_index = AtlasSearchIndex(self.atlas_root)
+        # fsync working log appends when asked to (or via ATLAS_FSYNC=1)
+        self.fsync = env_flag("ATLAS_FSYNC") if fsync is None else fsync
+        # Pre-render resume output on save (ATLAS_RESUME_SNAPSHOTS=0 turns it off)
+        self.snapshots = env_flag("ATLAS_RESUME_SNAPSHOTS", True)
+        self.resumer = None
+        
+        # Git snapshot limits; large-repo mode skips untracked files and caps file lists
+        if git_timeout is None:
+            git_timeout = float(os.getenv("ATLAS_GIT_TIMEOUT", GIT_TIMEOUT))
+        self.git_timeout = git_timeout
+        self.large_repo = env_flag("ATLAS_GIT_LARGE_REPO") if large_repo is None else large_repo
+        self.git_max_files = int(os.getenv("ATLAS_GIT_MAX_FILES", GIT_MAX_FILES))
         
         # Get current date components for working log
-        now = datetime.now()
+        self.set_date(datetime.now())
+        
+    def set_date(self, now):
+        """Set the date components used for the working log path"""
         self.year = now.strftime("%Y")
         self.month = now.strftime("%m-%b").lower()
         self.day = now.strftime("%d")
-        
+    
     def get_git_info(self):
-        """Gather git repository information"""
+        """Gather git repository information
+
+        Takes a single `git status --porcelain=v2 --branch -z` snapshot and
+        runs `git log` alongside it, both bounded by the git timeout.
+        """
         try:
-            # Check if we're in a git repo
-            subprocess.run(["git", "rev-parse", "--git-dir"], 
-                         check=True, capture_output=True)
-            
-            # Get current branch
-            branch = subprocess.check_output(
-                ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-                text=True
-            ).strip()
-            
-            # Get modified files
-            modified_files = subprocess.check_output(
-                ["git", "diff", "--name-only"],
-                text=True
-            ).strip().split('\n')
-            
-            # Get staged files
-            staged_files = subprocess.check_output(
-                ["git", "diff", "--cached", "--name-only"],
-                text=True
-            ).strip().split('\n')
-            
-            # Get last 5 commits
-            commits = subprocess.check_output(
+            status_proc = subprocess.Popen(
+                ["git", "status", "--porcelain=v2", "--branch", "-z",
+                 "--untracked-files=" + ("no" if self.large_repo else "normal")],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+            log_proc = subprocess.Popen(
                 ["git", "log", "--oneline", "-5"],
-                text=True
-            ).strip().split('\n')
-            
-            # Get git status summary
-            status = subprocess.check_output(
-                ["git", "status", "--short"],
-                text=True
-            ).strip()
-            
-            return {
-                "branch": branch,
-                "modified_files": [f for f in modified_files if f],
-                "staged_files": [f for f in staged_files if f],
-                "recent_commits": commits,
-                "status_summary": status
-            }
-        except subprocess.CalledProcessError:
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+        except OSError:
+            # git is not installed
+            return None
+        
+        started = time.monotonic()
+        deadline = started + self.git_timeout
+        try:
+            status_out, _ = status_proc.communicate(timeout=self.git_timeout)
+            # Both commands run at once, so each time is until its output was collected
+            atlas_timing.record("git status", time.monotonic() - started)
+            log_out, _ = log_proc.communicate(
+                timeout=max(deadline - time.monotonic(), 0.1)
+            )
+            atlas_timing.record("git log", time.monotonic() - started)
+        except subprocess.TimeoutExpired:
+            for proc in (status_proc, log_proc):
+                proc.kill()
+                proc.communicate()
+            print(f"⚠️  Warning: git did not answer within {self.git_timeout:g}s, "
+                  "saving without git info")
+            return None
+        
+        if status_proc.returncode != 0:
+            # Not a git repository
             return None
+        
+        git_info = self.parse_git_status(status_out.decode('utf-8', errors='replace'))
+        # An unborn branch has no log yet
+        commits = log_out.decode('utf-8', errors='replace').strip() if log_proc.returncode == 0 else ""
+        git_info["recent_commits"] = commits.split('\n') if commits else []
+        return git_info
+    
+    def parse_git_status(self, output):
+        """Parse `git status --porcelain=v2 --branch -z` output"""
+        branch = None
+        modified_files = []
+        staged_files = []
+        status_lines = []
+        
+        records = iter(output.split('\0'))
+        for record in records:
+            if not record:
+                continue
+            kind = record[0]
+            if record.startswith("# branch.head "):
+                branch = record[len("# branch.head "):]
+                if branch == "(detached)":
+                    # Match `git rev-parse --abbrev-ref HEAD`
+                    branch = "HEAD"
+            elif kind in ("1", "2", "u"):
+                # Ordinary, renamed/copied and unmerged entries
+                fields = record.split(' ', {"1": 8, "2": 9, "u": 10}[kind])
+                xy, path = fields[1], fields[-1]
+                x, y = xy[0], xy[1]
+                if kind == "2":
+                    orig_path = next(records, "")
+                    status_lines.append(f"{xy.replace('.', ' ')} {orig_path} -> {path}")
+                else:
+                    status_lines.append(f"{xy.replace('.', ' ')} {path}")
+                if x != '.':
+                    staged_files.append(path)
+                if y != '.':
+                    modified_files.append(path)
+            elif kind == "?":
+                status_lines.append(f"?? {record[2:]}")
+        
+        git_info = {
+            "branch": branch,
+            "modified_files": modified_files,
+            "staged_files": staged_files,
+            "recent_commits": [],
+            "status_summary": "\n".join(status_lines)
+        }
+        
+        # Large-repo mode: keep the lists bounded and record the real counts
+        limit = self.git_max_files
+        if self.large_repo and max(len(modified_files), len(staged_files), len(status_lines)) > limit:
+            git_info.update({
+                "modified_files": modified_files[:limit],
+                "staged_files": staged_files[:limit],
+                "status_summary": "\n".join(status_lines[:limit]),
+                "truncated": True,
+                "modified_count": len(modified_files),
+                "staged_count": len(staged_files),
+                "status_count": len(status_lines)
+            })
+        return git_info
     
     def read_short_memory(self):
         """Read SHORT_IMPORTANT_MEMORY.md if it exists"""
@@ -97,51 +192,49 @@ class AtlasSessionSaver:
         # during runtime by attempting to use the MCP tools
         return "Check during runtime"
     
-    def create_working_log_entry(self, context, next_task):
-        """Create entry in Atlas WORKING_LOG structure"""
-        log_dir = self.working_log_dir / self.year / self.month
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        log_file = log_dir / f"{self.day}.md"
-        
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        entry = f"""
-## Session: {timestamp}
-
-### Context
-{context}
-
-### Next Task
-{next_task}
-
-### Session Details
-- Saved at: {timestamp}
-- Working Directory: {os.getcwd()}
-- Python Version: {sys.version.split()[0]}
+    @property
+    def working_log_file(self):
+        return self.working_log_dir / self.year / self.month / f"{self.day}.md"
+    
+    def create_working_log_entry(self, context, next_task, saved_at=None):
+        """Create entry in Atlas WORKING_LOG structure
 
----
-"""
+        Returns the (offset, length) of the appended entry and its text.
+        """
+        log_file = self.working_log_file
+        log_file.parent.mkdir(parents=True, exist_ok=True)
         
-        # Append to existing file or create new
-        if log_file.exists():
-            existing_content = log_file.read_text(encoding='utf-8')
-            log_file.write_text(existing_content + "\n" + entry, encoding='utf-8')
-        else:
-            # Create file with header
-            header = f"""# Working Log - {self.day} {self.month.split('-')[1].title()} {self.year}
-
-> Atlas Engineering Session Log
-> Professional Mode: Active
-
----
-"""
-            log_file.write_text(header + entry, encoding='utf-8')
+        saved_at = saved_at or datetime.now()
+        entry = format_entry(saved_at, context, next_task, os.getcwd(), sys.version.split()[0])
+        header = day_header(saved_at)
+        
+        # Append under an advisory lock; the header is only written for a new day file
+        offset, length = append_entry(log_file, entry, header=header, separator="\n", fsync=self.fsync)
+        return offset, length, entry
+    
+    def delta_parent(self, branch):
+        """Previous session on the same branch, the base for delta storage"""
+        if not self.store.delta:
+            return None
+        try:
+            # Opening the catalog may create it, which must not race other savers
+            with path_lock(self.lock_file):
+                rows = self.catalog.latest(1, branch=branch or None)
+        except sqlite3.Error:
+            return None
+        return rows[0]["session_id"] if rows else None
     
     def save_session(self, context, next_task, extended_context=None):
         """Save current session state"""
         timestamp = datetime.now()
         session_id = timestamp.strftime("%Y%m%d_%H%M%S")
+        # Long-lived savers (the daemon) can outlive the day they were created on
+        self.set_date(timestamp)
+        
+        with phase("get_git_info"):
+            git_info = self.get_git_info()
+        with phase("read_short_memory"):
+            short_memory = self.read_short_memory()
         
         # Gather all session data
         session_data = {
@@ -153,8 +246,8 @@ class AtlasSessionSaver:
             "extended_context": extended_context,
             "working_directory": os.getcwd(),
             "python_version": sys.version,
-            "git_info": self.get_git_info(),
-            "short_memory": self.read_short_memory(),
+            "git_info": git_info,
+            "short_memory": short_memory,
             "professional_mode": True,
             "mcp_available": self.check_mcp_availability(),
             "session_metadata": {
@@ -165,42 +258,79 @@ class AtlasSessionSaver:
             }
         }
         
-        # Save session file
-        session_file = self.sessions_dir / f"Session_{session_id}.json"
-        with open(session_file, 'w', encoding='utf-8') as f:
-            json.dump(session_data, f, indent=2, ensure_ascii=False)
+        # Append the working log entry first (it has its own lock) so the
+        # session can record exactly where its entry lives
+        with phase("create_working_log_entry"):
+            log_offset, log_length, log_entry = self.create_working_log_entry(context, next_task, timestamp)
+        session_data["working_log"] = entry_location(
+            self.working_log_dir, self.working_log_file, log_offset, log_length, log_entry
+        )
         
-        # Update LATEST.json
-        latest_file = self.sessions_dir / "LATEST.json"
-        with open(latest_file, 'w', encoding='utf-8') as f:
-            json.dump(session_data, f, indent=2, ensure_ascii=False)
+        # Save the session file; it never overwrites another save's file, so
+        # colliding IDs get a suffix. Bulky fields go to the blob store, and
+        # in delta mode only the changes from the branch's last save are kept.
+        with phase("json.dump"):
+            parent = self.delta_parent((git_info or {}).get("branch"))
+            location, offset, length = self.store.write(session_data, fsync=self.fsync, parent=parent)
         
-        # Create working log entry
-        self.create_working_log_entry(context, next_task)
+        # Everything shared between concurrent savers happens under one lock
+        with ExitStack() as locked:
+            with phase("lock wait"):
+                locked.enter_context(path_lock(self.lock_file))
+            with phase("set_latest"):
+                self.store.set_latest(session_data, location, offset, length)
+            
+            # Record the session in the catalog so listing never rescans sessions/
+            try:
+                with phase("catalog"):
+                    self.catalog.add(session_data, location, offset, length)
+            except sqlite3.Error as e:
+                print(f"⚠️  Warning: Could not update session catalog ({e}); "
+                      "run manage_sessions.py rebuild-catalog")
+            
+            # Keep the full-text search index current
+            try:
+                with phase("search index"):
+                    self.search_index.add_session(session_data)
+                    self.search_index.add_log_entry(
+                        self.working_log_file, log_offset, log_entry, timestamp=session_data["timestamp"]
+                    )
+            except sqlite3.Error as e:
+                print(f"⚠️  Warning: Could not update search index ({e}); "
+                      "run search_atlas.py --reindex")
+            
+            # Update SHORT_IMPORTANT_MEMORY if needed
+            if extended_context and "important_notes" in extended_context:
+                with phase("update_short_memory"):
+                    self.update_short_memory(extended_context["important_notes"])
         
-        # Update SHORT_IMPORTANT_MEMORY if needed
-        if extended_context and "important_notes" in extended_context:
-            self.update_short_memory(extended_context["important_notes"])
+        # Render what resume_session.py will print while everything is warm
+        if self.snapshots:
+            with phase("resume snapshot"):
+                try:
+                    if self.resumer is None:
+                        self.resumer = AtlasSessionResumer()
+                    self.resumer.snapshot(session_data, location, offset, length)
+                except (OSError, ValueError, sqlite3.Error) as e:
+                    print(f"⚠️  Warning: Could not write resume snapshot ({e})")
         
-        return session_file, session_data
+        # A session file, or the journal the session was appended to
+        return self.sessions_dir / location, session_data
     
     def update_short_memory(self, new_notes):
-        """Append important notes to SHORT_IMPORTANT_MEMORY.md"""
+        """Add important notes to SHORT_IMPORTANT_MEMORY.md
+
+        The Critical Notes section is kept bounded: notes past the
+        ATLAS_MEMORY_* limits move to MEMORY/KNOWLEDGE_LOG.
+        """
         memory_file = self.atlas_root / "SHORT_IMPORTANT_MEMORY.md"
         
         if memory_file.exists():
-            content = memory_file.read_text(encoding='utf-8')
-            # Find the Critical Notes section
-            if "## Critical Notes" in content:
-                # Append to existing notes
-                parts = content.split("## Critical Notes")
-                updated_content = (
-                    parts[0] + 
-                    "## Critical Notes" + 
-                    parts[1].rstrip() + 
-                    f"\n- {datetime.now().strftime('%Y-%m-%d')}: {new_notes}\n"
-                )
-                memory_file.write_text(updated_content, encoding='utf-8')
+            evicted = update_memory_file(memory_file, self.atlas_root / "MEMORY" / "KNOWLEDGE_LOG",
+                                         note=new_notes)
+            if evicted:
+                print(f"🗄️  Moved {len(evicted)} old note(s) from SHORT_IMPORTANT_MEMORY.md "
+                      "to MEMORY/KNOWLEDGE_LOG/")
 
 
 def main():
@@ -220,9 +350,32 @@ Examples:
                        help='What needs to be done next')
     parser.add_argument('-e', '--extended', type=str,
                        help='Extended context as JSON (technical decisions, important notes)')
+    parser.add_argument('--fsync', action='store_true', default=None,
+                       help='Flush the working log to disk on every save (or set ATLAS_FSYNC=1)')
+    parser.add_argument('--git-timeout', type=float,
+                       help=f'Seconds to wait for git before saving without git info (default {GIT_TIMEOUT:g})')
+    parser.add_argument('--large-repo', action='store_true', default=None,
+                       help='Skip untracked files and only record counts past '
+                            f'{GIT_MAX_FILES} changed files (or set ATLAS_GIT_LARGE_REPO=1)')
+    parser.add_argument('--no-daemon', action='store_true',
+                       help='Save in-process even if the atlas daemon is running (or set ATLAS_NO_DAEMON=1)')
+    parser.add_argument('--timings', action='store_true', default=None,
+                       help='Print per-phase durations and append them to the metrics file (or set ATLAS_TIMINGS=1)')
     
     args = parser.parse_args()
     
+    # Hand the save to a running daemon when there is one
+    if not args.no_daemon:
+        response = daemon_request("save", vars(args))
+        if response is not None:
+            print(response["output"], end="")
+            return response["exit_code"]
+    
+    return run_save(args)
+
+
+def run_save(args, saver=None):
+    """Save a session for parsed command-line arguments and print the result"""
     # Parse extended context if provided
     extended_context = None
     if args.extended:
@@ -232,7 +385,14 @@ Examples:
             print("⚠️  Warning: Invalid JSON in extended context, ignoring")
     
     # Save session
-    saver = AtlasSessionSaver()
+    atlas_timing.start("save", getattr(args, "timings", None))
+    if saver is None:
+        with phase("startup"):
+            saver = AtlasSessionSaver(
+                fsync=args.fsync,
+                git_timeout=args.git_timeout,
+                large_repo=args.large_repo
+            )
     session_file, session_data = saver.save_session(
         args.context, 
         args.next_task, 
@@ -260,9 +420,13 @@ To resume this session:
     # Show git status if available
     if session_data['git_info']:
         print(f"\nGit Branch: {session_data['git_info']['branch']}")
-        if session_data['git_info']['modified_files']:
-            print(f"Modified Files: {len(session_data['git_info']['modified_files'])}")
+        git_info = session_data['git_info']
+        if git_info['modified_files']:
+            print(f"Modified Files: {git_info.get('modified_count', len(git_info['modified_files']))}")
+    
+    atlas_timing.finish(saver.atlas_root)
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
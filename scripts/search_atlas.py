@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Search
+Full-text search over sessions, WORKING_LOG entries and MEMORY/KNOWLEDGE_LOG
+"""
+
+import argparse
+import json
+import math
+import re
+import sqlite3
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from atlas_io import find_atlas_root
+from context_builder import tokens
+from session_catalog import SessionCatalog
+from session_store import SessionStore
+
+
+SCHEMA_VERSION = 2
+
+ENTRY_MARKER = b"\n## Session: "
+
+KINDS = ("session", "log", "knowledge")
+
+# Related sessions: every indexed session keeps a TF-IDF vector. Its terms'
+# length-normalised log frequencies live in session_terms and document
+# frequencies in term_df, both updated as each session is indexed, so a
+# lookup only reads the postings of a few query terms. Terms found in more
+# than COMMON_TERM_SHARE of a large index say little about similarity and
+# have the longest postings, so they are left out.
+COMMON_TERM_SHARE = 0.2
+COMMON_TERM_MIN_DOCS = 100
+# Query terms probed for their document frequency, then kept for scoring
+QUERY_TERMS = 32
+RELATED_TERMS = 12
+# Postings a lookup may read; lower-weighted terms beyond it are skipped
+POSTINGS_BUDGET = 4000
+
+
+def flatten(value):
+    """Turn extended context (dicts/lists/scalars) into plain searchable text"""
+    if isinstance(value, dict):
+        return "\n".join(f"{key.replace('_', ' ')}: {flatten(item)}" for key, item in value.items())
+    if isinstance(value, list):
+        return "\n".join(flatten(item) for item in value)
+    return "" if value is None else str(value)
+
+
+def term_vector(text):
+    """{term: weight}: log term frequencies scaled to unit length"""
+    weights = {term: 1.0 + math.log(count) for term, count in Counter(tokens(text)).items()}
+    norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+    return {term: weight / norm for term, weight in weights.items()}
+
+
+def session_text(session_data):
+    """What a session is indexed and compared on"""
+    return "\n".join(filter(None, [
+        session_data.get("context"),
+        session_data.get("next_task"),
+        flatten(session_data.get("extended_context"))
+    ]))
+
+
+def fts_query(text):
+    """Quote every word so file names and punctuation never break FTS5 syntax"""
+    words = re.findall(r"\w+", text, flags=re.UNICODE)
+    return " ".join(f'"{word}"' for word in words)
+
+
+class AtlasSearchIndex:
+    def __init__(self, atlas_root):
+        self.atlas_root = Path(atlas_root)
+        self.sessions_dir = self.atlas_root / "sessions"
+        self.working_log_dir = self.atlas_root / "WORKING_LOG"
+        self.knowledge_dir = self.atlas_root / "MEMORY" / "KNOWLEDGE_LOG"
+        self.index_dir = self.atlas_root / "index"
+        self.db_path = self.index_dir / "search.db"
+        self.store = SessionStore(self.atlas_root)
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), timeout=30)
+            self._conn.row_factory = sqlite3.Row
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self._upgrade()
+        return self._conn
+
+    def _upgrade(self):
+        """Create the index, or add what a newer version needs, under the write lock"""
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version == 1:
+                # Version 2 added session vectors; build them from the indexed text
+                self._create_vector_tables()
+                rows = conn.execute("""
+                    SELECT docs.ref, docs.timestamp, docs.title, documents.body
+                    FROM docs JOIN documents ON documents.rowid = docs.id
+                    WHERE docs.kind = 'session'
+                """).fetchall()
+                for row in rows:
+                    self._put_vector(row["ref"], row["timestamp"], row["title"], row["body"])
+            elif version != SCHEMA_VERSION:
+                self._create_schema()
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _create_schema(self):
+        conn = self._conn
+        conn.execute("DROP TABLE IF EXISTS documents")
+        conn.execute("DROP TABLE IF EXISTS docs")
+        conn.execute("DROP TABLE IF EXISTS sources")
+        conn.execute("DROP TABLE IF EXISTS session_vectors")
+        conn.execute("DROP TABLE IF EXISTS session_terms")
+        conn.execute("DROP TABLE IF EXISTS term_df")
+        conn.execute("DROP TABLE IF EXISTS vector_stats")
+        # Full-text rows share their rowid with docs.id
+        conn.execute(
+            "CREATE VIRTUAL TABLE documents USING fts5(title, body, tokenize='porter unicode61')"
+        )
+        conn.execute("""
+            CREATE TABLE docs (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                ref TEXT NOT NULL UNIQUE,
+                source TEXT,
+                timestamp TEXT,
+                title TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX docs_source ON docs (source)")
+        # Markdown files already indexed, so rescans only touch changed files
+        conn.execute("""
+            CREATE TABLE sources (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._create_vector_tables()
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _create_vector_tables(self):
+        conn = self._conn
+        conn.execute("""
+            CREATE TABLE session_vectors (
+                session_id TEXT PRIMARY KEY,
+                timestamp TEXT,
+                title TEXT
+            )
+        """)
+        # Postings: term -> sessions using it, with the term's weight in each
+        conn.execute("""
+            CREATE TABLE session_terms (
+                term TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                weight REAL NOT NULL,
+                PRIMARY KEY (term, session_id)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX session_terms_session ON session_terms (session_id)")
+        conn.execute("""
+            CREATE TABLE term_df (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        # Session count for IDF, kept with the vectors instead of counted per lookup
+        conn.execute("CREATE TABLE vector_stats (sessions INTEGER NOT NULL)")
+        conn.execute("INSERT INTO vector_stats (sessions) VALUES (0)")
+
+    # -- indexing ---------------------------------------------------------
+
+    def _put(self, kind, ref, title, body, source=None, timestamp=None):
+        conn = self.conn
+        row = conn.execute("SELECT id FROM docs WHERE ref = ?", (ref,)).fetchone()
+        if row:
+            conn.execute("DELETE FROM documents WHERE rowid = ?", (row["id"],))
+            conn.execute("DELETE FROM docs WHERE id = ?", (row["id"],))
+        cursor = conn.execute(
+            "INSERT INTO docs (kind, ref, source, timestamp, title) VALUES (?, ?, ?, ?, ?)",
+            (kind, ref, source, timestamp, title)
+        )
+        conn.execute(
+            "INSERT INTO documents (rowid, title, body) VALUES (?, ?, ?)",
+            (cursor.lastrowid, title, body)
+        )
+
+    def _drop_source(self, source):
+        conn = self.conn
+        ids = [row["id"] for row in conn.execute("SELECT id FROM docs WHERE source = ?", (source,))]
+        for doc_id in ids:
+            conn.execute("DELETE FROM documents WHERE rowid = ?", (doc_id,))
+        conn.execute("DELETE FROM docs WHERE source = ?", (source,))
+        conn.execute("DELETE FROM sources WHERE path = ?", (source,))
+
+    def _mark_source(self, path):
+        stat = path.stat()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sources (path, mtime, size) VALUES (?, ?, ?)",
+            (self._rel(path), stat.st_mtime, stat.st_size)
+        )
+
+    def _rel(self, path):
+        return Path(path).relative_to(self.atlas_root).as_posix()
+
+    def _index_session(self, session_data):
+        body = session_text(session_data)
+        title = session_data.get("context") or ""
+        self._put("session", session_data["session_id"], title, body, timestamp=session_data.get("timestamp"))
+        self._put_vector(session_data["session_id"], session_data.get("timestamp"), title, body)
+
+    def _put_vector(self, session_id, timestamp, title, text):
+        """Store a session's term vector, keeping document frequencies in step"""
+        conn = self.conn
+        old = [row["term"] for row in conn.execute(
+            "SELECT term FROM session_terms WHERE session_id = ?", (session_id,))]
+        if old:
+            conn.executemany("UPDATE term_df SET df = df - 1 WHERE term = ?", [(term,) for term in old])
+            conn.executemany("DELETE FROM term_df WHERE term = ? AND df <= 0", [(term,) for term in old])
+            conn.execute("DELETE FROM session_terms WHERE session_id = ?", (session_id,))
+        elif not conn.execute("SELECT 1 FROM session_vectors WHERE session_id = ?", (session_id,)).fetchone():
+            conn.execute("UPDATE vector_stats SET sessions = sessions + 1")
+        conn.execute("INSERT OR REPLACE INTO session_vectors (session_id, timestamp, title) VALUES (?, ?, ?)",
+                     (session_id, timestamp, title))
+        vector = term_vector(text)
+        conn.executemany("INSERT INTO session_terms (term, session_id, weight) VALUES (?, ?, ?)",
+                         [(term, session_id, weight) for term, weight in vector.items()])
+        conn.executemany("INSERT INTO term_df (term, df) VALUES (?, 1) "
+                         "ON CONFLICT (term) DO UPDATE SET df = df + 1", [(term,) for term in vector])
+
+    def add_session(self, session_data):
+        """Index one saved session"""
+        with self.conn:
+            self._index_session(session_data)
+
+    def add_log_entry(self, log_file, offset, entry, timestamp=None):
+        """Index a working log entry that was just appended at `offset`"""
+        log_file = Path(log_file)
+        source = self._rel(log_file)
+        with self.conn:
+            known = self.conn.execute(
+                "SELECT size FROM sources WHERE path = ?", (source,)
+            ).fetchone()
+            # Only take the shortcut if everything before this entry (and the
+            # one-byte separator) is already indexed; otherwise rescan the file
+            if known is None or known["size"] != offset - 1:
+                self._index_log_file(log_file)
+                return
+            # Entries start with a blank line before the "## Session:" heading
+            self._put("log", f"{source}@{offset + 1}", self._log_title(entry, source),
+                      entry, source=source, timestamp=timestamp)
+            self._mark_source(log_file)
+
+    @staticmethod
+    def _log_title(entry, source):
+        for line in entry.splitlines():
+            if line.startswith("## Session: "):
+                return f"{source} {line[len('## Session: '):]}"
+        return source
+
+    def _index_log_file(self, log_file):
+        source = self._rel(log_file)
+        self._drop_source(source)
+        data = log_file.read_bytes()
+        starts = [m.start() + 1 for m in re.finditer(re.escape(ENTRY_MARKER), data)]
+        for i, start in enumerate(starts):
+            end = starts[i + 1] - 1 if i + 1 < len(starts) else len(data)
+            entry = data[start:end].decode('utf-8', errors='replace')
+            heading = re.search(r"^## Session: (\S+ \S+)", entry, flags=re.MULTILINE)
+            timestamp = heading.group(1).replace(" ", "T") if heading else None
+            self._put("log", f"{source}@{start}", self._log_title(entry, source),
+                      entry, source=source, timestamp=timestamp)
+        self._mark_source(log_file)
+
+    def _index_knowledge_file(self, path):
+        source = self._rel(path)
+        self._drop_source(source)
+        text = path.read_text(encoding='utf-8', errors='replace')
+        title = next((line.lstrip('# ').strip() for line in text.splitlines() if line.strip()), source)
+        timestamp = datetime.fromtimestamp(path.stat().st_mtime).isoformat()
+        self._put("knowledge", source, title, text, source=source, timestamp=timestamp)
+        self._mark_source(path)
+
+    def _changed_files(self, root, pattern):
+        if not root.exists():
+            return
+        known = {
+            row["path"]: (row["mtime"], row["size"])
+            for row in self.conn.execute("SELECT path, mtime, size FROM sources")
+        }
+        for path in root.glob(pattern):
+            stat = path.stat()
+            if known.get(self._rel(path)) != (stat.st_mtime, stat.st_size):
+                yield path
+
+    def _load_session(self, row):
+        return self.store.read(row["location"], row["byte_offset"], row["byte_length"])
+
+    def update(self):
+        """Incrementally bring the index up to date; returns documents (re)indexed"""
+        indexed = 0
+        with self.conn:
+            # Sessions missing from the index, found through the session catalog
+            catalog = SessionCatalog(self.atlas_root)
+            have = {row["ref"] for row in self.conn.execute("SELECT ref FROM docs WHERE kind = 'session'")}
+            for row in catalog.latest():
+                if row["session_id"] in have:
+                    continue
+                try:
+                    self._index_session(self._load_session(row))
+                    indexed += 1
+                except (json.JSONDecodeError, KeyError, EOFError, OSError):
+                    continue
+            catalog.close()
+
+            for path in list(self._changed_files(self.working_log_dir, "*/*/*.md")):
+                self._index_log_file(path)
+                indexed += 1
+            for path in list(self._changed_files(self.knowledge_dir, "**/*.md")):
+                self._index_knowledge_file(path)
+                indexed += 1
+
+            # Forget markdown files that no longer exist
+            for row in list(self.conn.execute("SELECT path FROM sources")):
+                if not (self.atlas_root / row["path"]).exists():
+                    self._drop_source(row["path"])
+        return indexed
+
+    def rebuild(self):
+        """Throw the index away and build it again from scratch"""
+        with self.conn:
+            self._create_schema()
+        return self.update()
+
+    # -- querying ---------------------------------------------------------
+
+    def search(self, text, limit=10, kind=None, raw=False):
+        """Return the best matches for `text`, ranked by BM25"""
+        query = text if raw else fts_query(text)
+        if not query:
+            return []
+        sql = """
+            SELECT docs.kind, docs.ref, docs.timestamp, docs.title,
+                   snippet(documents, 1, '[', ']', ' … ', 16) AS snippet,
+                   bm25(documents, 2.0, 1.0) AS score
+            FROM documents JOIN docs ON docs.id = documents.rowid
+            WHERE documents MATCH ?
+        """
+        params = [query]
+        if kind:
+            sql += " AND docs.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def related_sessions(self, text, exclude=None, before=None, limit=5):
+        """Past sessions whose TF-IDF vectors are closest to `text`'s, best first
+
+        The query's strongest terms are looked up in term_df (one query), and
+        terms no session other than `exclude` uses are dropped. The rest are
+        weighted by IDF, and every session sharing any of them is scored by
+        the dot product of the two vectors in one query over their postings.
+        Terms are taken while their postings fit POSTINGS_BUDGET, so the cost
+        of a lookup does not grow with the number of sessions.
+        """
+        vector = term_vector(text)
+        if not vector:
+            return []
+        conn = self.conn
+        total = conn.execute("SELECT sessions FROM vector_stats").fetchone()[0]
+        if not total:
+            return []
+        probe = sorted(vector, key=lambda term: (-vector[term], term))[:QUERY_TERMS]
+        marks = ", ".join("?" for _ in probe)
+        frequencies = dict(conn.execute(f"SELECT term, df FROM term_df WHERE term IN ({marks})", probe).fetchall())
+        own = set()
+        if exclude:
+            own = {row[0] for row in conn.execute(
+                f"SELECT term FROM session_terms WHERE session_id = ? AND term IN ({marks})", [exclude] + probe)}
+        max_df = total * COMMON_TERM_SHARE if total >= COMMON_TERM_MIN_DOCS else total
+        weighted = []
+        for term in probe:
+            df = frequencies.get(term, 0)
+            if df - (term in own) <= 0 or df > max_df:
+                continue
+            idf = math.log(1 + total / df)
+            weighted.append((vector[term] * idf * idf, term))
+        chosen, postings = [], 0
+        for weight, term in sorted(weighted, reverse=True)[:RELATED_TERMS]:
+            if chosen and postings + frequencies[term] > POSTINGS_BUDGET:
+                continue
+            chosen.append((weight, term))
+            postings += frequencies[term]
+        if not chosen:
+            return []
+        values = ", ".join("(?, ?)" for _ in chosen)
+        sql = f"""
+            WITH query (term, weight) AS (VALUES {values})
+            SELECT vectors.session_id, vectors.timestamp, vectors.title,
+                   SUM(postings.weight * query.weight) AS score
+            FROM query
+            JOIN session_terms AS postings ON postings.term = query.term
+            JOIN session_vectors AS vectors ON vectors.session_id = postings.session_id
+            WHERE vectors.session_id IS NOT ?
+        """
+        params = [value for weight, term in chosen for value in (term, weight)] + [exclude]
+        if before:
+            sql += " AND vectors.timestamp < ?"
+            params.append(before)
+        sql += " GROUP BY vectors.session_id ORDER BY score DESC, vectors.timestamp DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in conn.execute(sql, params)]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Atlas Session Manager - Search sessions, working logs and knowledge",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python search_atlas.py "jwt refresh token"        # Search everything
+  python search_atlas.py rate limiting -k session   # Only sessions
+  python search_atlas.py --raw 'redis NEAR(limit)'  # Raw FTS5 query syntax
+  python search_atlas.py --reindex                  # Pick up edited markdown files
+        """
+    )
+    parser.add_argument('query', nargs='*', help='Words to search for')
+    parser.add_argument('-k', '--kind', choices=KINDS,
+                       help='Only return one kind of document')
+    parser.add_argument('-n', '--limit', type=int, default=10,
+                       help='Maximum number of results (default 10)')
+    parser.add_argument('--raw', action='store_true',
+                       help='Pass the query to SQLite FTS5 unchanged')
+    parser.add_argument('--reindex', action='store_true',
+                       help='Index new sessions and changed markdown files before searching')
+    parser.add_argument('--rebuild', action='store_true',
+                       help='Rebuild the search index from scratch')
+
+    args = parser.parse_args()
+
+    index = AtlasSearchIndex(find_atlas_root())
+    try:
+        if args.rebuild:
+            print(f"✅ Search index rebuilt: {index.rebuild()} documents indexed")
+        elif args.reindex:
+            print(f"✅ Search index updated: {index.update()} documents (re)indexed")
+        elif index.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0] == 0:
+            # First use on an existing install
+            index.update()
+    except sqlite3.OperationalError as e:
+        print(f"❌ Search index unavailable: {e}")
+        print("   Your Python's SQLite build needs FTS5 support.")
+        return 1
+
+    if not args.query:
+        return 0
+
+    try:
+        results = index.search(" ".join(args.query), limit=args.limit, kind=args.kind, raw=args.raw)
+    except sqlite3.OperationalError as e:
+        print(f"❌ Invalid query: {e}")
+        return 1
+
+    if not results:
+        print("No matches found.")
+        return 0
+
+    print(f"\nAtlas Search: {' '.join(args.query)}")
+    print("-" * 80)
+    for result in results:
+        when = result["timestamp"][:16].replace("T", " ") if result["timestamp"] else ""
+        print(f"[{result['kind']}] {result['ref']}  {when}")
+        print(f"    {' '.join(result['snippet'].split())}")
+    print("\nTo resume a session: python resume_session.py -c <session_id>")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
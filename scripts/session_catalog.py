@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Session Catalog
+Persistent SQLite index of saved sessions so listing and lookups never
+have to open every Session_*.json file
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+from session_store import DIGEST_DIR, SessionStore
+
+
+# Bump whenever the table layout changes; stale catalogs are rebuilt
+SCHEMA_VERSION = 5
+
+PREVIEW_LENGTH = 50
+
+
+def context_preview(context):
+    """Shorten a session context for list displays"""
+    context = context or ""
+    if len(context) > PREVIEW_LENGTH:
+        return context[:PREVIEW_LENGTH] + "..."
+    return context
+
+
+class SessionCatalog:
+    def __init__(self, atlas_root):
+        self.atlas_root = Path(atlas_root)
+        self.sessions_dir = self.atlas_root / "sessions"
+        self.index_dir = self.atlas_root / "index"
+        self.db_path = self.index_dir / "catalog.db"
+        self._conn = None
+
+    @property
+    def conn(self):
+        """Open the catalog lazily, creating or rebuilding it as needed"""
+        if self._conn is None:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), timeout=30)
+            self._conn.row_factory = sqlite3.Row
+            # A new database file reports version 0
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self._upgrade()
+        return self._conn
+
+    def _upgrade(self):
+        """Create or rebuild the catalog, once even when processes start together
+
+        The version is checked again under the write lock, held until the
+        new catalog is committed, so a concurrent process waits and then
+        finds it current instead of dropping tables being filled.
+        """
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self._create_schema()
+                self._replace(self._scan())
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _create_schema(self):
+        conn = self._conn
+        conn.execute("DROP TABLE IF EXISTS sessions")
+        conn.execute("DROP TABLE IF EXISTS session_paths")
+        conn.execute("""
+            CREATE TABLE sessions (
+                session_id TEXT PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                branch TEXT,
+                user TEXT,
+                preview TEXT,
+                context TEXT,
+                next_task TEXT,
+                location TEXT NOT NULL,
+                byte_offset INTEGER,
+                byte_length INTEGER,
+                log_file TEXT,
+                log_offset INTEGER,
+                log_length INTEGER
+            )
+        """)
+        conn.execute("CREATE INDEX sessions_timestamp ON sessions (timestamp)")
+        # Filtered listings are range scans over (key, timestamp)
+        conn.execute("CREATE INDEX sessions_branch ON sessions (branch, timestamp)")
+        conn.execute("CREATE INDEX sessions_user ON sessions (user, timestamp)")
+        conn.execute("CREATE INDEX sessions_log ON sessions (log_file, log_offset)")
+        # Inverted index: repository path -> sessions that had it modified or staged
+        conn.execute("""
+            CREATE TABLE session_paths (
+                path TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                PRIMARY KEY (path, session_id)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX session_paths_session ON session_paths (session_id)")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def row_from_session(session_data, location, offset=None, length=None):
+        """Build a catalog row from full session data
+
+        `location` is relative to sessions/; archived sessions also carry
+        the byte offset and length of their record in the segment.
+        """
+        git_info = session_data.get("git_info") or {}
+        meta = session_data.get("session_metadata") or {}
+        log = session_data.get("working_log") or {}
+        return {
+            "session_id": session_data["session_id"],
+            "timestamp": session_data["timestamp"],
+            "branch": git_info.get("branch"),
+            "user": meta.get("user"),
+            "preview": context_preview(session_data.get("context")),
+            "context": session_data.get("context"),
+            "next_task": session_data.get("next_task"),
+            "location": location,
+            "byte_offset": offset,
+            "byte_length": length,
+            "log_file": log.get("file"),
+            "log_offset": log.get("offset"),
+            "log_length": log.get("length"),
+        }
+
+    @staticmethod
+    def touched_paths(session_data):
+        """Repository paths a session had modified, staged or committed"""
+        git_info = session_data.get("git_info") or {}
+        paths = set()
+        for key in ("modified_files", "staged_files", "committed_files"):
+            for path in git_info.get(key) or []:
+                path = path.strip().strip("/")
+                if path.startswith("./"):
+                    path = path[2:]
+                if path:
+                    paths.add(path)
+        return sorted(paths)
+
+    def add(self, session_data, location, offset=None, length=None):
+        """Record a freshly saved session"""
+        row = self.row_from_session(session_data, location, offset, length)
+        with self.conn:
+            self._insert(row, self.touched_paths(session_data))
+
+    def _insert(self, row, paths=()):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sessions "
+            "(session_id, timestamp, branch, user, preview, context, next_task, "
+            "location, byte_offset, byte_length, log_file, log_offset, log_length) "
+            "VALUES (:session_id, :timestamp, :branch, :user, :preview, :context, :next_task, "
+            ":location, :byte_offset, :byte_length, :log_file, :log_offset, :log_length)",
+            row
+        )
+        self._conn.execute("DELETE FROM session_paths WHERE session_id = ?", (row["session_id"],))
+        self._conn.executemany(
+            "INSERT INTO session_paths (path, session_id) VALUES (?, ?)",
+            [(path, row["session_id"]) for path in paths]
+        )
+
+    def relocate(self, moves):
+        """Point sessions at new storage: [(session_id, location, offset, length)]"""
+        with self.conn:
+            self._conn.executemany(
+                "UPDATE sessions SET location = ?, byte_offset = ?, byte_length = ? "
+                "WHERE session_id = ?",
+                [(location, offset, length, session_id) for session_id, location, offset, length in moves]
+            )
+
+    def loose_before(self, timestamp):
+        """Sessions older than `timestamp` still stored as individual files"""
+        return [
+            dict(row) for row in self.conn.execute(
+                "SELECT * FROM sessions WHERE timestamp < ? AND byte_offset IS NULL "
+                "ORDER BY timestamp", (timestamp,)
+            )
+        ]
+
+    def undigested_before(self, timestamp):
+        """Sessions older than `timestamp` still stored in full (loose or archived)"""
+        return [
+            dict(row) for row in self.conn.execute(
+                "SELECT * FROM sessions WHERE timestamp < ? AND location NOT LIKE ? "
+                "ORDER BY timestamp", (timestamp, f"{DIGEST_DIR}/%")
+            )
+        ]
+
+    def remove(self, session_id):
+        with self.conn:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM session_paths WHERE session_id = ?", (session_id,))
+
+    def latest(self, limit=None, since=None, until=None, branch=None, user=None):
+        """Return catalog rows, newest first, optionally filtered
+
+        `since` is inclusive and `until` exclusive, both ISO timestamps or
+        prefixes of one. `branch` may be a glob such as "feature/*".
+        """
+        where, params = self._filters(since, until, branch, user)
+        sql = f"SELECT * FROM sessions{where} ORDER BY timestamp DESC, session_id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def count(self, since=None, until=None, branch=None, user=None):
+        where, params = self._filters(since, until, branch, user)
+        return self.conn.execute(f"SELECT COUNT(*) FROM sessions{where}", params).fetchone()[0]
+
+    @staticmethod
+    def _filters(since, until, branch, user, clauses=(), params=()):
+        clauses = list(clauses)
+        if since:
+            clauses.append("timestamp >= ?")
+            params += (since,)
+        if until:
+            clauses.append("timestamp < ?")
+            params += (until,)
+        if branch:
+            clauses.append("branch GLOB ?" if any(c in branch for c in "*?[") else "branch = ?")
+            params += (branch,)
+        if user:
+            clauses.append("user = ?")
+            params += (user,)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def touching(self, path, limit=None, since=None, until=None, branch=None, user=None):
+        """Sessions, newest first, that touched `path` or anything under it
+
+        `path` is relative to the repository root; an empty path matches
+        every session that recorded any file. Answered from the
+        (path, session_id) index; the filters are those of latest().
+        """
+        path = path.strip("/")
+        if path:
+            # "src/auth" matches src/auth and src/auth/..., but not src/auth.py
+            low, high = path + "/", path + "0"
+        else:
+            low, high = "", "\U0010ffff"
+        where, params = self._filters(
+            since, until, branch, user,
+            ["session_id IN (SELECT session_id FROM session_paths WHERE path = ? OR (path >= ? AND path < ?))"],
+            (path, low, high),
+        )
+        sql = f"SELECT * FROM sessions{where} ORDER BY timestamp DESC, session_id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def log_sessions(self, log_file):
+        """Map entry offsets in one working log day file to their session IDs"""
+        return {
+            row["log_offset"]: row["session_id"]
+            for row in self.conn.execute(
+                "SELECT log_offset, session_id FROM sessions WHERE log_file = ?", (log_file,)
+            )
+        }
+
+    def get(self, session_id):
+        """Look up a session by ID, with or without the Session_ prefix"""
+        if session_id.startswith("Session_"):
+            session_id = session_id[len("Session_"):]
+        row = self.conn.execute(
+            "SELECT * FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def rebuild(self):
+        """Re-scan every stored session and replace the catalog contents
+
+        Returns the number of sessions catalogued. Unreadable records are
+        skipped, exactly as the old directory scan did. The scan runs under
+        the write lock, as in _upgrade(), so a session catalogued by a save
+        meanwhile is not dropped by the replace.
+        """
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._scan()
+            self._replace(rows)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return len(rows)
+
+    def _scan(self):
+        """{session_id: (catalog row, touched paths)} for every stored session"""
+        rows = {}
+        store = SessionStore(self.atlas_root)
+        if self.sessions_dir.exists():
+            for session_id, location, offset, length, stored in store.records():
+                try:
+                    data = store.resolve(stored)
+                    rows[session_id] = (self.row_from_session(data, location, offset, length),
+                                        self.touched_paths(data))
+                except (json.JSONDecodeError, KeyError, TypeError, EOFError, OSError):
+                    continue
+        return rows
+
+    def _replace(self, rows):
+        """Swap the catalog contents for `rows`; the caller commits"""
+        self._conn.execute("DELETE FROM sessions")
+        self._conn.execute("DELETE FROM session_paths")
+        for row, paths in rows.values():
+            self._insert(row, paths)
+
+    def verify(self):
+        """Compare the catalog against session files and archives on disk
+
+        Returns (missing, stale): stored sessions that are not catalogued
+        and catalog entries that point at nothing.
+        """
+        store = SessionStore(self.atlas_root)
+        on_disk = {
+            (session_id, location, offset)
+            for session_id, location, offset, _ in store.locations()
+        }
+        catalogued = {
+            (row["session_id"], row["location"], row["byte_offset"])
+            for row in self.conn.execute("SELECT session_id, location, byte_offset FROM sessions")
+        }
+        missing = sorted(entry[0] for entry in on_disk - catalogued)
+        stale = sorted(entry[0] for entry in catalogued - on_disk)
+        return missing, stale
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Session deltas
+Encodes a session as the changes from its parent session and rebuilds it again
+
+A delta record keeps session_id and timestamp in the clear plus a patch:
+  {"$delta": {"parent": "20250316_120000", "depth": 3},
+   "$patch": {"next_task": {"$set": "..."},
+              "git_info": {"$patch": {"recent_commits": {"$list": [["+", ["abc New"]], ["=", 0, 4]]}}}},
+   "$drop": ["mcp_available"]}
+
+Lists are patched as runs copied from the parent ("=", start, end) and new
+items ("+", [...]), so a prepended commit or one extra modified file costs a
+few bytes instead of the whole list. Multi-line strings (git status, short
+memory) are patched the same way, line by line ("$lines").
+"""
+
+import json
+from difflib import SequenceMatcher
+
+
+DELTA_KEY = "$delta"
+SET = "$set"
+PATCH = "$patch"
+DROP = "$drop"
+LIST = "$list"
+LINES = "$lines"
+
+# Kept in the clear on every record so file scans and archives can read them
+HEADER_FIELDS = ("session_id", "timestamp")
+
+
+def _size(value):
+    return len(json.dumps(value, ensure_ascii=False, separators=(',', ':')))
+
+
+def _key(item):
+    return item if isinstance(item, str) else json.dumps(item, sort_keys=True)
+
+
+def diff(old, new):
+    """The smallest operation turning `old` into `new`, or None if equal"""
+    if old == new:
+        return None
+    replace = {SET: new}
+    if isinstance(old, dict) and isinstance(new, dict):
+        candidate = diff_dict(old, new)
+    elif isinstance(old, list) and isinstance(new, list):
+        candidate = diff_list(old, new)
+    elif isinstance(old, str) and isinstance(new, str) and "\n" in old + new:
+        candidate = {LINES: diff_list(old.splitlines(True), new.splitlines(True))[LIST]}
+    else:
+        return replace
+    return candidate if _size(candidate) < _size(replace) else replace
+
+
+def diff_dict(old, new):
+    patch = {}
+    for key, value in new.items():
+        op = diff(old[key], value) if key in old else {SET: value}
+        if op is not None:
+            patch[key] = op
+    op = {PATCH: patch}
+    dropped = [key for key in old if key not in new]
+    if dropped:
+        op[DROP] = dropped
+    return op
+
+
+def diff_list(old, new):
+    ops = []
+    matcher = SequenceMatcher(None, [_key(item) for item in old], [_key(item) for item in new], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["=", i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append(["+", new[j1:j2]])
+    return {LIST: ops}
+
+
+def apply(old, op):
+    """Apply an operation produced by diff() to `old`"""
+    if SET in op:
+        return op[SET]
+    if LIST in op:
+        return _apply_list(old, op[LIST])
+    if LINES in op:
+        return "".join(_apply_list(old.splitlines(True), op[LINES]))
+    result = dict(old or {})
+    for key, sub in op.get(PATCH, {}).items():
+        result[key] = apply(result.get(key), sub)
+    for key in op.get(DROP, []):
+        result.pop(key, None)
+    return result
+
+
+def _apply_list(old, steps):
+    result = []
+    for step in steps:
+        if step[0] == "=":
+            result.extend(old[step[1]:step[2]])
+        else:
+            result.extend(step[1])
+    return result
+
+
+def encode(parent, session_data, parent_id, depth):
+    """Delta record for `session_data` relative to the full `parent`"""
+    body = {key: value for key, value in session_data.items() if key not in HEADER_FIELDS}
+    base = {key: value for key, value in parent.items() if key not in HEADER_FIELDS}
+    record = {key: session_data[key] for key in HEADER_FIELDS}
+    record[DELTA_KEY] = {"parent": parent_id, "depth": depth}
+    record.update(diff_dict(base, body))
+    return record
+
+
+def decode(parent, record):
+    """Rebuild a session from its full parent and its delta record"""
+    base = {key: value for key, value in parent.items() if key not in HEADER_FIELDS}
+    data = {key: record[key] for key in HEADER_FIELDS}
+    data.update(apply(base, record))
+    return data
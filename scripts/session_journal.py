@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Session journal
+An append-only file holding every session as a length-prefixed record, so a
+full listing is one sequential read and loading by ID is one seek
+
+Layout of sessions/journal.atlj:
+  header   MAGIC + offset of the newest index frame (0 until the first one)
+  frames   type (1 byte) + payload length + CRC-32 (4 bytes each) + payload
+
+Record frames ("R") hold one stored session as compact JSON. After every
+INDEX_EVERY records an index frame ("X") lists their IDs, offsets and
+lengths plus the offset of the previous index frame, and the header is
+pointed at it. Readers walk the index chain and scan only the records
+written since the last index. A torn frame at the end (a crash mid-append)
+fails its CRC and is cut off by the next append.
+"""
+
+import json
+import os
+import struct
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+from atlas_io import file_lock
+
+
+JOURNAL_FILE = "journal.atlj"
+
+MAGIC = b"ATLJ\x00\x01\r\n"
+HEADER = struct.Struct(">8sQ")
+FRAME = struct.Struct(">cII")
+
+RECORD = b"R"
+INDEX = b"X"
+
+# Records between index frames; also the most a reader ever scans
+INDEX_EVERY = 64
+
+
+def frame(kind, payload):
+    return FRAME.pack(kind, len(payload), zlib.crc32(payload)) + payload
+
+
+def free_id(base_id, taken):
+    """First of base_id, base_id_2, base_id_3, ... not in `taken`"""
+    session_id, attempt = base_id, 1
+    while session_id in taken:
+        attempt += 1
+        session_id = f"{base_id}_{attempt}"
+    return session_id
+
+
+class SessionJournal:
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def exists(self):
+        return self.path.exists()
+
+    # -- reading ----------------------------------------------------------
+
+    @staticmethod
+    def _last_index(f):
+        f.seek(0)
+        magic, offset = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"not a session journal: {f.name}")
+        return offset
+
+    @staticmethod
+    def _frames(f, start):
+        """Yield (type, payload offset, length, payload) until EOF or a torn frame"""
+        f.seek(start)
+        position = start
+        while True:
+            head = f.read(FRAME.size)
+            if len(head) < FRAME.size:
+                return
+            kind, length, crc = FRAME.unpack(head)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            yield kind, position + FRAME.size, length, payload
+            position += FRAME.size + length
+
+    def _read_frame(self, f, offset):
+        f.seek(offset)
+        kind, length, crc = FRAME.unpack(f.read(FRAME.size))
+        return kind, json.loads(f.read(length))
+
+    def _tail(self, f, last_index):
+        """Records after the newest index frame and where valid data ends
+
+        Returns ([(session_id, offset, length)], end offset).
+        """
+        if last_index:
+            f.seek(last_index)
+            start = last_index + FRAME.size + FRAME.unpack(f.read(FRAME.size))[1]
+        else:
+            start = HEADER.size
+        entries, end = [], start
+        for kind, offset, length, payload in self._frames(f, start):
+            if kind == RECORD:
+                entries.append((json.loads(payload)["session_id"], offset, length))
+            end = offset + length
+        return entries, end
+
+    def _index_chain(self, f, last_index, stop=None):
+        """Index frames newest first; `stop(entries)` ends the walk early"""
+        offset = last_index
+        while offset:
+            _, index = self._read_frame(f, offset)
+            yield index["entries"]
+            if stop and stop(index["entries"]):
+                return
+            offset = index["prev"]
+
+    def entries(self):
+        """[(session_id, offset, length)] for every record, oldest first"""
+        if not self.exists():
+            return []
+        with open(self.path, 'rb') as f:
+            last_index = self._last_index(f)
+            chunks = list(self._index_chain(f, last_index))
+            tail, _ = self._tail(f, last_index)
+        entries = [tuple(entry) for chunk in reversed(chunks) for entry in chunk]
+        return entries + tail
+
+    def scan(self):
+        """Yield (session_id, offset, length, stored) in one sequential read"""
+        if not self.exists():
+            return
+        with open(self.path, 'rb') as f:
+            self._last_index(f)
+            for kind, offset, length, payload in self._frames(f, HEADER.size):
+                if kind == RECORD:
+                    stored = json.loads(payload)
+                    yield stored["session_id"], offset, length, stored
+
+    def read(self, offset, length):
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    # -- writing ----------------------------------------------------------
+
+    def append(self, records, fsync=False):
+        """Append stored sessions; returns [(session_id, offset, length)]
+
+        IDs already used by recent records get a numeric suffix, the same
+        way colliding session files do, and each record is updated to the ID
+        it was written under.
+        """
+        written = []
+        with self.locked() as f:
+            last_index = self._last_index(f)
+            tail, end = self._tail(f, last_index)
+            if end != os.fstat(f.fileno()).st_size:
+                # Drop a torn frame left by an interrupted append
+                f.truncate(end)
+            taken = self._recent_ids(f, last_index, tail, min(r["session_id"] for r in records))
+            f.seek(end)
+            for stored in records:
+                stored["session_id"] = free_id(stored["session_id"], taken)
+                taken.add(stored["session_id"])
+                payload = json.dumps(stored, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                f.write(frame(RECORD, payload))
+                written.append((stored["session_id"], end + FRAME.size, len(payload)))
+                end += FRAME.size + len(payload)
+            tail += written
+            if len(tail) >= INDEX_EVERY:
+                payload = json.dumps({"prev": last_index, "entries": tail}).encode('utf-8')
+                f.write(frame(INDEX, payload))
+                f.flush()
+                os.fsync(f.fileno())
+                # The header only ever points at a complete, synced index
+                f.seek(0)
+                f.write(HEADER.pack(MAGIC, end))
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        return written
+
+    @contextmanager
+    def locked(self):
+        """Open the live journal under its lock, creating it if needed
+
+        Conversions and rewrites replace or remove the file while holding
+        the lock, so after waiting this re-checks that the open file is
+        still the journal.
+        """
+        while True:
+            if not self.exists():
+                self._create()
+            try:
+                f = open(self.path, 'r+b')
+            except FileNotFoundError:
+                continue
+            with f, file_lock(f):
+                try:
+                    current = os.stat(self.path).st_ino == os.fstat(f.fileno()).st_ino
+                except FileNotFoundError:
+                    current = False
+                if current:
+                    yield f
+                    return
+
+    def _create(self):
+        """Create an empty journal; it only appears once its header is written"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(HEADER.pack(MAGIC, 0))
+        try:
+            os.link(tmp, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            tmp.unlink()
+
+    def _recent_ids(self, f, last_index, tail, since):
+        """IDs that could collide with `since` or later
+
+        Session IDs start with their save time (YYYYMMDD_HHMMSS) and the
+        journal is in save order, so the walk stops at the first index frame
+        that ends before that second.
+        """
+        second = since[:15]
+        taken = {session_id for session_id, _, _ in tail}
+        for chunk in self._index_chain(f, last_index,
+                                       stop=lambda entries: max(e[0] for e in entries) < second):
+            taken.update(entry[0] for entry in chunk)
+        return taken
+
+    @classmethod
+    def write_all(cls, path, records):
+        """Write a fresh journal holding `records` with a single index
+
+        Used by conversions and rewrites; the caller replaces the live
+        journal with it. Returns [(session_id, offset, length)].
+        """
+        written = []
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, 0))
+            end = HEADER.size
+            for stored in records:
+                payload = json.dumps(stored, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                f.write(frame(RECORD, payload))
+                written.append((stored["session_id"], end + FRAME.size, len(payload)))
+                end += FRAME.size + len(payload)
+            if written:
+                payload = json.dumps({"prev": 0, "entries": written}).encode('utf-8')
+                f.write(frame(INDEX, payload))
+                f.seek(0)
+                f.write(HEADER.pack(MAGIC, end))
+            f.flush()
+            os.fsync(f.fileno())
+        return written
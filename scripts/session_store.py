@@ -0,0 +1,673 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Session Store
+Reads and writes session files, keeping bulky rarely-changing fields in a
+content-addressed blob store so each session only holds a hash reference.
+In delta mode a session stores only its changes from the previous session on
+its branch, with a full keyframe every few saves.
+
+Sessions live either one file per session (the "files" backend) or as records
+in a single append-only journal ("journal", see session_journal.py), chosen
+with ATLAS_STORAGE. Readers handle both, so a tree can be converted in place.
+Old sessions can be compacted into monthly archive segments and, past the
+retention period, folded into monthly digests.
+"""
+
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+import session_delta
+from atlas_io import atomic_write_text, env_flag, file_lock
+from session_delta import DELTA_KEY
+from session_journal import JOURNAL_FILE, SessionJournal
+
+
+# Session fields that are stored once per distinct value under sessions/blobs/
+BLOB_FIELDS = ("python_version", "git_info", "short_memory")
+
+BLOB_KEY = "$blob"
+
+# Values smaller than this are cheaper inline than as a 64-char hash reference
+BLOB_MIN_SIZE = 128
+
+
+BACKENDS = ("files", "journal")
+
+ARCHIVE_DIR = "archive"
+
+DIGEST_DIR = "digests"
+
+# Session fields a digest keeps; git status and memory snapshots are dropped
+DIGEST_FIELDS = ("session_id", "timestamp", "context", "next_task", "extended_context",
+                 "working_directory", "working_log")
+
+# Delta mode (ATLAS_DELTA=1): every KEYFRAME_INTERVAL-th session on a chain is
+# stored in full so rebuilding one never reads more than that many records
+KEYFRAME_INTERVAL = 10    # ATLAS_DELTA_KEYFRAME
+
+# Rebuilt sessions kept in memory while resolving delta chains
+SESSION_CACHE_SIZE = 64
+
+# Blobs kept in memory, least recently used dropped first
+BLOB_CACHE_SIZE = 128
+
+# Blobs touched more recently than this may belong to a save still in flight
+BLOB_GRACE_SECONDS = 3600
+
+LATEST_FILE = "LATEST.json"
+
+
+def is_blob_ref(value):
+    return isinstance(value, dict) and len(value) == 1 and BLOB_KEY in value
+
+
+class SessionStore:
+    def __init__(self, atlas_root, delta=None, backend=None):
+        self.atlas_root = Path(atlas_root)
+        self.sessions_dir = self.atlas_root / "sessions"
+        self.blobs_dir = self.sessions_dir / "blobs"
+        self.archive_dir = self.sessions_dir / ARCHIVE_DIR
+        self.journal = SessionJournal(self.sessions_dir / JOURNAL_FILE)
+        self.backend = backend or os.getenv("ATLAS_STORAGE", "files")
+        if self.backend not in BACKENDS:
+            raise ValueError(f"unknown session storage {self.backend!r} (expected one of {', '.join(BACKENDS)})")
+        self.delta = env_flag("ATLAS_DELTA") if delta is None else delta
+        self.keyframe_interval = int(os.getenv("ATLAS_DELTA_KEYFRAME", KEYFRAME_INTERVAL))
+        self._blob_cache = OrderedDict()
+        self._session_cache = {}
+        self._located = None
+
+    # -- blobs ------------------------------------------------------------
+
+    def blob_path(self, digest):
+        return self.blobs_dir / digest[:2] / f"{digest[2:]}.json"
+
+    @staticmethod
+    def canonical(value):
+        return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+
+    def put_blob(self, value):
+        """Store a JSON value once, keyed by the SHA-256 of its canonical form"""
+        data = self.canonical(value)
+        digest = hashlib.sha256(data.encode('utf-8')).hexdigest()
+        path = self.blob_path(digest)
+        if path.exists():
+            # Fresh mtime keeps prune_blobs() away while the session is written
+            os.utime(path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp.write_text(data, encoding='utf-8')
+            os.replace(tmp, path)
+        self._cache_blob(digest, value)
+        return {BLOB_KEY: digest}
+
+    def get_blob(self, digest):
+        if digest in self._blob_cache:
+            self._blob_cache.move_to_end(digest)
+            return self._blob_cache[digest]
+        with open(self.blob_path(digest), 'r', encoding='utf-8') as f:
+            value = json.load(f)
+        self._cache_blob(digest, value)
+        return value
+
+    def _cache_blob(self, digest, value):
+        self._blob_cache[digest] = value
+        self._blob_cache.move_to_end(digest)
+        while len(self._blob_cache) > BLOB_CACHE_SIZE:
+            self._blob_cache.popitem(last=False)
+
+    # -- session records --------------------------------------------------
+
+    def pack(self, session_data):
+        """Replace bulky fields with blob references"""
+        packed = dict(session_data)
+        for field in BLOB_FIELDS:
+            value = packed.get(field)
+            if value is None or is_blob_ref(value):
+                continue
+            if len(self.canonical(value)) >= BLOB_MIN_SIZE:
+                packed[field] = self.put_blob(value)
+        return packed
+
+    def unpack(self, stored):
+        """Resolve blob references back into full session data"""
+        data = dict(stored)
+        for field, value in stored.items():
+            if is_blob_ref(value):
+                data[field] = self.get_blob(value[BLOB_KEY])
+        return data
+
+    def encode_delta(self, session_data, parent_id):
+        """Delta record against `parent_id`, or None if a keyframe is due
+
+        Changed short memory and similar bulky values still go to the blob
+        store; everything else is patched field by field.
+        """
+        try:
+            stored = self.read_located(parent_id)
+            parent = self.resolve(stored)
+        except (KeyError, TypeError, ValueError, EOFError, OSError):
+            return None
+        depth = stored[DELTA_KEY]["depth"] + 1 if DELTA_KEY in stored else 1
+        # A digest no longer holds the full parent, so start a new chain
+        if depth >= self.keyframe_interval or "digest" in stored:
+            return None
+        record = session_delta.encode(parent, session_data, parent_id, depth)
+        for field in BLOB_FIELDS:
+            op = record[session_delta.PATCH].get(field)
+            if op and session_delta.SET in op and op[session_delta.SET] is not None \
+                    and len(self.canonical(op[session_delta.SET])) >= BLOB_MIN_SIZE:
+                op[session_delta.SET] = self.put_blob(op[session_delta.SET])
+        return record
+
+    def write(self, session_data, fsync=False, parent=None):
+        """Store a new session; returns its (location, offset, length)
+
+        With the files backend the session is written to a temporary name
+        and hard-linked into place, which fails instead of overwriting if
+        another save already claimed the ID; offset and length are None.
+        With the journal backend it is appended as one record. Either way
+        colliding saves get a numeric suffix (20250316_143022_2, ...) and
+        session_data["session_id"] is updated to the ID actually used.
+        In delta mode, a `parent` session ID makes this a delta record.
+        """
+        packed = None
+        if self.delta and parent:
+            packed = self.encode_delta(session_data, parent)
+        if packed is None:
+            packed = self.pack(session_data)
+        if self.backend == "journal":
+            [(session_id, offset, length)] = self.journal.append([packed], fsync=fsync)
+            session_data["session_id"] = session_id
+            return JOURNAL_FILE, offset, length
+        base_id = session_data["session_id"]
+        tmp = self.sessions_dir / f".Session_{base_id}.{os.getpid()}.tmp"
+        try:
+            for attempt in itertools.count(1):
+                session_id = base_id if attempt == 1 else f"{base_id}_{attempt}"
+                packed["session_id"] = session_id
+                session_file = self.sessions_dir / f"Session_{session_id}.json"
+                self.write_file(tmp, packed, fsync=fsync)
+                if self._claim(tmp, session_file):
+                    break
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        session_data["session_id"] = session_id
+        return session_file.name, None, None
+
+    @staticmethod
+    def _claim(tmp, path):
+        """Move tmp to path unless path exists; returns False on collision"""
+        try:
+            os.link(tmp, path)
+            return True
+        except FileExistsError:
+            return False
+        except OSError:
+            # Filesystems without hard links: exclusive create instead
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+            except FileExistsError:
+                return False
+            with os.fdopen(fd, 'wb') as f, open(tmp, 'rb') as src:
+                f.write(src.read())
+            return True
+
+    def set_latest(self, session_data, location, offset=None, length=None):
+        """Point LATEST.json at a session unless a newer one is already there
+
+        LATEST.json is a small pointer rather than a second copy of the
+        session. Callers should hold the sessions lock.
+        """
+        current = self.read_latest_pointer()
+        if current and current.get("timestamp", "") > session_data["timestamp"]:
+            return
+        pointer = {
+            "latest": session_data["session_id"],
+            "timestamp": session_data["timestamp"],
+            "location": location,
+        }
+        if offset is not None:
+            pointer.update(offset=offset, length=length)
+        atomic_write_text(self.sessions_dir / LATEST_FILE, json.dumps(pointer, indent=2))
+
+    def read_latest_pointer(self):
+        """Return the LATEST.json contents (a pointer or a legacy full copy)"""
+        try:
+            with open(self.sessions_dir / LATEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def write_file(path, stored, fsync=False):
+        # Delta records are only read back through the store; keep them compact
+        indent = None if DELTA_KEY in stored else 2
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(stored, f, indent=indent, ensure_ascii=False)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def read_file(self, path):
+        """Load a session file, resolving any blob references and deltas"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return self.resolve(json.load(f))
+
+    def resolve(self, stored):
+        """Full session data from a stored record"""
+        if DELTA_KEY not in stored:
+            return self.unpack(stored)
+        parent = self.read_session(stored[DELTA_KEY]["parent"])
+        return self.unpack(session_delta.decode(parent, stored))
+
+    def locate(self, session_id):
+        """(location, offset, length) of a stored session; KeyError if unknown
+
+        Loose files are checked directly; anything else is found through the
+        journal, archive and digest indexes, read again only when a session
+        is not in the copy already loaded.
+        """
+        name = f"Session_{session_id}.json"
+        if (self.sessions_dir / name).exists():
+            return name, None, None
+        if self._located is None or session_id not in self._located:
+            self._located = {
+                sid: (location, offset, length)
+                for sid, location, offset, length in self.locations() if offset is not None
+            }
+        return self._located[session_id]
+
+    def read_located(self, session_id):
+        """Load a session record as stored, found through locate()
+
+        Locations are cached for the life of the store (the daemon's), while
+        retention, compaction and conversions in other processes move
+        records. A record that is gone, unreadable or not the one asked for
+        means the cache is stale, so it is dropped and the lookup repeated.
+        """
+        for attempt in (1, 2):
+            try:
+                stored = self.read_stored(*self.locate(session_id))
+                if stored.get("session_id", session_id) == session_id:
+                    return stored
+            except (KeyError, ValueError, EOFError, OSError, zlib.error):
+                if attempt == 2:
+                    raise
+            self._located = None
+        raise KeyError(session_id)
+
+    def read_session(self, session_id):
+        """Load a session by ID, caching it for the delta chains built on it"""
+        if session_id not in self._session_cache:
+            if len(self._session_cache) >= SESSION_CACHE_SIZE:
+                del self._session_cache[next(iter(self._session_cache))]
+            self._session_cache[session_id] = self.resolve(self.read_located(session_id))
+        return self._session_cache[session_id]
+
+    def read_raw(self, location, offset=None, length=None):
+        """The bytes a session record is stored as
+
+        `location` is relative to sessions/. Journal, archive and digest
+        records are addressed by byte offset and length, so only that one
+        record is read.
+        """
+        with open(self.sessions_dir / location, 'rb') as f:
+            if offset is None:
+                return f.read()
+            f.seek(offset)
+            return f.read(length)
+
+    def read_stored(self, location, offset=None, length=None):
+        """Load a session record as stored, without resolving blobs"""
+        data = self.read_raw(location, offset, length)
+        if location.endswith(".gz"):
+            return json.loads(gzip.decompress(data))
+        return json.loads(data)
+
+    def read(self, location, offset=None, length=None):
+        """Load a session from a file, archive segment or digest"""
+        return self.resolve(self.read_stored(location, offset, length))
+
+    def locations(self):
+        """Yield (session_id, location, offset, length) for every stored session
+
+        Only file names and archive indexes are read, never session bodies;
+        digests are small and scanned line by line. A session found in more
+        than one place (after an interrupted retention run) is yielded once
+        per place, digests last.
+        """
+        for path in self.sessions_dir.glob("Session_*.json"):
+            yield path.stem[len("Session_"):], path.name, None, None
+        for session_id, offset, length in self.journal.entries():
+            yield session_id, JOURNAL_FILE, offset, length
+        for month in self.archive_months():
+            segment = f"{ARCHIVE_DIR}/{month}.jsonl.gz"
+            for session_id, offset, length in self.archive_entries(month):
+                yield session_id, segment, offset, length
+        for month in self.digest_months():
+            location = f"{DIGEST_DIR}/{month}.jsonl"
+            for session_id, (offset, length) in self.digest_entries(month).items():
+                yield session_id, location, offset, length
+
+    def records(self):
+        """Yield (session_id, location, offset, length, stored) for every session
+
+        Like locations() but with each stored record; the journal is read
+        in one sequential pass instead of one seek per session.
+        """
+        for session_id, location, offset, length in self.locations():
+            if location == JOURNAL_FILE:
+                continue
+            try:
+                stored = self.read_stored(location, offset, length)
+            except (json.JSONDecodeError, EOFError, OSError):
+                continue
+            yield session_id, location, offset, length, stored
+        for session_id, offset, length, stored in self.journal.scan():
+            yield session_id, JOURNAL_FILE, offset, length, stored
+
+    def archive_months(self):
+        if not self.archive_dir.exists():
+            return []
+        return sorted(index.name[:-len(".idx.jsonl")] for index in self.archive_dir.glob("*.idx.jsonl"))
+
+    def archive_entries(self, month):
+        """[(session_id, offset, length)] from one archive segment's index"""
+        entries = []
+        with open(self.archive_dir / f"{month}.idx.jsonl", 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write from an interrupted compaction
+                    continue
+                entries.append((entry["session_id"], entry["offset"], entry["length"]))
+        return entries
+
+    def archive(self, month, session_files):
+        """Append session files to the monthly archive segment for `month`
+
+        Each record is its own gzip member, so a reader can seek straight to
+        it and decompress just that record. The offset index is written next
+        to the segment. Returns [(session_id, location, offset, length)];
+        deleting the original files is left to the caller once the catalog
+        points at the archive.
+        """
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        segment = self.archive_dir / f"{month}.jsonl.gz"
+        index = self.archive_dir / f"{month}.idx.jsonl"
+        location = f"{ARCHIVE_DIR}/{segment.name}"
+        archived = []
+        with open(segment, 'ab') as seg, open(index, 'a', encoding='utf-8') as idx:
+            with file_lock(seg):
+                seg.seek(0, os.SEEK_END)
+                for path in session_files:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        stored = json.load(f)
+                    if DELTA_KEY in stored:
+                        # Archives hold full records, so chains never span them
+                        stored = self.pack(self.resolve(stored))
+                    line = json.dumps(stored, ensure_ascii=False, separators=(',', ':')) + "\n"
+                    member = gzip.compress(line.encode('utf-8'), mtime=0)
+                    offset = seg.tell()
+                    seg.write(member)
+                    archived.append((stored["session_id"], location, offset, len(member)))
+                seg.flush()
+                os.fsync(seg.fileno())
+                for session_id, _, offset, length in archived:
+                    idx.write(json.dumps({"session_id": session_id, "offset": offset, "length": length}) + "\n")
+                idx.flush()
+                os.fsync(idx.fileno())
+        return archived
+
+    def rewrite_archive(self, month, drop_ids):
+        """Remove sessions from an archive segment
+
+        The remaining records are copied, still compressed, into a new
+        segment that replaces the old one. Returns their new
+        [(session_id, location, offset, length)]; the segment and its index
+        are deleted when nothing remains. Callers should hold the sessions
+        lock and update the catalog straight away.
+        """
+        segment = self.archive_dir / f"{month}.jsonl.gz"
+        index = self.archive_dir / f"{month}.idx.jsonl"
+        location = f"{ARCHIVE_DIR}/{segment.name}"
+        keep = [entry for entry in self.archive_entries(month) if entry[0] not in drop_ids]
+        if not keep:
+            segment.unlink(missing_ok=True)
+            index.unlink(missing_ok=True)
+            return []
+        moved = []
+        seg_tmp = segment.with_name(f".{segment.name}.{os.getpid()}.tmp")
+        idx_tmp = index.with_name(f".{index.name}.{os.getpid()}.tmp")
+        with open(segment, 'rb') as src, open(seg_tmp, 'wb') as seg, open(idx_tmp, 'w', encoding='utf-8') as idx:
+            for session_id, offset, length in keep:
+                src.seek(offset)
+                moved.append((session_id, location, seg.tell(), length))
+                seg.write(src.read(length))
+                idx.write(json.dumps({"session_id": session_id, "offset": moved[-1][2], "length": length}) + "\n")
+            seg.flush()
+            os.fsync(seg.fileno())
+            idx.flush()
+            os.fsync(idx.fileno())
+        os.replace(seg_tmp, segment)
+        os.replace(idx_tmp, index)
+        return moved
+
+    # -- journal ----------------------------------------------------------
+
+    def _replace_journal(self, records):
+        """Swap in a journal holding `records`; call with the journal locked"""
+        if not records:
+            self.journal.path.unlink(missing_ok=True)
+            return []
+        tmp = self.journal.path.with_name(f".{JOURNAL_FILE}.{os.getpid()}.tmp")
+        written = SessionJournal.write_all(tmp, records)
+        os.replace(tmp, self.journal.path)
+        self._located = None
+        return [(session_id, JOURNAL_FILE, offset, length) for session_id, offset, length in written]
+
+    def rewrite_journal(self, drop_ids):
+        """Remove sessions from the journal
+
+        Kept delta records whose parent is dropped are stored in full.
+        Returns the new [(session_id, location, offset, length)] of the rest;
+        callers should hold the sessions lock and update the catalog.
+        """
+        with self.journal.locked():
+            kept = []
+            for session_id, _, _, stored in self.journal.scan():
+                if session_id in drop_ids:
+                    continue
+                if DELTA_KEY in stored and stored[DELTA_KEY]["parent"] in drop_ids:
+                    stored = self.pack(self.resolve(stored))
+                kept.append(stored)
+            return self._replace_journal(kept)
+
+    def convert(self, backend):
+        """Move every loose or journal session into `backend`
+
+        Archives and digests are left alone. Returns the moved sessions'
+        [(session_id, location, offset, length)]; callers should hold the
+        sessions lock and update the catalog.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown session storage {backend!r}")
+        with self.journal.locked():
+            if backend == "journal":
+                files = sorted(self.sessions_dir.glob("Session_*.json"))
+                records = [stored for _, _, _, stored in self.journal.scan()]
+                for path in files:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        records.append(json.load(f))
+                # Save order, which the journal's ID collision check relies on
+                records.sort(key=lambda stored: (stored["timestamp"], stored["session_id"]))
+                moves = self._replace_journal(records)
+                for path in files:
+                    path.unlink()
+                return moves
+            moves = []
+            for session_id, _, _, stored in self.journal.scan():
+                path = self.sessions_dir / f"Session_{session_id}.json"
+                tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+                self.write_file(tmp, stored)
+                os.replace(tmp, path)
+                moves.append((session_id, path.name, None, None))
+            self.journal.path.unlink(missing_ok=True)
+            self._located = None
+            return moves
+
+    # -- digests ----------------------------------------------------------
+
+    @staticmethod
+    def digest_record(session_data):
+        """Reduce full session data to what a monthly digest keeps
+
+        Context, next task, extended context (decisions) and touched files
+        survive; git status details, short memory and environment snapshots
+        do not. The result still reads like a session.
+        """
+        record = {field: session_data[field] for field in DIGEST_FIELDS if field in session_data}
+        git_info = session_data.get("git_info") or {}
+        record["git_info"] = {
+            "branch": git_info.get("branch"),
+            "modified_files": git_info.get("modified_files") or [],
+            "staged_files": git_info.get("staged_files") or [],
+        }
+        meta = session_data.get("session_metadata") or {}
+        record["session_metadata"] = {"user": meta.get("user")}
+        record["digest"] = session_data["timestamp"][:7]
+        return record
+
+    def digest_months(self):
+        digest_dir = self.sessions_dir / DIGEST_DIR
+        if not digest_dir.exists():
+            return []
+        return sorted(path.name[:-len(".jsonl")] for path in digest_dir.glob("*.jsonl"))
+
+    def digest_entries(self, month):
+        """{session_id: (offset, length)} for the records in one digest"""
+        entries = {}
+        path = self.sessions_dir / DIGEST_DIR / f"{month}.jsonl"
+        offset = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    entries[json.loads(line)["session_id"]] = (offset, len(line))
+                except (json.JSONDecodeError, KeyError):
+                    # Torn write from an interrupted retention run
+                    pass
+                offset += len(line)
+        return entries
+
+    def digest(self, month, sessions):
+        """Append digest records for full session data to `month`'s digest
+
+        Sessions already in the digest are not written again. Returns
+        [(session_id, location, offset, length)] for every session given;
+        removing the originals is left to the caller once the catalog
+        points at the digest.
+        """
+        digest_dir = self.sessions_dir / DIGEST_DIR
+        digest_dir.mkdir(parents=True, exist_ok=True)
+        path = digest_dir / f"{month}.jsonl"
+        location = f"{DIGEST_DIR}/{path.name}"
+        digested = []
+        with open(path, 'ab') as f:
+            with file_lock(f):
+                existing = self.digest_entries(month)
+                f.seek(0, os.SEEK_END)
+                for session_data in sessions:
+                    session_id = session_data["session_id"]
+                    if session_id in existing:
+                        digested.append((session_id, location) + existing[session_id])
+                        continue
+                    line = (json.dumps(self.digest_record(session_data), ensure_ascii=False,
+                                       separators=(',', ':')) + "\n").encode('utf-8')
+                    offset = f.tell()
+                    f.write(line)
+                    existing[session_id] = (offset, len(line))
+                    digested.append((session_id, location, offset, len(line)))
+                f.flush()
+                os.fsync(f.fileno())
+        return digested
+
+    def rebase(self, session_ids):
+        """Store loose delta sessions in full if their parent is in `session_ids`
+
+        Run before removing full copies of those sessions (retention), while
+        the parents can still be read. Returns the number of files rewritten.
+        """
+        rewritten = 0
+        for path in self.sessions_dir.glob("Session_*.json"):
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if DELTA_KEY not in stored or stored["session_id"] in session_ids \
+                    or stored[DELTA_KEY]["parent"] not in session_ids:
+                continue
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            self.write_file(tmp, self.pack(self.resolve(stored)))
+            os.replace(tmp, path)
+            rewritten += 1
+        return rewritten
+
+    def prune_blobs(self):
+        """Delete blobs no stored session refers to any more
+
+        Returns (count, bytes) removed. Blobs touched within
+        BLOB_GRACE_SECONDS are kept for saves that are still being written.
+        """
+        if not self.blobs_dir.exists():
+            return 0, 0
+        # A legacy LATEST.json copy can hold references too
+        referenced = {value[BLOB_KEY] for value in (self.read_latest_pointer() or {}).values()
+                      if is_blob_ref(value)}
+        for _, location, offset, length in self.locations():
+            if location.startswith(f"{DIGEST_DIR}/"):
+                continue
+            try:
+                stored = self.read_stored(location, offset, length)
+            except (json.JSONDecodeError, EOFError, OSError):
+                continue
+            referenced.update(value[BLOB_KEY] for value in stored.values() if is_blob_ref(value))
+            # Delta records replace bulky fields with blob references too
+            for op in stored.get(session_delta.PATCH, {}).values():
+                if is_blob_ref(op.get(session_delta.SET)):
+                    referenced.add(op[session_delta.SET][BLOB_KEY])
+        cutoff = time.time() - BLOB_GRACE_SECONDS
+        removed = freed = 0
+        for path in self.blobs_dir.glob("*/*.json"):
+            digest = path.parent.name + path.stem
+            stat = path.stat()
+            if digest in referenced or stat.st_mtime > cutoff:
+                continue
+            path.unlink()
+            removed += 1
+            freed += stat.st_size
+        return removed, freed
+
+    def dedup_file(self, path):
+        """Move a legacy session file's bulky fields into the blob store
+
+        Returns the number of bytes saved (0 if already deduplicated).
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        packed = self.pack(stored)
+        if packed == stored:
+            return 0
+        before = path.stat().st_size
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        self.write_file(tmp, packed)
+        os.replace(tmp, path)
+        return before - path.stat().st_size
@@ -96,6 +96,7 @@ All ATLAS files are contained in the `.atlas/` directory to keep your project ro
     gitignore_additions = """
 # ATLAS Sessions and Memory
 .atlas/sessions/
+.atlas/index/
 .atlas/WORKING_LOG/*/*/*.md
 .atlas/SHORT_IMPORTANT_MEMORY.md
 .atlas/MEMORY/PERSONAL_DIARY/*/*/*.md
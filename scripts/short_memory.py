@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Short Memory
+Section-aware editing of SHORT_IMPORTANT_MEMORY.md that keeps the file
+bounded by moving old dated notes out to MEMORY/KNOWLEDGE_LOG
+"""
+
+import os
+import re
+from datetime import date, timedelta
+from pathlib import Path
+
+from atlas_io import append_entry, atomic_write_text
+
+
+NOTES_SECTION = "Critical Notes"
+
+# Eviction policy; each can be overridden with the matching ATLAS_MEMORY_* variable
+MAX_NOTES = 20        # ATLAS_MEMORY_MAX_NOTES: dated notes kept per section
+MAX_CHARS = 2000      # ATLAS_MEMORY_MAX_CHARS: size of a section's dated notes
+MAX_AGE_DAYS = 90     # ATLAS_MEMORY_MAX_AGE_DAYS: 0 keeps notes regardless of age
+
+DATED_NOTE = re.compile(r"^- (\d{4}-\d{2}-\d{2}): (.*)$")
+PLACEHOLDER = re.compile(r"^- \[(To be filled|Quick reminders[^\]]*)\]\s*$")
+
+
+class MemoryPolicy:
+    def __init__(self, max_notes=None, max_chars=None, max_age_days=None):
+        self.max_notes = max_notes if max_notes is not None else int(os.getenv("ATLAS_MEMORY_MAX_NOTES", MAX_NOTES))
+        self.max_chars = max_chars if max_chars is not None else int(os.getenv("ATLAS_MEMORY_MAX_CHARS", MAX_CHARS))
+        self.max_age_days = (max_age_days if max_age_days is not None
+                             else int(os.getenv("ATLAS_MEMORY_MAX_AGE_DAYS", MAX_AGE_DAYS)))
+
+
+class Section:
+    __slots__ = ("name", "lines")
+
+    def __init__(self, name, lines=None):
+        self.name = name
+        self.lines = lines if lines is not None else []
+
+    def dated_notes(self):
+        """Indexes of dated bullets, oldest first (ties keep file order)"""
+        dated = [(DATED_NOTE.match(line).group(1), i)
+                 for i, line in enumerate(self.lines) if DATED_NOTE.match(line)]
+        return [i for _, i in sorted(dated)]
+
+    def size(self):
+        """Characters taken by dated notes; fixed bullets cannot be evicted, so do not count"""
+        return sum(len(self.lines[i]) + 1 for i in self.dated_notes())
+
+
+class ShortMemory:
+    """SHORT_IMPORTANT_MEMORY.md as a title, ## sections and a footer
+
+    Only dated notes ("- 2025-03-16: ...") are ever evicted; hand-written
+    bullets such as project details are left alone.
+    """
+
+    def __init__(self, text):
+        # (section, line) of the note added by add_note, which enforce() keeps
+        self.added = None
+        self.preamble = []
+        self.sections = []
+        self.footer = []
+        current = None
+        for line in text.splitlines():
+            if line.startswith("## "):
+                current = Section(line[3:].strip())
+                self.sections.append(current)
+            elif current is None:
+                self.preamble.append(line)
+            else:
+                current.lines.append(line)
+        # The template ends with "---" and a "Last Updated" line after the last section
+        if self.sections:
+            last = self.sections[-1].lines
+            if "---" in last:
+                cut = len(last) - 1 - last[::-1].index("---")
+                self.footer = last[cut:]
+                del last[cut:]
+
+    @classmethod
+    def load(cls, path):
+        return cls(Path(path).read_text(encoding='utf-8'))
+
+    def section(self, name, create=False):
+        for section in self.sections:
+            if section.name == name:
+                return section
+        if not create:
+            return None
+        section = Section(name, [""])
+        self.sections.append(section)
+        return section
+
+    def add_note(self, text, section_name=NOTES_SECTION, today=None):
+        """Add a dated note; repeating an existing note refreshes its date instead"""
+        today = (today or date.today()).isoformat()
+        text = " ".join(str(text).split())
+        section = self.section(section_name, create=True)
+        section.lines = [
+            line for line in section.lines
+            if not PLACEHOLDER.match(line)
+            and not (DATED_NOTE.match(line) and DATED_NOTE.match(line).group(2) == text)
+        ]
+        bullets = [i for i, line in enumerate(section.lines) if line.startswith("- ")]
+        position = bullets[-1] + 1 if bullets else len(section.lines) - len(_trailing_blank(section.lines))
+        section.lines.insert(position, f"- {today}: {text}")
+        self.added = (section.name, f"- {today}: {text}")
+
+    def enforce(self, policy, today=None):
+        """Evict dated notes that break the policy; returns [(section, line, reason)]
+
+        The note just added by add_note() is never evicted.
+        """
+        today = today or date.today()
+        cutoff = (today - timedelta(days=policy.max_age_days)).isoformat() if policy.max_age_days > 0 else None
+        evicted = []
+        for section in self.sections:
+            gone = set()
+            order = section.dated_notes()
+            if cutoff:
+                for i in order:
+                    if DATED_NOTE.match(section.lines[i]).group(1) < cutoff:
+                        gone.add(i)
+                        evicted.append((section.name, section.lines[i], f"older than {policy.max_age_days} days"))
+            remaining = [i for i in order if i not in gone
+                         and (section.name, section.lines[i]) != self.added]
+            size = section.size() - sum(len(section.lines[i]) + 1 for i in gone)
+            # Least recently noted first: re-noting a line moves it to today
+            while remaining and (len(remaining) > policy.max_notes or size > policy.max_chars):
+                i = remaining.pop(0)
+                reason = (f"over {policy.max_notes} notes" if len(remaining) + 1 > policy.max_notes
+                          else f"section over {policy.max_chars} characters")
+                gone.add(i)
+                size -= len(section.lines[i]) + 1
+                evicted.append((section.name, section.lines[i], reason))
+            section.lines = [line for i, line in enumerate(section.lines) if i not in gone]
+        return evicted
+
+    def render(self):
+        lines = list(self.preamble)
+        for section in self.sections:
+            lines.append(f"## {section.name}")
+            lines.extend(section.lines)
+        if self.footer:
+            if lines and lines[-1].strip():
+                lines.append("")
+            lines.extend(self.footer)
+        return "\n".join(lines) + "\n"
+
+
+def _trailing_blank(lines):
+    count = 0
+    for line in reversed(lines):
+        if line.strip():
+            break
+        count += 1
+    return lines[len(lines) - count:]
+
+
+def archive_evicted(knowledge_dir, evicted, today=None):
+    """Append evicted notes to this month's file in MEMORY/KNOWLEDGE_LOG"""
+    if not evicted:
+        return None
+    today = today or date.today()
+    knowledge_dir = Path(knowledge_dir)
+    knowledge_dir.mkdir(parents=True, exist_ok=True)
+    path = knowledge_dir / f"short-memory-{today:%Y-%m}.md"
+    lines = [f"\n## Moved out of SHORT_IMPORTANT_MEMORY on {today.isoformat()}\n"]
+    for section, line, reason in evicted:
+        lines.append(f"{line} _({section}; {reason})_")
+    header = f"# Knowledge Log - Notes retired from short memory, {today:%B %Y}\n"
+    append_entry(path, "\n".join(lines) + "\n", header=header)
+    return path
+
+
+def update_memory_file(memory_file, knowledge_dir, note=None, policy=None, today=None, dry_run=False):
+    """Add an optional note, apply the eviction policy and rewrite the file
+
+    Evicted notes are archived before the memory file is replaced, so a crash
+    can at worst leave a note in both places. Returns the evicted notes.
+    """
+    memory = ShortMemory.load(memory_file)
+    if note:
+        memory.add_note(note, today=today)
+    evicted = memory.enforce(policy or MemoryPolicy(), today=today)
+    if not dry_run:
+        archive_evicted(knowledge_dir, evicted, today=today)
+        atomic_write_text(memory_file, memory.render())
+    return evicted
@@ -3,6 +3,8 @@
 Update ATLAS framework to latest version
 Pulls latest instructions and scripts from the ATLAS repository
 """
+import argparse
+import os
 import subprocess
 import shutil
 from pathlib import Path
@@ -10,9 +12,21 @@ from datetime import datetime
 import json
 import sys
 
+import atlas_timing
+from atlas_io import env_flag
+from atlas_timing import phase
+from atlas_mirror import available_mirror
+
+
+# Number of backups kept under .atlas/backups (override with ATLAS_BACKUP_KEEP)
+BACKUP_KEEP = 10
+
+# Lock files and in-flight temporary files are never part of a backup
+BACKUP_SKIP_SUFFIXES = (".lock", ".tmp")
+
 
 class AtlasUpdater:
-    def __init__(self):
+    def __init__(self, non_interactive=None):
         # Detect if we're running from within .atlas or from project root
         script_path = Path(__file__).resolve()
         if '.atlas' in script_path.parts:
@@ -24,13 +38,19 @@ class AtlasUpdater:
             self.project_root = Path.cwd()
             self.atlas_dir = self.project_root / ".atlas"
         
-        self.backup_dir = self.atlas_dir / "backups" / datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.backups_root = self.atlas_dir / "backups"
+        self.backup_dir = self.backups_root / datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.backup_keep = max(1, int(os.getenv("ATLAS_BACKUP_KEEP", BACKUP_KEEP)))
+        if non_interactive is None:
+            non_interactive = env_flag("ATLAS_NON_INTERACTIVE")
+        self.non_interactive = non_interactive
         
     def check_git_status(self):
         """Ensure the atlas directory is clean before updating"""
         try:
+            # Untracked files (sessions, logs, local memory) never block a pull
             result = subprocess.run(
-                ["git", "status", "--porcelain"],
+                ["git", "status", "--porcelain", "--untracked-files=no"],
                 cwd=self.atlas_dir,
                 capture_output=True,
                 text=True
@@ -38,6 +58,9 @@ class AtlasUpdater:
             if result.stdout.strip():
                 print("⚠️  Warning: You have uncommitted changes in .atlas/")
                 print("   Please commit or stash changes before updating.")
+                if self.non_interactive:
+                    print("   Refusing to update in non-interactive mode.")
+                    return False
                 response = input("   Continue anyway? (y/N): ")
                 return response.lower() == 'y'
             return True
@@ -45,10 +68,83 @@ class AtlasUpdater:
             print(f"❌ Error checking git status: {e}")
             return False
     
+    def create_backup_dir(self):
+        """Create a fresh backup directory, never reusing one from the same second"""
+        self.backups_root.mkdir(parents=True, exist_ok=True)
+        base = self.backup_dir.name
+        suffix = 1
+        while True:
+            try:
+                self.backup_dir.mkdir()
+                return
+            except FileExistsError:
+                suffix += 1
+                self.backup_dir = self.backups_root / f"{base}_{suffix}"
+
+    def existing_backups(self):
+        """Backup directories on disk, oldest first"""
+        if not self.backups_root.exists():
+            return []
+        return sorted((path for path in self.backups_root.iterdir() if path.is_dir()),
+                      key=self._backup_order)
+
+    @staticmethod
+    def _backup_order(path):
+        # 20250316_143022 < 20250316_143022_2 < ... < 20250316_143022_10
+        stamp, suffix = path.name[:15], path.name[16:]
+        return stamp, int(suffix) if suffix.isdigit() else 1
+
+    def snapshot_sessions(self, sessions_dir, dest, previous):
+        """Copy sessions/ into dest, hard-linking files unchanged since `previous`
+
+        A file with the same size and mtime as in the previous snapshot is
+        taken to be unchanged and shares that snapshot's inode; anything else
+        (new sessions, appended archive segments) is copied. Live files are
+        never linked, so later saves cannot alter a backup.
+        Returns (linked, copied).
+        """
+        linked = copied = 0
+        for dirpath, _, filenames in os.walk(sessions_dir):
+            rel = Path(dirpath).relative_to(sessions_dir)
+            (dest / rel).mkdir(parents=True, exist_ok=True)
+            for name in filenames:
+                if name.endswith(BACKUP_SKIP_SUFFIXES):
+                    continue
+                src = Path(dirpath) / name
+                dst = dest / rel / name
+                if previous is not None and self._unchanged(src, previous / rel / name):
+                    try:
+                        os.link(previous / rel / name, dst)
+                        linked += 1
+                        continue
+                    except OSError:
+                        pass  # Different filesystem or no hard links: copy instead
+                shutil.copy2(src, dst)
+                copied += 1
+        return linked, copied
+
+    @staticmethod
+    def _unchanged(src, old):
+        try:
+            a, b = src.stat(), old.stat()
+        except OSError:
+            return False
+        return a.st_size == b.st_size and a.st_mtime_ns == b.st_mtime_ns
+
+    def prune_backups(self):
+        """Delete the oldest backups beyond the retention limit"""
+        backups = self.existing_backups()
+        expired = backups[:-self.backup_keep]
+        for path in expired:
+            shutil.rmtree(path, ignore_errors=True)
+        if expired:
+            print(f"   🧹 Pruned {len(expired)} old backup(s), keeping {self.backup_keep}")
+
     def backup_customizations(self):
         """Backup any customized files before update"""
         print("\n📦 Backing up customizations...")
-        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        previous = [path for path in self.existing_backups() if (path / "sessions").is_dir()]
+        self.create_backup_dir()
         
         # Files that might have local customizations
         files_to_backup = [
@@ -63,27 +159,44 @@ class AtlasUpdater:
                 shutil.copy2(src, dst)
                 print(f"   ✅ Backed up {file}")
         
-        # Backup any session data
+        # Backup any session data, sharing unchanged files with the last backup
         sessions_dir = self.atlas_dir / "sessions"
         if sessions_dir.exists() and any(sessions_dir.iterdir()):
-            backup_sessions = self.backup_dir / "sessions"
-            shutil.copytree(sessions_dir, backup_sessions)
-            print("   ✅ Backed up session data")
+            base = previous[-1] / "sessions" if previous else None
+            linked, copied = self.snapshot_sessions(sessions_dir, self.backup_dir / "sessions", base)
+            print(f"   ✅ Backed up session data ({copied} copied, {linked} unchanged)")
+        
+        self.prune_backups()
+    
+    def update_source(self):
+        """Fetch from the local mirror when there is one, otherwise from origin"""
+        mirror = available_mirror()
+        if mirror:
+            print(f"   Using local mirror {mirror}")
+            return mirror.as_uri()
+        if env_flag("ATLAS_OFFLINE"):
+            return None
+        return "origin"
     
     def pull_latest(self):
         """Pull latest changes from ATLAS repository"""
         print("\n🔄 Pulling latest ATLAS updates...")
+        source = self.update_source()
+        if source is None:
+            print("   ❌ ATLAS_OFFLINE is set and there is no local mirror to update from.")
+            print("      Create one with: python .atlas/scripts/atlas_mirror.py refresh")
+            return False
         try:
             # First fetch to see what's new
             subprocess.run(
-                ["git", "fetch", "origin", "main"],
+                ["git", "fetch", source, "main"],
                 cwd=self.atlas_dir,
                 check=True
             )
             
             # Check what files will be updated
             result = subprocess.run(
-                ["git", "diff", "--name-only", "HEAD", "origin/main"],
+                ["git", "diff", "--name-only", "HEAD", "FETCH_HEAD"],
                 cwd=self.atlas_dir,
                 capture_output=True,
                 text=True
@@ -99,7 +212,7 @@ class AtlasUpdater:
             
             # Pull the changes
             subprocess.run(
-                ["git", "pull", "origin", "main"],
+                ["git", "merge", "FETCH_HEAD"],
                 cwd=self.atlas_dir,
                 check=True
             )
@@ -209,26 +322,34 @@ This project has additional specific instructions and context:
             return False
         
         # Check git status
-        if not self.check_git_status():
+        with phase("check_git_status"):
+            clean = self.check_git_status()
+        if not clean:
             return False
         
         # Backup customizations
-        self.backup_customizations()
+        with phase("backup_customizations"):
+            self.backup_customizations()
         
         # Pull latest changes
-        if not self.pull_latest():
+        with phase("pull_latest"):
+            pulled = self.pull_latest()
+        if not pulled:
             print("\n❌ Update failed. Your backups are in:")
             print(f"   {self.backup_dir}")
             return False
         
         # Update project files
-        self.update_project_claude_md()
+        with phase("update_project_claude_md"):
+            self.update_project_claude_md()
         
         # Restore customizations
-        self.restore_customizations()
+        with phase("restore_customizations"):
+            self.restore_customizations()
         
         # Show what's new
-        self.show_changelog()
+        with phase("show_changelog"):
+            self.show_changelog()
         
         print("\n✨ ATLAS update complete!")
         print(f"\nBackups saved to: {self.backup_dir}")
@@ -242,8 +363,30 @@ This project has additional specific instructions and context:
 
 def main():
     """Run the updater"""
-    updater = AtlasUpdater()
-    success = updater.run_update()
+    parser = argparse.ArgumentParser(
+        description="Update ATLAS framework to latest version",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python .atlas/scripts/update_atlas.py                    # Interactive update
+  python .atlas/scripts/update_atlas.py --non-interactive  # For scripts and fleet_atlas.py
+        """
+    )
+    parser.add_argument('--non-interactive', action='store_true', default=None,
+                       help='Never prompt; refuse to update a .atlas with uncommitted changes '
+                            '(or set ATLAS_NON_INTERACTIVE=1)')
+    parser.add_argument('--timings', action='store_true', default=None,
+                       help='Print per-phase durations and append them to the metrics file (or set ATLAS_TIMINGS=1)')
+
+    args = parser.parse_args()
+
+    atlas_timing.start("update", args.timings)
+    updater = AtlasUpdater(non_interactive=args.non_interactive)
+    try:
+        success = updater.run_update()
+    finally:
+        if updater.atlas_dir.exists():
+            atlas_timing.finish(updater.atlas_dir)
     sys.exit(0 if success else 1)
 
 
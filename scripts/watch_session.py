@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Watch mode
+Watches the work tree and git HEAD and saves checkpoint sessions on its own,
+so history is captured even when nobody runs save_session.py
+
+Changes are noticed with inotify on Linux (through ctypes, no extra
+packages) and by polling `git status` elsewhere, or when the tree has more
+directories than ATLAS_WATCH_MAX_DIRS. Bursts of changes are debounced, git
+is asked at most once per ATLAS_WATCH_POLL seconds, and a checkpoint is only
+saved when the git snapshot actually changed, at most once per
+ATLAS_WATCH_MIN_INTERVAL seconds.
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import signal
+import sqlite3
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from save_session import AtlasSessionSaver
+
+
+# Quiet time after the last change before a checkpoint (ATLAS_WATCH_DEBOUNCE)
+DEBOUNCE = 10.0
+# Longest a steady stream of changes can hold a checkpoint back (ATLAS_WATCH_MAX_DELAY)
+MAX_DELAY = 120.0
+# Minimum seconds between checkpoints (ATLAS_WATCH_MIN_INTERVAL)
+MIN_INTERVAL = 300.0
+# Minimum seconds between git queries, and the polling period (ATLAS_WATCH_POLL)
+POLL_INTERVAL = 30.0
+# Directories inotify may watch before falling back to polling (ATLAS_WATCH_MAX_DIRS)
+MAX_DIRS = 4096
+
+# Never worth watching, whatever .gitignore says
+SKIP_DIRS = frozenset({".git", ".atlas", ".hg", ".svn", "node_modules", "__pycache__",
+                       ".venv", "venv", ".tox", ".mypy_cache", ".pytest_cache"})
+
+CHECKPOINT_PREFIX = "Auto-checkpoint"
+
+# <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+TREE_EVENTS = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+# HEAD is replaced by rename on checkout; logs/HEAD is appended on every commit
+GIT_EVENTS = IN_MOVED_TO | IN_CLOSE_WRITE | IN_MODIFY
+GIT_NAMES = (b"HEAD",)
+
+EVENT = struct.Struct("iIII")
+
+
+def git_lines(args, cwd, timeout):
+    """NUL-separated output of a git command, or None if it fails"""
+    try:
+        result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return [item for item in result.stdout.decode('utf-8', errors='replace').split('\0') if item]
+
+
+class InotifyWatcher:
+    """Directory watches over the work tree plus git's HEAD files"""
+
+    # Changes are reported as they happen, before git has been asked about them
+    probes_git = False
+
+    def __init__(self, root, git_dir, ignored=(), max_dirs=MAX_DIRS):
+        libc_name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(libc_name or "libc.so.6", use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.root = Path(root)
+        self.ignored = {Path(root) / path for path in ignored}
+        self.max_dirs = max_dirs
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.tree_dirs = {}   # watch descriptor -> directory
+        self.git_dirs = set()
+        try:
+            self.add_tree(self.root)
+            for path in (Path(git_dir), Path(git_dir) / "logs"):
+                if path.is_dir():
+                    self.git_dirs.add(self._watch(path, GIT_EVENTS))
+        except OSError:
+            self.close()
+            raise
+
+    def _watch(self, path, mask):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask | IN_ONLYDIR)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"cannot watch {path}: {os.strerror(error)}")
+        return wd
+
+    def add_tree(self, top):
+        """Watch `top` and the directories below it, skipping ignored ones"""
+        pending = [Path(top)]
+        while pending:
+            path = pending.pop()
+            if len(self.tree_dirs) >= self.max_dirs:
+                raise OSError(errno.ENOSPC, f"more than {self.max_dirs} directories to watch")
+            try:
+                self.tree_dirs[self._watch(path, TREE_EVENTS)] = path
+                entries = list(os.scandir(path))
+            except (FileNotFoundError, NotADirectoryError):
+                # Removed before we got to it
+                continue
+            for entry in entries:
+                if (entry.is_dir(follow_symlinks=False) and entry.name not in SKIP_DIRS
+                        and Path(entry.path) not in self.ignored):
+                    pending.append(Path(entry.path))
+
+    def wait(self, timeout):
+        """Block up to `timeout` seconds; returns the kinds of change seen ("tree", "head")"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        kinds = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            kinds |= self._parse(data)
+        return kinds
+
+    def _parse(self, data):
+        kinds, position = set(), 0
+        while position < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, position)
+            name = data[position + EVENT.size:position + EVENT.size + length].rstrip(b"\0")
+            position += EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                kinds.add("tree")
+            elif wd in self.git_dirs:
+                if name in GIT_NAMES:
+                    kinds.add("head")
+            elif mask & IN_IGNORED:
+                self.tree_dirs.pop(wd, None)
+            elif wd in self.tree_dirs:
+                kinds.add("tree")
+                name = os.fsdecode(name)
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and name not in SKIP_DIRS:
+                    try:
+                        self.add_tree(self.tree_dirs[wd] / name)
+                    except OSError as e:
+                        # Still reported, just not watched below this point
+                        print(f"⚠️  Not watching inside {name}: {e.strerror or e}")
+        return kinds
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """Reports a change whenever `probe()` returns something new"""
+
+    # A reported change was seen by the probe, so that probe is already current
+    probes_git = True
+
+    def __init__(self, probe, interval=POLL_INTERVAL):
+        self.probe = probe
+        self.interval = interval
+        self.last = probe()
+        self.next_probe = time.monotonic() + interval
+
+    def wait(self, timeout):
+        time.sleep(max(min(timeout, self.next_probe - time.monotonic()), 0.0))
+        if time.monotonic() < self.next_probe:
+            return set()
+        self.next_probe = time.monotonic() + self.interval
+        current = self.probe()
+        if current == self.last:
+            return set()
+        self.last = current
+        return {"tree"}
+
+    def close(self):
+        pass
+
+
+def without_paths(git_info, prefix):
+    """git_info minus entries under `prefix`, such as the .atlas/ directory checkpoints write to"""
+    if not git_info or not prefix:
+        return git_info
+    return dict(
+        git_info,
+        modified_files=[path for path in git_info["modified_files"] if not path.startswith(prefix)],
+        staged_files=[path for path in git_info["staged_files"] if not path.startswith(prefix)],
+        status_summary="\n".join(line for line in (git_info.get("status_summary") or "").splitlines()
+                                 if not line[3:].startswith(prefix)),
+    )
+
+
+def fingerprint(git_info, root="."):
+    """What a checkpoint records; unchanged means there is nothing to save
+
+    Besides the git status, the newest modification time among modified
+    files counts, so further edits to an already-modified file are noticed.
+    """
+    if not git_info:
+        return None
+    commits = git_info.get("recent_commits") or [""]
+    newest = 0
+    for path in git_info["modified_files"]:
+        try:
+            newest = max(newest, os.stat(os.path.join(root, path)).st_mtime_ns)
+        except OSError:
+            pass
+    return (git_info.get("branch"), commits[0], git_info.get("status_summary"), newest)
+
+
+def describe(git_info, previous):
+    """One-line context for a checkpoint, e.g. "3 changed files (a.py, b.py, c.py)" """
+    parts = []
+    commits = git_info.get("recent_commits") or []
+    if commits and (previous is None or previous[1] != commits[0]):
+        parts.append(f"HEAD at {commits[0]}")
+    files = list(dict.fromkeys(git_info["modified_files"] + git_info["staged_files"]))
+    count = max(len(files), git_info.get("modified_count", 0), git_info.get("staged_count", 0))
+    if files:
+        shown = ", ".join(files[:3]) + (f" +{count - 3} more" if count > 3 else "")
+        parts.append(f"{count} changed file{'s' if count != 1 else ''} ({shown})")
+    untracked = [line[3:] for line in (git_info.get("status_summary") or "").splitlines()
+                 if line.startswith("?? ")]
+    if untracked:
+        shown = ", ".join(untracked[:3]) + (f" +{len(untracked) - 3} more" if len(untracked) > 3 else "")
+        parts.append(f"{len(untracked)} untracked ({shown})")
+    if not parts:
+        parts.append("clean work tree")
+    return f"{CHECKPOINT_PREFIX} on {git_info.get('branch') or 'no branch'}: " + "; ".join(parts)
+
+
+class SessionWatcher:
+    def __init__(self, saver=None, debounce=None, max_delay=None, min_interval=None,
+                 poll_interval=None, max_dirs=None, polling=False):
+        self.saver = saver or AtlasSessionSaver()
+        self.debounce = debounce if debounce is not None else float(os.getenv("ATLAS_WATCH_DEBOUNCE", DEBOUNCE))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv("ATLAS_WATCH_MAX_DELAY", MAX_DELAY))
+        self.min_interval = (min_interval if min_interval is not None
+                             else float(os.getenv("ATLAS_WATCH_MIN_INTERVAL", MIN_INTERVAL)))
+        self.poll_interval = (poll_interval if poll_interval is not None
+                              else float(os.getenv("ATLAS_WATCH_POLL", POLL_INTERVAL)))
+        self.max_dirs = max_dirs if max_dirs is not None else int(os.getenv("ATLAS_WATCH_MAX_DIRS", MAX_DIRS))
+        self.polling = polling
+        self.running = False
+        # Checkpoints change files under .atlas/; those must not trigger more
+        try:
+            self.own_prefix = self.saver.atlas_root.resolve().relative_to(
+                self.saver.project_root.resolve()).as_posix() + "/"
+        except ValueError:
+            self.own_prefix = None
+
+        # Checkpoints reuse the git snapshot that decided a save was needed
+        self._git_info = None
+        self._get_git_info = self.saver.get_git_info
+        self.saver.get_git_info = lambda: self._git_info
+        self.last_probe = self.last_save = float("-inf")
+        self.last_fingerprint = self.fingerprint(self.probe())
+
+    def open_watcher(self):
+        """inotify over the work tree if possible, polling git otherwise"""
+        root = self.saver.project_root
+        if not self.polling and sys.platform.startswith("linux"):
+            git_dir = git_lines(["rev-parse", "--absolute-git-dir"], root, self.saver.git_timeout)
+            if git_dir:
+                # One batched query for everything .gitignore excludes
+                ignored = git_lines(["ls-files", "-z", "--others", "--ignored", "--exclude-standard",
+                                     "--directory"], root, self.saver.git_timeout) or []
+                try:
+                    watcher = InotifyWatcher(root, git_dir[0].strip(),
+                                             [path.rstrip("/") for path in ignored if path.endswith("/")],
+                                             self.max_dirs)
+                    print(f"👀 Watching {len(watcher.tree_dirs)} directories with inotify")
+                    return watcher
+                except OSError as e:
+                    print(f"⚠️  inotify unavailable ({e.strerror or e}); polling git every "
+                          f"{self.poll_interval:g}s instead")
+        else:
+            print(f"👀 Polling git every {self.poll_interval:g}s")
+        return PollingWatcher(lambda: self.fingerprint(self.probe()), self.poll_interval)
+
+    def fingerprint(self, git_info):
+        return fingerprint(git_info, self.saver.project_root)
+
+    def probe(self):
+        self.last_probe = time.monotonic()
+        self._git_info = self._get_git_info()
+        return without_paths(self._git_info, self.own_prefix)
+
+    def due(self, first, last):
+        """When changes seen between `first` and `last` may be checkpointed"""
+        when = max(min(last + self.debounce, first + self.max_delay), self.last_save + self.min_interval)
+        if self.last_probe < last:
+            # The last git snapshot predates the changes; space out the queries
+            when = max(when, self.last_probe + self.poll_interval)
+        return when
+
+    def run(self):
+        watcher = self.open_watcher()
+        self.running = True
+        first = last = None
+        try:
+            while self.running:
+                timeout = self.poll_interval
+                if first is not None:
+                    timeout = max(self.due(first, last) - time.monotonic(), 0.0)
+                kinds = watcher.wait(timeout)
+                now = time.monotonic()
+                if kinds:
+                    # A polled change dates from the probe that found it
+                    last = self.last_probe if watcher.probes_git else now
+                    first = first if first is not None else last
+                elif first is not None and now >= self.due(first, last):
+                    self.checkpoint(fresh=self.last_probe >= last)
+                    first = last = None
+        finally:
+            watcher.close()
+
+    def checkpoint(self, fresh=False):
+        """Save a session if the git snapshot changed since the last one
+
+        `fresh` means the last probe already saw every pending change (as
+        when polling), so git is not asked again.
+        """
+        git_info = without_paths(self._git_info, self.own_prefix) if fresh else self.probe()
+        current = self.fingerprint(git_info)
+        if git_info is None or current == self.last_fingerprint:
+            return None
+        context = describe(git_info, self.last_fingerprint)
+        session_file, session_data = self.saver.save_session(context, self.next_task())
+        self.last_fingerprint = current
+        self.last_save = time.monotonic()
+        print(f"💾 {time.strftime('%H:%M:%S')} {session_data['session_id']}: {context}")
+        return session_data
+
+    def next_task(self):
+        """Checkpoints carry the last saved next task forward"""
+        try:
+            rows = self.saver.catalog.latest(1)
+        except sqlite3.Error:
+            rows = []
+        if rows and rows[0]["next_task"]:
+            return rows[0]["next_task"]
+        return "Continue development"
+
+    def stop(self, *_):
+        self.running = False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Atlas Session Manager - Save checkpoint sessions automatically",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python watch_session.py                       # Watch until Ctrl-C
+  python watch_session.py --min-interval 600    # At most one checkpoint per 10 minutes
+  python watch_session.py --poll                # Poll git instead of using inotify
+  nohup python watch_session.py >> .atlas/index/watch.log 2>&1 &
+        """
+    )
+    parser.add_argument('--debounce', type=float,
+                       help=f'Seconds of quiet before a checkpoint (default {DEBOUNCE:g})')
+    parser.add_argument('--max-delay', type=float,
+                       help=f'Checkpoint after this long even if changes continue (default {MAX_DELAY:g})')
+    parser.add_argument('--min-interval', type=float,
+                       help=f'Minimum seconds between checkpoints (default {MIN_INTERVAL:g})')
+    parser.add_argument('--poll-interval', type=float,
+                       help=f'Minimum seconds between git queries, and the polling period (default {POLL_INTERVAL:g})')
+    parser.add_argument('--max-dirs', type=int,
+                       help=f'Poll instead of using inotify past this many directories (default {MAX_DIRS})')
+    parser.add_argument('--poll', action='store_true',
+                       help='Poll git instead of using inotify')
+    parser.add_argument('--large-repo', action='store_true', default=None,
+                       help='Skip untracked files in git queries (or set ATLAS_GIT_LARGE_REPO=1)')
+
+    args = parser.parse_args()
+
+    saver = AtlasSessionSaver(large_repo=args.large_repo)
+    # Checkpoints describe the project, wherever the watcher was started from
+    os.chdir(saver.project_root)
+    watcher = SessionWatcher(saver, args.debounce, args.max_delay, args.min_interval,
+                             args.poll_interval, args.max_dirs, args.poll)
+    if watcher.last_fingerprint is None:
+        print("❌ Watch mode needs a git work tree (git status failed)")
+        return 1
+    signal.signal(signal.SIGTERM, watcher.stop)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    print("👋 Stopped watching")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
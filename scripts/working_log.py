@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Atlas Session Manager - Working Log access
+Formats and reads single WORKING_LOG entries by byte offset and streams
+entries across day files without loading whole logs
+"""
+
+import re
+from pathlib import Path
+
+
+ENTRY_MARKER = b"## Session: "
+
+MONTH_DIR = re.compile(r"(\d{2})-[a-z]{3}")
+DAY_FILE = re.compile(r"(\d{2})\.md")
+
+
+def day_file(working_log_dir, saved_at):
+    """WORKING_LOG/YYYY/MM-mon/DD.md for a save time"""
+    return Path(working_log_dir) / saved_at.strftime("%Y") / saved_at.strftime("%m-%b").lower() / saved_at.strftime("%d.md")
+
+
+def day_header(saved_at):
+    """Heading written at the top of a new day file"""
+    month = saved_at.strftime("%m-%b").lower()
+    return f"""# Working Log - {saved_at.strftime('%d')} {month.split('-')[1].title()} {saved_at.strftime('%Y')}
+
+> Atlas Engineering Session Log
+> Professional Mode: Active
+
+---
+"""
+
+
+def format_entry(saved_at, context, next_task, working_directory, python_version):
+    """The text appended to the day file for one session"""
+    timestamp = saved_at.strftime("%Y-%m-%d %H:%M:%S")
+    return f"""
+## Session: {timestamp}
+
+### Context
+{context}
+
+### Next Task
+{next_task}
+
+### Session Details
+- Saved at: {timestamp}
+- Working Directory: {working_directory}
+- Python Version: {python_version}
+
+---
+"""
+
+
+def entry_location(working_log_dir, log_file, offset, length, entry):
+    """Describe where an appended entry lives, relative to WORKING_LOG/
+
+    `offset`/`length` are what append_entry reported for `entry`; leading
+    blank lines are skipped so the location starts at the "## Session:"
+    heading, the same place iter_entries() reports.
+    """
+    lead = len(entry) - len(entry.lstrip("\n"))
+    return {
+        "file": Path(log_file).relative_to(working_log_dir).as_posix(),
+        "offset": offset + lead,
+        "length": length - lead,
+    }
+
+
+def read_entry(working_log_dir, location):
+    """Read exactly one entry given its recorded location"""
+    with open(Path(working_log_dir) / location["file"], 'rb') as f:
+        f.seek(location["offset"])
+        data = f.read(location["length"])
+    return data.decode('utf-8', errors='replace')
+
+
+def day_files(working_log_dir, reverse=False):
+    """Yield ("YYYY-MM-DD", path) for every day file in date order"""
+    root = Path(working_log_dir)
+    if not root.is_dir():
+        return
+    for year in sorted((p for p in root.iterdir() if p.is_dir() and p.name.isdigit()),
+                       key=lambda p: p.name, reverse=reverse):
+        months = [(MONTH_DIR.fullmatch(p.name), p) for p in year.iterdir() if p.is_dir()]
+        for match, month in sorted(((m, p) for m, p in months if m),
+                                   key=lambda item: item[0].group(1), reverse=reverse):
+            days = [(DAY_FILE.fullmatch(p.name), p) for p in month.iterdir()]
+            for day_match, day in sorted(((m, p) for m, p in days if m),
+                                         key=lambda item: item[0].group(1), reverse=reverse):
+                yield f"{year.name}-{match.group(1)}-{day_match.group(1)}", day
+
+
+def scan_day(path):
+    """Return [(stamp, offset, length, text)] for the entries in one day file"""
+    entries = []
+    start = stamp = None
+    chunks = []
+    offset = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.startswith(ENTRY_MARKER):
+                if start is not None:
+                    entries.append((stamp, start, offset - start, b"".join(chunks)))
+                start, chunks = offset, []
+                stamp = line[len(ENTRY_MARKER):].decode('utf-8', errors='replace').strip()
+            if start is not None:
+                chunks.append(line)
+            offset += len(line)
+    if start is not None:
+        entries.append((stamp, start, offset - start, b"".join(chunks)))
+    return [(stamp, start, length, data.decode('utf-8', errors='replace'))
+            for stamp, start, length, data in entries]
+
+
+def iter_entries(working_log_dir, since=None, until=None, reverse=False):
+    """Yield working log entries one day file at a time
+
+    Each entry is a dict with timestamp (ISO), file (relative to
+    WORKING_LOG/), offset, length and text. `since` is inclusive and `until`
+    exclusive, both ISO timestamps or prefixes; day files outside the range
+    are skipped by name without being opened.
+    """
+    root = Path(working_log_dir)
+    for day, path in day_files(root, reverse=reverse):
+        if since and day < since[:10]:
+            if reverse:
+                return
+            continue
+        if until and day > until:
+            if reverse:
+                continue
+            return
+        entries = scan_day(path)
+        if reverse:
+            entries.reverse()
+        relative = path.relative_to(root).as_posix()
+        for stamp, offset, length, text in entries:
+            timestamp = stamp.replace(" ", "T")
+            if (since and timestamp < since) or (until and timestamp >= until):
+                continue
+            yield {
+                "timestamp": timestamp,
+                "file": relative,
+                "offset": offset,
+                "length": length,
+                "text": text,
+            }